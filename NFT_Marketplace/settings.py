@@ -45,6 +45,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'apis.admin_site_management',
     'apis.bidding_and_transection',
     'apis.collection_management',
@@ -119,6 +120,30 @@ elif len(sys.argv) > 0 and sys.argv[1] != 'collectstatic':
         "default": dj_database_url.parse(os.environ.get("DATABASE_URL")),
     }
 
+# The cache must be shared by the web workers and the management commands, and its
+# incr atomic: cached responses, order books, admin list counts and view
+# de-duplication are invalidated and counted through it. Redis at REDIS_URL (requires
+# the redis package) is required outside of development mode. In development mode
+# without REDIS_URL the cache is per process: invalidations and counters of a process
+# (cron commands included) are not seen by the others
+REDIS_URL = config.get('REDIS_URL') or os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+    }
+elif DEVELOPMENT_MODE is True:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 100000},
+        },
+    }
+elif len(sys.argv) > 0 and sys.argv[1] != 'collectstatic':
+    raise Exception("REDIS_URL environment variable not defined")
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -192,8 +217,9 @@ STATICFILES_FINDERS = (
 )
 
 REST_FRAMEWORK = {
+    # orjson is optional, JSON is rendered by DRF's encoder when it is not installed
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        "apis.renderers.FastJSONRenderer",
         "rest_framework.renderers.BrowsableAPIRenderer",
     ],
     "DEFAULT_PARSER_CLASSES": [
@@ -238,6 +264,115 @@ MEDIA_URL = "/media/"
 
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Uploads are stored once per content under MEDIA_ROOT/sha256/
+STORAGES = {
+    "default": {"BACKEND": "NFT_Marketplace.storage.ContentAddressedStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
 PROJECT_DIR = os.path.dirname(__file__)
 
+# NFT views are buffered in process and written to Nft.total_views every
+# NFT_VIEW_FLUSH_INTERVAL seconds, repeated views of a viewer within
+# NFT_VIEW_DEDUP_WINDOW seconds are counted once (0 counts every view)
+NFT_VIEW_FLUSH_INTERVAL = 10
+NFT_VIEW_DEDUP_WINDOW = 30 * 60
+# Number of reverse proxies in front of the application, anonymous viewers are told
+# apart by the address the outermost one appends to X-Forwarded-For. With 0 the
+# header is ignored and REMOTE_ADDR is used
+NFT_VIEW_TRUSTED_PROXIES = 0
+
+# Share of the sold price kept as service fee when a bid is settled
+NFT_SERVICE_FEE_RATE = 0.025
+
+# Broker fanning bid, sale and price events out to the /api/events/ streams. The
+# PostgreSQL broker reaches the clients of every worker, events of the management
+# commands included. 'apis.events.RedisBroker' with EVENT_BROKER_OPTIONS = {'url': ...}
+# does too, 'apis.events.InProcessBroker' only streams events of the same worker
+# Streams are served by an async view: route /api/events/ to ASGI workers, e.g.
+# gunicorn NFT_Marketplace.asgi:application -k uvicorn.workers.UvicornWorker, where an
+# open stream holds no worker. The other endpoints stay on the sync WSGI workers,
+# which refuse streams unless DEBUG is on
+EVENT_BROKER = 'apis.events.PostgresBroker'
+EVENT_BROKER_OPTIONS = {}
+EVENT_STREAM_KEEPALIVE = 15
+EVENT_STREAM_TIMEOUT = 300
+
+# The autocomplete index lives in the memory of each process, writes update it in the
+# process handling them and every index is rebuilt once older than this many seconds
+AUTOCOMPLETE_MAX_AGE = 300
+
+# Upper bounds of the price ranges counted by the NFT list price facet
+NFT_PRICE_FACET_EDGES = [0.1, 1, 10, 100]
+
+# Seconds anonymous read responses are cached, writes invalidate them earlier
+RESPONSE_CACHE_TIMEOUT = 60
+# Hits and misses of cached responses are counted in process and added to the cache
+# every RESPONSE_CACHE_STATS_INTERVAL seconds
+RESPONSE_CACHE_STATS_INTERVAL = 10
+
+# Seconds an order book is kept in process memory, writes invalidate it earlier
+ORDER_BOOK_MAX_AGE = 60
+
+# Manifest rows validated and inserted together by the bulk NFT mint
+NFT_BULK_MINT_CHUNK_SIZE = 500
+
+# Resized WebP and AVIF copies of uploaded images, ``name: (width, height, crop)``
+IMAGE_VARIANT_SIZES = {
+    'thumb': (200, 200, True),
+    'medium': (600, 600, False),
+    'large': (1200, 1200, False),
+}
+IMAGE_VARIANT_FORMATS = ['webp', 'avif']
+# Processes encoding variants, 0 encodes them in the request
+IMAGE_VARIANT_WORKERS = 2
+
+# The image hash index lives in the memory of each process and is rebuilt once older
+# than this many seconds
+IMAGE_HASH_MAX_AGE = 300
+# Differing bits of two image hashes up to which images are listed as similar
+IMAGE_HASH_MAX_DISTANCE = 10
+# Differing bits up to which a new NFT is refused as a copy of another owner's NFT
+NFT_DUPLICATE_IMAGE_DISTANCE = 4
+
+# API request logs (rest_framework_tracking) are written by a background thread of each
+# process, by batches of up to REQUEST_LOG_BATCH_SIZE logs or every
+# REQUEST_LOG_FLUSH_INTERVAL seconds. False writes them in the request, as TEST_RUNNER
+# does since the writer thread would write outside of the test transactions
+REQUEST_LOG_ASYNC = True
+REQUEST_LOG_QUEUE_SIZE = 10000
+REQUEST_LOG_BATCH_SIZE = 200
+REQUEST_LOG_FLUSH_INTERVAL = 1.0
+# When the queue is full: drop_new, drop_oldest or block (up to REQUEST_LOG_BLOCK_TIMEOUT
+# seconds, then drop)
+REQUEST_LOG_OVERFLOW = 'drop_new'
+REQUEST_LOG_BLOCK_TIMEOUT = 0.5
+# Share of the requests logged
+REQUEST_LOG_SAMPLE_RATE = 1.0
+# manage.py test writes request logs synchronously, see REQUEST_LOG_ASYNC
+TEST_RUNNER = 'NFT_Marketplace.test_runner.TestRunner'
+
+# archive_records moves rows older than their retention to gzip compressed JSON Lines
+# files under ARCHIVE_ROOT, ARCHIVE_CHUNK_SIZE rows per file
+ARCHIVE_ROOT = os.path.join(BASE_DIR, "archive")
+ARCHIVE_CHUNK_SIZE = 10000
+ARCHIVE_RETENTION_DAYS = {
+    'rest_framework_tracking.apirequestlog': 30,
+    'bidding_and_transection.nfttransaction': 365,
+    'wallet_management.wallettransaction': 365,
+    'nft_management.nftpricehistory': 365,
+}
+
+# Entity counts of the admin dashboard: 'counters' maintained from writes, 'estimated'
+# from PostgreSQL statistics or 'exact' from COUNT queries
+DASHBOARD_COUNTS = 'counters'
+
+# Rows per page of the admin lists, whose counts are cached this many seconds per filter.
+# Pages past ADMIN_PAGINATOR_OFFSET_LIMIT rows are read by key instead of with OFFSET
+ADMIN_PAGE_SIZE = 5
+ADMIN_PAGINATOR_COUNT_TIMEOUT = 30
+ADMIN_PAGINATOR_OFFSET_LIMIT = 1000
+# Rows read from the database and written to the client at a time by the admin exports
+ADMIN_EXPORT_CHUNK_SIZE = 2000
+
 SWAGGER_SETTINGS = {"SECURITY_DEFINITIONS": {"api_key": {"type": "apiKey", "in": "header", "name": "Authorization"}}}
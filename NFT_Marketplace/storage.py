@@ -0,0 +1,68 @@
+import hashlib
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.dispatch import Signal
+
+ROOT = 'sha256'
+
+# sent with the stored ``name`` and the uploaded ``content`` once an upload is stored,
+# or found already stored
+file_stored = Signal()
+
+
+class DerivedFile(ContentFile):
+    """
+    Content of a file derived from a stored file, an image variant, which is saved
+    under the name given rather than renamed after its content
+    """
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage naming uploads after the SHA-256 of their content
+
+    ``posts/dragon.png`` is stored as ``sha256/ab/cd/abcd....png``, the extension of the
+    requested name is kept. The digest is computed over the chunks of the upload, which
+    is never read whole in memory. Uploading content already stored writes nothing and
+    returns the existing name, so identical files are stored once and a name always
+    refers to the same bytes, which can be cached forever.
+
+    Names already inside the content-addressed tree and DerivedFile content are stored
+    as given, this is how files derived from a stored file (image variants) are written
+    next to it, including next to files stored before this storage or outside of it
+    (``posts/default.jpg``).
+
+    Stored files may be shared by several rows, they must not be deleted along with one.
+    ``file_stored`` is sent for each upload, so that what is derived from its content
+    is computed once, while it is at hand.
+    """
+
+    def content_name(self, name, content):
+        """
+        Returns the content-addressed name of ``content`` uploaded as ``name``
+        """
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        hexdigest = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        return f"{ROOT}/{hexdigest[:2]}/{hexdigest[2:4]}/{hexdigest}{extension}"
+
+    def is_content_addressed(self, name):
+        return name.replace('\\', '/').startswith(f'{ROOT}/')
+
+    def _save(self, name, content):
+        if self.is_content_addressed(name) or isinstance(content, DerivedFile):
+            return super()._save(name, content)
+        target = self.content_name(name, content)
+        if not self.exists(target):
+            if hasattr(content, 'seek'):
+                content.seek(0)
+            saved = super()._save(target, content)
+            if saved != target:
+                # saved concurrently under the same name, the content is the same
+                self.delete(saved)
+        file_stored.send(sender=self.__class__, name=target, content=content)
+        return target
@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Test runner writing API request logs in the request
+
+    The request log writer thread would insert logs outside of the test transactions,
+    tests covering it turn it back on with ``override_settings``.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.REQUEST_LOG_ASYNC = False
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:41
+
+import django.contrib.postgres.indexes
+from apis.migration_operations import AddPostgresIndex
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_profile_is_active'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddPostgresIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['first_name'], name='user_first_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        AddPostgresIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['last_name'], name='user_last_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
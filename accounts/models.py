@@ -1,4 +1,5 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
@@ -95,6 +96,12 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["first_name", "last_name"]
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=['first_name'], name='user_first_name_trgm_idx', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['last_name'], name='user_last_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
+
     def __str__(self):
         """Str representation of user accounts.
         Returns
@@ -122,6 +129,7 @@ class Profile(models.Model):
     banner_image = models.ImageField(
         _("bannner_Image"), upload_to=upload_to, default='posts/default.jpg')
     about = models.TextField(null=True)
+    image_variants = models.JSONField(null=True, blank=True, editable=False)
 
     def __str__(self):
         """Str representation of user accounts.
@@ -0,0 +1,7 @@
+from apis import image_variants, response_cache
+
+from .models import Profile, User
+
+image_variants.track(Profile, 'profile_image', 'banner_image')
+# names shown next to NFTs and collections
+response_cache.track(User, fields=('first_name', 'last_name'))
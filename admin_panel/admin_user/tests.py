@@ -1,3 +1,98 @@
-from django.test import TestCase
+from accounts.models import User
+from admin_panel.export import csv_lines
+from admin_panel.paginator import AdminPaginator
+from django.core.cache import cache
+from django.db import connection
+from django.http import QueryDict
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+
+class CsvExportTest(SimpleTestCase):
+    """
+    Exported texts are never evaluated as formulas by spreadsheets
+    """
+
+    def test_formulas_escaped(self):
+        rows = [('=HYPERLINK("http://example.com")', '+1', '-1', '@SUM(A1)', '\tx', '\rx'),
+                ('name', 'a=b', -1, 2.5, None, '')]
+        lines = ''.join(csv_lines(iter(rows), ['a', 'b', 'c', 'd', 'e', 'f'], 1))
+        self.assertEqual(lines.split('\r\n'), [
+            'a,b,c,d,e,f',
+            '"\'=HYPERLINK(""http://example.com"")",\'+1,\'-1,\'@SUM(A1),\'\tx,"\'\rx"',
+            'name,a=b,-1,2.5,,',
+            '',
+        ])
+
+
+@override_settings(ADMIN_PAGE_SIZE=2, ADMIN_PAGINATOR_OFFSET_LIMIT=4,
+                   CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AdminPaginatorTest(TestCase):
+    """
+    Pages are read through the key index away from the first pages, and counts are cached
+    """
+
+    def setUp(self):
+        cache.clear()
+        for i in range(11):
+            User.objects.create_user(f'user{i}@example.com', f'First{i}', f'Last{i}', 'password')
+        self.ids = list(User.objects.order_by('id').values_list('id', flat=True))
+
+    def paginator(self, **params):
+        return AdminPaginator(User.objects.all(), request=RequestFactory().get('/', {'is_active': 'True', **params}))
+
+    def get_page(self, **params):
+        paginator = self.paginator(**params)
+        paginator.count
+        with CaptureQueriesContext(connection) as context:
+            page = paginator.get_page(params.get('page'))
+        return [user.id for user in page], [query['sql'] for query in context]
+
+    def test_links(self):
+        page = self.paginator().get_page(1)
+        self.assertEqual([user.id for user in page], self.ids[:2])
+        self.assertEqual(QueryDict(page.next_query), QueryDict(f'is_active=True&page=2&after={self.ids[1]}'))
+        self.assertEqual(QueryDict(page.last_query), QueryDict('is_active=True&page=6'))
+        page = self.paginator(page=3, after=self.ids[3]).get_page(3)
+        self.assertEqual(QueryDict(page.previous_query), QueryDict(f'is_active=True&page=2&before={self.ids[4]}'))
+
+    def test_after_and_before(self):
+        ids, queries = self.get_page(page='4', after=str(self.ids[5]))
+        self.assertEqual(ids, self.ids[6:8])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('OFFSET', queries[0])
+        ids, queries = self.get_page(page='3', before=str(self.ids[6]))
+        self.assertEqual(ids, self.ids[4:6])
+        self.assertNotIn('OFFSET', queries[0])
+
+    def test_deep_page(self):
+        ids, queries = self.get_page(page='4')
+        self.assertEqual(ids, self.ids[6:8])
+        # the OFFSET is over the key only
+        self.assertEqual(len(queries), 2)
+        self.assertIn('OFFSET', queries[0])
+        self.assertNotIn('email', queries[0])
+        self.assertNotIn('OFFSET', queries[1])
+
+    def test_last_page(self):
+        ids, queries = self.get_page(page='6')
+        self.assertEqual(ids, self.ids[10:])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('OFFSET', queries[0])
+        self.assertIn('DESC', queries[0])
+        # out of range numbers show the last page
+        self.assertEqual(self.get_page(page='60')[0], self.ids[10:])
+
+    def test_count_cached(self):
+        self.assertEqual(self.paginator().count, 11)
+        User.objects.create_user('late@example.com', 'Late', 'User', 'password')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.paginator(page=2).count, 11)
+        # other filters are counted apart
+        self.assertEqual(AdminPaginator(User.objects.filter(is_active=False)).count, 0)
+
+    def test_list_header_shows_total(self):
+        self.client.force_login(User.objects.create_superuser('admin@example.com', 'Admin', 'User', 'password'))
+        response = self.client.get(reverse('admin_user:home'), {'username': 'nobody'})
+        self.assertEqual(response.context['user_count'], 12)
@@ -1,5 +1,7 @@
 from accounts.models import User, Profile
-from django.core.paginator import Paginator
+from admin_panel.export import ExportView
+from admin_panel.paginator import AdminPaginator
+from apis.admin_site_management import counters
 from django.http import HttpResponseRedirect
 from django.shortcuts import render
 from django.urls import reverse
@@ -34,14 +36,27 @@ class ListUserView(View):
 
         """
         user = User.objects.all().order_by('id')
-        user_count = user.count()
         myfilter = UserFilter(request.GET, queryset=user)
         user = myfilter.qs
-        p = Paginator(user.order_by('id'), 5)
+        p = AdminPaginator(user, request=request)
         page = request.GET.get('page')
         obj = p.get_page(page)
         return render(request, 'home2.html',
-                      {'users': user, 'myfilter': myfilter, 'obj': obj, 'user_count': user_count})
+                      {'users': user, 'myfilter': myfilter, 'obj': obj, 'user_count': counters.count('users')})
+
+
+class UserExportView(ExportView):
+    """
+    **UserExportView class**
+
+    This view streams the filtered users as CSV or JSON Lines
+
+    """
+    queryset = User.objects.all()
+    filterset_class = UserFilter
+    fields = ['id', 'email', 'username', 'first_name', 'last_name', 'phone_number', 'is_active', 'is_staff',
+              'is_superuser', 'created_at']
+    filename = 'users'
 
 
 class DeleteUserView(View):
@@ -104,7 +119,7 @@ class ListProfileView(View):
         profile_obj = Profile.objects.all().order_by('id')
         pfilter = ProfileFilter(request.GET, queryset=profile_obj)
         profile_obj = pfilter.qs
-        p = Paginator(profile_obj.order_by('id'), 5)
+        p = AdminPaginator(profile_obj, request=request)
         page = request.GET.get('page')
         obj = p.get_page(page)
         return render(request, 'profiles.html', {"profile_obj": profile_obj, 'pfilter': pfilter, 'obj': obj})
@@ -6,6 +6,8 @@ app_name = 'bidding'
 urlpatterns = [
     path('bidding/', views.BiddingdetailView.as_view(), name='bidding-list'),
     path('bidding/delete/<int:id>', views.DeleteBiddingView.as_view(), name='bidding-delete'),
+    path('bidding/export/', views.BiddingExportView.as_view(), name='bidding-export'),
     path('nft_transaction/', views.TransactiondetailView.as_view(), name='Nft-transaction-list'),
+    path('nft_transaction/export/', views.TransactionExportView.as_view(), name='transaction-export'),
     path('nft_transaction/delete/<int:id>', views.DeleteTransactionView.as_view(), name='transaction-delete'),
 ]
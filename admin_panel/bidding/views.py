@@ -1,5 +1,7 @@
+from admin_panel.export import ExportView
+from admin_panel.paginator import AdminPaginator
+from apis.admin_site_management import counters
 from apis.bidding_and_transection.models import Bidding, NftTransaction
-from django.core.paginator import Paginator
 from django.http.response import HttpResponseRedirect
 from django.shortcuts import render
 from django.urls.base import reverse
@@ -35,14 +37,13 @@ class BiddingdetailView(View):
 
         """
         bidding_list = Bidding.objects.all().order_by('id')
-        bidding_count = bidding_list.count()
         myfilter = BiddingFilter(request.GET, queryset=bidding_list)
         bidding = myfilter.qs
-        p = Paginator(bidding.order_by('id'), 5)
+        p = AdminPaginator(bidding, request=request)
         page = request.GET.get('page')
         obj = p.get_page(page)
         return render(request, 'bidding_index.html',
-                      {'biddings': bidding, 'myfilter': myfilter, 'obj': obj, 'bidding_count': bidding_count})
+                      {'biddings': bidding, 'myfilter': myfilter, 'obj': obj, 'bidding_count': counters.count('bids')})
 
 
 class DeleteBiddingView(View):
@@ -65,15 +66,14 @@ class TransactiondetailView(View):
 
     def get(self, request):
         Transaction = NftTransaction.objects.all().order_by('id')
-        Transaction_count = Transaction.count()
         myfilter = BiddingTransactionFilter(request.GET, queryset=Transaction)
         transaction = myfilter.qs
-        p = Paginator(transaction.order_by('id'), 5)
+        p = AdminPaginator(transaction, request=request)
         page = request.GET.get('page')
         obj = p.get_page(page)
         return render(request, 'nft_transaction_index.html',
                       {'transaction': transaction, 'myfilter': myfilter, 'obj': obj,
-                       'Transaction_count': Transaction_count})
+                       'Transaction_count': counters.count('transactions')})
 
 
 class DeleteTransactionView(DeleteView):
@@ -87,3 +87,24 @@ class DeleteTransactionView(DeleteView):
         object.save()
         url = reverse('bidding:Nft-transaction-list')
         return HttpResponseRedirect(url)
+
+
+class BiddingExportView(ExportView):
+    """
+    View streaming the filtered bids as CSV or JSON Lines
+    """
+    queryset = Bidding.objects.all()
+    filterset_class = BiddingFilter
+    fields = ['id', 'nft_id', 'nft__name', 'offer_by__email', 'price', 'bidding_date', 'expiry_date', 'status']
+    filename = 'bids'
+
+
+class TransactionExportView(ExportView):
+    """
+    View streaming the filtered NFT transactions as CSV or JSON Lines
+    """
+    queryset = NftTransaction.objects.all()
+    filterset_class = BiddingTransactionFilter
+    fields = ['id', 'nft_id', 'nft__name', 'seller__email', 'buyer__email', 'wallet__wallet_address',
+              'sold_price', 'service_fee', 'sold_date', 'is_removed']
+    filename = 'nft-transactions'
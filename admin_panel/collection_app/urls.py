@@ -7,6 +7,7 @@ app_name = "nft_management"
 
 urlpatterns = [
     path("list_collection/", views.ListCollectionView.as_view(), name='list-collection'),
+    path("list_collection/export/", views.CollectionExportView.as_view(), name='export-collection'),
     path("delete_collection/<int:id>/", views.DeleteCollectionView.as_view(), name='delete-collection'),
     path("list_category/", views.ListCategoryView.as_view(), name='list-category'),
     path("create_category/", views.CreateCategoryView.as_view(), name='create-category'),
@@ -1,4 +1,5 @@
-from django.core.paginator import Paginator
+from admin_panel.export import ExportView
+from admin_panel.paginator import AdminPaginator
 from django.views import View
 from django.urls import reverse, reverse_lazy
 from django.shortcuts import render, redirect
@@ -9,6 +10,7 @@ from accounts.models import User
 from admin_panel.collection_app.filters import CollectionFilter, CategoryFilter, FavouriteNftFilter, ReportedNftFilter, \
     nphFilter, nftFilter
 from admin_panel.collection_app.forms import CategoryForm
+from apis.nft_management import image_hash
 from apis.nft_management.models import Collection, Category, FavouriteNft, ReportedNft, Nft, NftPriceHistory
 
 
@@ -42,7 +44,7 @@ class ListCollectionView(View):
         collection_list = Collection.objects.all()
         filter_collection = CollectionFilter(request.GET, collection_list)
         collection_list = filter_collection.qs
-        p = Paginator(collection_list.order_by('id'), 5)
+        p = AdminPaginator(collection_list, request=request)
         page = request.GET.get('page')
         obj = p.get_page(page)
         return render(request, 'list_collection.html', {
@@ -52,6 +54,19 @@ class ListCollectionView(View):
         })
 
 
+class CollectionExportView(ExportView):
+    """
+    **CollectionExportView class**
+
+    This view streams the filtered collections as CSV or JSON Lines
+
+    """
+    queryset = Collection.objects.all()
+    filterset_class = CollectionFilter
+    fields = ['id', 'name', 'category__name', 'user__email', 'created_at', 'is_removed']
+    filename = 'collections'
+
+
 class DeleteCollectionView(View):
     """
     **DeleteCollectionView class**
@@ -172,7 +187,7 @@ class ListCategoryView(View):
         category_list = Category.objects.all()
         filter_category = CategoryFilter(request.GET, category_list)
         category_list = filter_category.qs
-        p = Paginator(category_list.order_by('id'), 5)
+        p = AdminPaginator(category_list, request=request)
         page = request.GET.get('page')
         obj = p.get_page(page)
         return render(request, 'list_category.html', {
@@ -303,7 +318,7 @@ class ListFavoritesNFTView(View):
         favorites_nft_list = FavouriteNft.objects.all()
         filter_favorites_nft = FavouriteNftFilter(request.GET, favorites_nft_list)
         favorites_nft_list = filter_favorites_nft.qs
-        p = Paginator(favorites_nft_list.order_by('id'), 5)
+        p = AdminPaginator(favorites_nft_list, request=request)
         page = request.GET.get('page')
         obj = p.get_page(page)
         return render(request, 'list_favorites_nft.html', {
@@ -371,12 +386,18 @@ class ListReportedNFTView(View):
         `render:` list-collection template and collection list
 
         """
-        reported_nft_list = ReportedNft.objects.all()
+        reported_nft_list = ReportedNft.objects.select_related('nft', 'reporter')
         filter_reported_nft = ReportedNftFilter(request.GET, reported_nft_list)
         reported_nft_list = filter_reported_nft.qs
-        p = Paginator(reported_nft_list.order_by('id'), 5)
+        p = AdminPaginator(reported_nft_list, request=request)
         page = request.GET.get('page')
         obj = p.get_page(page)
+        # NFTs reported as stolen are listed with the NFTs whose image looks the same
+        for reported_nft in obj:
+            reported_nft.similar_nfts = []
+            if reported_nft.report_type == 'might_be_stolen' and reported_nft.nft.image_hash is not None:
+                reported_nft.similar_nfts = image_hash.similar(image_hash.from_db(reported_nft.nft.image_hash),
+                                                               exclude=reported_nft.nft_id)
 
         return render(request, 'list_reported_nft.html', {
             'reported_nft_list': reported_nft_list,
@@ -436,7 +457,7 @@ class NftListDisplay(View):
         nfts = Nft.objects.all().order_by('id')
         myfilter = nftFilter(request.GET, queryset=nfts)
         nftis = myfilter.qs
-        p = Paginator(nftis.order_by('id'), 5)
+        p = AdminPaginator(nftis, request=request)
         page = request.GET.get('page')
         obj = p.get_page(page)
         return render(request, 'nft-list.html', {'nftis': nftis, 'myfilter': myfilter, 'obj': obj})
@@ -593,7 +614,7 @@ class PriceHistoryList(ListView):
         nfts = NftPriceHistory.objects.all().order_by('id')
         myfilter = nphFilter(request.GET, queryset=nfts)
         npriceh = myfilter.qs
-        p = Paginator(npriceh.order_by('id'), 5)
+        p = AdminPaginator(npriceh, request=request)
         page = request.GET.get('page')
         obj = p.get_page(page)
         return render(request, 'nftprice_list.html', {'npricehs': npriceh, 'myfilter': myfilter, 'obj': obj})
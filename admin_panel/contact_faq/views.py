@@ -7,7 +7,7 @@ from django.http import HttpResponseRedirect
 from admin_panel.contact_faq.forms import FAQForm
 from apis.admin_site_management.models import FAQ
 from .filters import ContactFilter,FAQFilter
-from django.core.paginator import Paginator
+from admin_panel.paginator import AdminPaginator
 
 
 
@@ -47,7 +47,7 @@ class ListContactView(View):
         contact_list = Contact.objects.all()
         cfilter = ContactFilter(request.GET, queryset=  contact_list)
         contact_list = cfilter.qs
-        p = Paginator(contact_list.order_by('id'), 5)
+        p = AdminPaginator(contact_list, request=request)
         page = request.GET.get('page')
         obj = p.get_page(page)
 
@@ -183,7 +183,7 @@ class ListFAQView(View):
         faq_list = FAQ.objects.all()
         faqfilter = FAQFilter(request.GET, queryset=faq_list)
         faq_list = faqfilter.qs
-        p = Paginator(faq_list.order_by('id'), 5)
+        p = AdminPaginator(faq_list, request=request)
         page = request.GET.get('page')
         obj = p.get_page(page)
 
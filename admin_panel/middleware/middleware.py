@@ -12,10 +12,14 @@ class UserRestrictionMiddleware:
         paths = [
             '/admin_site/dashboard/',
             '/admin_site/home/',
+            '/admin_site/home/export/',
             '/admin_site/profiles/',
             '/admin_site/bidding/',
+            '/admin_site/bidding/export/',
             '/admin_site/nft_transaction/',
+            '/admin_site/nft_transaction/export/',
             '/admin_site/list_collection/',
+            '/admin_site/list_collection/export/',
             '/admin_site/list_category/',
             '/admin_site/create_category/',
             '/admin_site/update_category/',
@@ -24,7 +28,9 @@ class UserRestrictionMiddleware:
             '/admin_site/nftprice-list/',
             '/admin_site/list_faq/',
             '/admin_site/wallet_transaction/',
+            '/admin_site/wallet_transaction/export/',
             '/admin_site/wallet/',
+            '/admin_site/wallet/export/',
             '/admin_site/list_contact/',
         ]
 
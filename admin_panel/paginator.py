@@ -0,0 +1,138 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.http import QueryDict
+from django.utils.functional import cached_property
+
+COUNT_KEY = 'admin_paginator:count:{}'
+
+
+class AdminPage(Page):
+    """
+    Page of an AdminPaginator, with the query strings of the links to its neighbours
+
+    The links keep the filters of the request, the next and previous links carry the
+    key of the row the page starts after or ends before, so that following them never
+    uses OFFSET however deep the page.
+    """
+
+    def _query(self, number, **cursor):
+        params = self.paginator.params.copy()
+        for name in ('page', 'after', 'before'):
+            params.pop(name, None)
+        params['page'] = number
+        for name, value in cursor.items():
+            params[name] = value
+        return params.urlencode()
+
+    @property
+    def first_query(self):
+        return self._query(1)
+
+    @property
+    def last_query(self):
+        return self._query(self.paginator.num_pages)
+
+    @property
+    def next_query(self):
+        if not self.object_list:
+            return self._query(self.next_page_number())
+        return self._query(self.next_page_number(), after=getattr(self.object_list[-1], self.paginator.key))
+
+    @property
+    def previous_query(self):
+        if not self.object_list:
+            return self._query(self.previous_page_number())
+        return self._query(self.previous_page_number(), before=getattr(self.object_list[0], self.paginator.key))
+
+
+class AdminPaginator(Paginator):
+    """
+    Paginator of the admin list views
+
+    The count of each filtered queryset is cached for ``ADMIN_PAGINATOR_COUNT_TIMEOUT``
+    seconds, keyed by its SQL, instead of being counted on every page view. Pages are
+    ``ADMIN_PAGE_SIZE`` rows long.
+
+    Rows are ordered by ``key``, a unique field. The first pages are sliced with
+    OFFSET. Deeper pages reached through the next and previous links are read after or
+    before the key carried by the link, through the index, the last page is read from
+    the end, and other deep pages jumped to directly find their first key with an
+    OFFSET over the key only, which an index-only scan serves.
+
+    Parameters
+    ----------
+    object_list : django.db.models.QuerySet
+
+    per_page : integer
+
+    request : django.http.request
+        the ``after`` and ``before`` keys and the filters of the links are read from its
+        query string
+
+    key : str
+    """
+
+    def __init__(self, object_list, per_page=None, request=None, key='id', **kwargs):
+        self.key = key
+        self.params = request.GET if request is not None else QueryDict()
+        per_page = per_page or getattr(settings, 'ADMIN_PAGE_SIZE', 5)
+        super().__init__(object_list.order_by(key), per_page, **kwargs)
+
+    @cached_property
+    def count(self):
+        key = COUNT_KEY.format(hashlib.md5(str(self.object_list.query).encode()).hexdigest())
+        count = cache.get(key)
+        if count is None:
+            count = self.object_list.count()
+            cache.set(key, count, getattr(settings, 'ADMIN_PAGINATOR_COUNT_TIMEOUT', 30))
+        return count
+
+    def get_page(self, number):
+        """
+        Returns a valid page, the first or last one for an invalid or out of range number
+        """
+        try:
+            number = self.validate_number(number)
+        except PageNotAnInteger:
+            return self.page(1)
+        except EmptyPage:
+            return self.page(self.num_pages)
+        return self.page(number, self._cursor())
+
+    def page(self, number, cursor=None):
+        """
+        Returns a page, read after or before the key of ``cursor``, an ``('after', key)``
+        or ``('before', key)`` pair, if given
+        """
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = min(bottom + self.per_page, self.count)
+        queryset = self.object_list
+        if cursor is not None:
+            lookup, value = cursor
+            if lookup == 'after':
+                rows = list(queryset.filter(**{f'{self.key}__gt': value})[:self.per_page])
+            else:
+                rows = list(queryset.filter(**{f'{self.key}__lt': value}).reverse()[:self.per_page])[::-1]
+        elif bottom < getattr(settings, 'ADMIN_PAGINATOR_OFFSET_LIMIT', 1000):
+            rows = list(queryset[bottom:top])
+        elif number == self.num_pages:
+            rows = list(queryset.reverse()[:top - bottom])[::-1]
+        else:
+            first = list(queryset.values_list(self.key, flat=True)[bottom:bottom + 1])
+            rows = list(queryset.filter(**{f'{self.key}__gte': first[0]})[:self.per_page]) if first else []
+        return AdminPage(rows, number, self)
+
+    def _cursor(self):
+        for lookup in ('after', 'before'):
+            value = self.params.get(lookup)
+            if value:
+                try:
+                    return lookup, self.object_list.model._meta.get_field(self.key).to_python(value)
+                except ValidationError:
+                    return None
+        return None
@@ -1,24 +1,24 @@
 from django.http import HttpResponseRedirect
 from django.shortcuts import render
 from django.views.generic import View
-from accounts.models import User
-from apis.nft_management.models import Collection, Category, Nft
+from apis.admin_site_management import counters
 
 
 
 class DashboardTemplateView(View):
 
     def get(self, request):
-        user_list_count = User.objects.all().count()
-        nft_list_count = Nft.objects.all().count()
-        category_list_count = Category.objects.all().count()
-        collection_list_count = Collection.objects.all().count()
+        dashboard_counters = counters.dashboard()
 
         return render(request, 'nft_admin/index.html', {
             'user': request.user,
             'image': 'favicon.svg',
-            'user_count' : user_list_count,
-            'nft_count': nft_list_count,
-            'category_count': category_list_count,
-            'collection_count': collection_list_count
+            'user_count' : dashboard_counters['users'],
+            'nft_count': dashboard_counters['nfts'],
+            'category_count': dashboard_counters['categories'],
+            'collection_count': dashboard_counters['collections'],
+            'sales_today': dashboard_counters['sales_today'],
+            'volume_today': dashboard_counters['volume_today'],
+            'open_bids_count': dashboard_counters['open_bids'],
+            'unresolved_reports_count': dashboard_counters['unresolved_reports'],
         })
@@ -5,6 +5,8 @@ app_name = 'wallet_manager'
 
 urlpatterns = [
     path('wallet_transaction/', views.WalletTransactiondetailView.as_view(), name='wallet-transaction'),
+    path('wallet_transaction/export/', views.WalletTransactionExportView.as_view(), name='wallet-transaction-export'),
     path('wallet/', views.WalletDisplay.as_view(), name='wallet'),
+    path('wallet/export/', views.WalletExportView.as_view(), name='wallet-export'),
     path('wallet/<int:id>', views.DeleteWalletView.as_view(), name='wallet-delete'),
 ]
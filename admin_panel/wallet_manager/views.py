@@ -5,32 +5,47 @@ from django.views.generic.edit import DeleteView
 from django.views import View
 from .filters import WalletFilter, WalletTransactionFilter
 from apis.wallet_management.models import Wallet, WalletTransaction
-from django.core.paginator import Paginator
+from admin_panel.export import ExportView
+from admin_panel.paginator import AdminPaginator
+from apis.admin_site_management import counters
 
 
 class WalletTransactiondetailView(View):
     def get(self, request):
         walletTransaction = WalletTransaction.objects.all().order_by('id')
-        walletTransaction_count=walletTransaction.count()
         myfilter = WalletTransactionFilter(request.GET, queryset=walletTransaction)
         wallettransaction = myfilter.qs
-        p = Paginator(wallettransaction.order_by('id'), 5)
+        p = AdminPaginator(wallettransaction, request=request)
         page = request.GET.get('page')
         obj = p.get_page(page)
         return render(request, 'wallet_transaction_index.html',
-                      {'wallet_transactions': wallettransaction, 'myfilter': myfilter, 'obj': obj,'walletTransaction_count':walletTransaction_count})
+                      {'wallet_transactions': wallettransaction, 'myfilter': myfilter, 'obj': obj,'walletTransaction_count': counters.count('wallet_transactions')})
 
 
 class WalletDisplay(View):
     def get(self, request):
         wallet = Wallet.objects.all().order_by('id')
-        wallet_count = wallet.count()
         myfilter = WalletFilter(request.GET, queryset=wallet)
         wallet = myfilter.qs
-        p = Paginator(wallet.order_by('id'), 5)
+        p = AdminPaginator(wallet, request=request)
         page = request.GET.get('page')
         obj = p.get_page(page)
-        return render(request, 'index.html', {'wallets': wallet, 'myfilter': myfilter, 'obj': obj,'wallet_count':wallet_count})
+        return render(request, 'index.html', {'wallets': wallet, 'myfilter': myfilter, 'obj': obj,'wallet_count': counters.count('wallets')})
+
+
+class WalletTransactionExportView(ExportView):
+    queryset = WalletTransaction.objects.all()
+    filterset_class = WalletTransactionFilter
+    fields = ['id', 'wallet__wallet_address', 'wallet__user__email', 'amount', 'transaction_type',
+              'transaction_date']
+    filename = 'wallet-transactions'
+
+
+class WalletExportView(ExportView):
+    queryset = Wallet.objects.all()
+    filterset_class = WalletFilter
+    fields = ['id', 'user__email', 'wallet_address', 'current_balance', 'is_verified', 'is_active', 'is_removed']
+    filename = 'wallets'
 
 
 class DeleteWalletView(DeleteView):
@@ -0,0 +1,197 @@
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+from .models import EntityCounter
+
+# name -> (model, filters), counters of the rows of a model matching equality filters
+counters = {}
+# name -> (model, date field, summed field), counters of the rows of each day, stored
+# under ``name:YYYY-MM-DD``
+daily_counters = {}
+
+
+def day_name(name, day=None):
+    return f"{name}:{(day or timezone.localdate()).isoformat()}"
+
+
+def _matches(instance, filters):
+    return all(getattr(instance, field) == value for field, value in filters.items())
+
+
+def add(name, count, total=0.0):
+    """
+    Adds to a counter once the current transaction is committed
+
+    A counter which does not exist yet is left to be computed from its rows when it is
+    first read, computing it here would count the other changes of the transaction
+    twice.
+    """
+    def run():
+        EntityCounter.objects.filter(name=name).update(
+            count=F('count') + count, total=F('total') + total, updated_at=timezone.now()
+        )
+    transaction.on_commit(run)
+
+
+def exact(name):
+    """
+    Returns the ``(count, total)`` of a counter computed from its rows
+    """
+    base, _, day = name.partition(':')
+    if base in counters:
+        model, filters = counters[base]
+        return model.objects.filter(**filters).count(), 0.0
+    model, date_field, total_field = daily_counters[base]
+    start = timezone.make_aware(datetime.fromisoformat(day))
+    rows = model.objects.filter(**{f'{date_field}__gte': start, f'{date_field}__lt': start + timedelta(days=1)})
+    if total_field is None:
+        return rows.count(), 0.0
+    result = rows.aggregate(count=Count('pk'), total=Sum(total_field))
+    return result['count'], result['total'] or 0.0
+
+
+def reconcile(name):
+    """
+    Sets a counter to the value computed from its rows
+    """
+    count, total = exact(name)
+    try:
+        EntityCounter.objects.update_or_create(name=name, defaults={'count': count, 'total': total})
+    except IntegrityError:
+        # created concurrently, it is set on the next reconciliation
+        pass
+    return count, total
+
+
+def reconcile_all():
+    """
+    Sets every counter and the counters of today to the values computed from their rows
+
+    Writes which skip signals (bulk inserts, queryset updates and deletes) leave the
+    counters off, run this periodically to correct them.
+    """
+    names = list(counters) + [day_name(name) for name in daily_counters]
+    return {name: reconcile(name) for name in names}
+
+
+def estimated(*models):
+    """
+    Returns the row counts of models estimated by PostgreSQL statistics, None elsewhere
+
+    ``pg_class.reltuples`` is updated by VACUUM and ANALYZE, it is read in constant time
+    but may be off by the rows written since. It is -1 for tables never analyzed.
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    tables = {model._meta.db_table: model for model in models}
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relname, reltuples FROM pg_class WHERE relkind = 'r' AND relname = ANY(%s)",
+                       [list(tables)])
+        rows = dict(cursor.fetchall())
+    return {model: max(int(rows.get(table, 0)), 0) for table, model in tables.items()}
+
+
+def values(*names):
+    """
+    Returns ``{name: (count, total)}`` of counters read with a single query
+
+    Missing counters, the first time they are read or on a new day, are computed from
+    their rows.
+    """
+    stored = {counter.name: (counter.count, counter.total)
+              for counter in EntityCounter.objects.filter(name__in=names)}
+    return {name: stored[name] if name in stored else reconcile(name) for name in names}
+
+
+def count(name):
+    return values(name)[name][0]
+
+
+def _remember_matches(sender, instance, update_fields=None, **kwargs):
+    instance._counted = {}
+    for name, (model, filters) in counters.items():
+        if model is sender and filters and instance.pk and \
+                (update_fields is None or set(filters) & set(update_fields)):
+            instance._counted[name] = sender.objects.filter(pk=instance.pk, **filters).exists()
+
+
+def _count_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    for name, (model, filters) in counters.items():
+        if model is not sender:
+            continue
+        matches = _matches(instance, filters)
+        if created:
+            if matches:
+                add(name, 1)
+        elif name in getattr(instance, '_counted', {}) and instance._counted[name] != matches:
+            add(name, 1 if matches else -1)
+    if created:
+        for name, (model, date_field, total_field) in daily_counters.items():
+            if model is sender and getattr(instance, date_field) is not None:
+                day = timezone.localdate(getattr(instance, date_field))
+                add(day_name(name, day), 1, getattr(instance, total_field) if total_field else 0.0)
+
+
+def _count_deleted(sender, instance, **kwargs):
+    for name, (model, filters) in counters.items():
+        if model is sender and _matches(instance, filters):
+            add(name, -1)
+    for name, (model, date_field, total_field) in daily_counters.items():
+        if model is sender and getattr(instance, date_field) is not None and \
+                timezone.localdate(getattr(instance, date_field)) == timezone.localdate():
+            add(day_name(name), -1, -getattr(instance, total_field) if total_field else 0.0)
+
+
+def _connect(model):
+    label = model._meta.label
+    pre_save.connect(_remember_matches, sender=model, weak=False, dispatch_uid=f'counters:{label}')
+    post_save.connect(_count_saved, sender=model, weak=False, dispatch_uid=f'counters:{label}')
+    post_delete.connect(_count_deleted, sender=model, weak=False, dispatch_uid=f'counters:{label}')
+
+
+def track(name, model, **filters):
+    """
+    Counts the rows of ``model`` matching ``filters``, equality lookups on its fields
+    """
+    counters[name] = (model, filters)
+    _connect(model)
+
+
+def track_daily(name, model, date_field, total_field=None):
+    """
+    Counts the rows of ``model`` created each day and sums their ``total_field``
+    """
+    daily_counters[name] = (model, date_field, total_field)
+    _connect(model)
+
+
+def dashboard():
+    """
+    Returns the counters of the admin dashboard
+
+    Entity counts come from the counters, from PostgreSQL statistics with
+    ``DASHBOARD_COUNTS = 'estimated'`` or from COUNT queries with ``'exact'``. Either
+    way the daily sales, open bids and unresolved reports come from the counters.
+    """
+    mode = getattr(settings, 'DASHBOARD_COUNTS', 'counters')
+    entities = ('users', 'nfts', 'categories', 'collections')
+    names = [day_name('sales'), 'open_bids', 'unresolved_reports']
+    if mode == 'counters':
+        names.extend(entities)
+    stored = values(*names)
+    result = {name: stored[name][0] for name in names if ':' not in name}
+    sales, volume = stored[day_name('sales')]
+    result.update(sales_today=sales, volume_today=volume)
+    if mode != 'counters':
+        estimates = estimated(*(counters[name][0] for name in entities)) if mode == 'estimated' else None
+        for name in entities:
+            model = counters[name][0]
+            result[name] = estimates[model] if estimates is not None else exact(name)[0]
+    return result
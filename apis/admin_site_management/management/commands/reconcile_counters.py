@@ -0,0 +1,17 @@
+from apis.admin_site_management import counters
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the dashboard counters from their rows
+
+    Counters are kept up to date from saves and deletes, run this periodically (e.g.
+    hourly from cron) to correct the drift of writes which skip signals.
+    """
+    help = "Reconcile dashboard counters"
+
+    def handle(self, *args, **options):
+        for name, (count, total) in counters.reconcile_all().items():
+            self.stdout.write(f"{name}: {count}" + (f" ({total})" if total else ''))
+        self.stdout.write(self.style.SUCCESS("Reconciled dashboard counters"))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_site_management', '0004_alter_contact_resolved_by'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntityCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('count', models.BigIntegerField(default=0)),
+                ('total', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
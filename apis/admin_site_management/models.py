@@ -36,3 +36,19 @@ class FAQ(models.Model):
 
     def __str__(self):
         return self.title
+
+
+class EntityCounter(models.Model):
+    """
+    Model for Dashboard Counters
+
+    Row counts and daily sales maintained from writes, see
+    apis.admin_site_management.counters
+    """
+    name = models.CharField(max_length=100, unique=True)
+    count = models.BigIntegerField(default=0)
+    total = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.count}"
@@ -0,0 +1,23 @@
+from accounts.models import User
+from apis import response_cache
+from apis.bidding_and_transection.models import Bidding, NftTransaction
+from apis.nft_management.models import Category, Collection, Nft, ReportedNft
+from apis.wallet_management.models import Wallet, WalletTransaction
+
+from . import counters
+from .models import FAQ
+
+response_cache.track(FAQ)
+
+counters.track('users', User)
+counters.track('nfts', Nft)
+counters.track('categories', Category)
+counters.track('collections', Collection)
+counters.track('open_bids', Bidding, status=True)
+counters.track('unresolved_reports', ReportedNft, is_resolved=False)
+# totals in the headers of the admin lists
+counters.track('bids', Bidding)
+counters.track('transactions', NftTransaction)
+counters.track('wallets', Wallet)
+counters.track('wallet_transactions', WalletTransaction)
+counters.track_daily('sales', NftTransaction, 'sold_date', 'sold_price')
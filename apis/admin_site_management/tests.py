@@ -1,3 +1,101 @@
-from django.test import TestCase
+import io
+from unittest import mock
 
-# Create your tests here.
+from accounts.models import User
+from apis import request_log
+from apis.bidding_and_transection.models import NftTransaction
+from apis.nft_management.models import Category, Collection, Nft, ReportedNft
+from apis.wallet_management.models import Wallet
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_tracking.models import APIRequestLog
+
+from . import counters
+from .models import EntityCounter
+
+
+# the test runner writes request logs in the request, the writer thread is turned back on
+@override_settings(REQUEST_LOG_ASYNC=True, REQUEST_LOG_FLUSH_INTERVAL=0.01)
+class RequestLogWriterTest(TransactionTestCase):
+    """
+    API request logs are written out of the request, by batches, and dropped rather
+    than piling up when the queue is full
+    """
+
+    def test_written_by_the_writer(self):
+        with mock.patch.object(request_log.writer, 'put', wraps=request_log.writer.put) as put:
+            response = APIClient().get('/api/nft_list/')
+        self.assertEqual(response.status_code, 200)
+        put.assert_called_once()
+        request_log.writer.flush()
+        self.assertEqual(APIRequestLog.objects.filter(path='/api/nft_list/').count(), 1)
+
+    def test_full_queue(self):
+        for policy, kept, accepted in (('drop_new', [1, 2], False), ('drop_oldest', [2, 3], True),
+                                       ('block', [1, 2], False)):
+            writer = request_log.RequestLogWriter()
+            # no thread draining the queue
+            with mock.patch.object(writer, '_run'), \
+                    self.settings(REQUEST_LOG_QUEUE_SIZE=2, REQUEST_LOG_OVERFLOW=policy,
+                                  REQUEST_LOG_BLOCK_TIMEOUT=0.01):
+                results = [writer.put(log) for log in (1, 2, 3)]
+            self.assertEqual(results, [True, True, accepted], policy)
+            self.assertEqual(list(writer._queue.queue), kept, policy)
+            self.assertEqual(writer.dropped, 1, policy)
+
+    def test_synchronous(self):
+        with self.settings(REQUEST_LOG_ASYNC=False), mock.patch.object(request_log.writer, 'put') as put:
+            APIClient().get('/api/nft_list/')
+        put.assert_not_called()
+        self.assertEqual(APIRequestLog.objects.filter(path='/api/nft_list/').count(), 1)
+
+
+class EntityCounterTest(TestCase):
+    """
+    Dashboard counters follow saves and deletes, reconciliation corrects writes which
+    skip signals
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('user@example.com', 'First', 'Last', 'password')
+        category = Category.objects.create(name='category')
+        collection = Collection.objects.create(name='collection', logo_image='logo.png', banner_image='banner.png',
+                                               category=category, user=self.user)
+        self.nft = Nft.objects.create(name='nft', description='description', image='nft.png',
+                                      sale_type='is_put_on_sale', collection=collection, owner=self.user, price=1)
+
+    def values(self):
+        return {name: count for name, (count, _) in counters.values('categories', 'unresolved_reports').items()}
+
+    def test_counted_from_writes(self):
+        self.assertEqual(self.values(), {'categories': 1, 'unresolved_reports': 0})
+        with self.captureOnCommitCallbacks(execute=True):
+            other = Category.objects.create(name='other')
+            report = ReportedNft.objects.create(nft=self.nft, reporter=self.user, report_type='fake')
+        self.assertEqual(self.values(), {'categories': 2, 'unresolved_reports': 1})
+        with self.captureOnCommitCallbacks(execute=True):
+            report.is_resolved = True
+            report.save()
+            other.delete()
+        self.assertEqual(self.values(), {'categories': 1, 'unresolved_reports': 0})
+        with self.captureOnCommitCallbacks(execute=True):
+            report.save(update_fields=['report_type'])
+        self.assertEqual(self.values(), {'categories': 1, 'unresolved_reports': 0})
+
+    def test_daily_sales(self):
+        wallet = Wallet.objects.create(user=self.user, wallet_address='address')
+        with self.captureOnCommitCallbacks(execute=True):
+            for price in (2.5, 4):
+                NftTransaction.objects.create(buyer=self.user, seller=self.user, nft=self.nft, wallet=wallet,
+                                              sold_price=price)
+        self.assertEqual(counters.values(counters.day_name('sales'))[counters.day_name('sales')], (2, 6.5))
+        self.assertEqual(counters.dashboard()['volume_today'], 6.5)
+
+    def test_reconcile(self):
+        self.assertEqual(self.values()['categories'], 1)
+        Category.objects.bulk_create([Category(name='bulk 1'), Category(name='bulk 2')])
+        self.assertEqual(self.values()['categories'], 1)
+        call_command('reconcile_counters', stdout=io.StringIO())
+        self.assertEqual(self.values()['categories'], 3)
+        self.assertEqual(EntityCounter.objects.get(name='categories').count, 3)
@@ -1,3 +1,6 @@
+from apis import response_cache
+from apis.conditional import ConditionalGetMixin, list_etag
+from apis.nft_management.models import Category
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status, permissions
 from rest_framework.permissions import IsAdminUser
@@ -7,7 +10,7 @@ from rest_framework.views import APIView
 from .serializers import *
 
 
-class FAQView(APIView):
+class FAQView(ConditionalGetMixin, APIView):
     """FAQView class
 
     This view performs GET,PUT, DELETE operations for FAQ Model
@@ -24,6 +27,12 @@ class FAQView(APIView):
         else:
             return [permissions.IsAdminUser()]
 
+    def get_validators(self, request, pk):
+        updated = FAQ.objects.filter(pk=pk).values_list('updated', flat=True).first()
+        if updated is None:
+            return None, None
+        return f"{pk}-{updated.isoformat()}", updated
+
     def get(self, request, pk):
         """HTTP GET request
 
@@ -134,7 +143,7 @@ class FAQView(APIView):
             )
 
 
-class FAQListView(APIView):
+class FAQListView(ConditionalGetMixin, APIView):
     """FAQListView class
 
     This view performs POST and GET operations
@@ -151,6 +160,9 @@ class FAQListView(APIView):
     #     else:
     #         return [permissions.IsAdminUser()]
 
+    def get_validators(self, request):
+        return list_etag(FAQ.objects.filter(is_active=True), 'updated'), None
+
     @swagger_auto_schema(
         request_body=FAQSerializer,
         responses={
@@ -189,6 +201,7 @@ class FAQListView(APIView):
                 {"message": e.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @response_cache.cache_response(FAQ, Category)
     def get(self, request):
         """HTTP GET request
 
@@ -218,7 +231,7 @@ class FAQListView(APIView):
             )
 
 
-class ContactAPIView(APIView):
+class ContactAPIView(ConditionalGetMixin, APIView):
     """ContactView class
 
     This view performs POST and GET operations
@@ -230,6 +243,12 @@ class ContactAPIView(APIView):
 
     permission_classes = [IsAdminUser]
 
+    def get_validators(self, request, pk):
+        updated_at = Contact.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            return None, None
+        return f"{pk}-{updated_at.isoformat()}", updated_at
+
     def get(self, request, pk):
         """HTTP GET request
 
@@ -347,13 +366,16 @@ class ContactAPIView(APIView):
             )
 
 
-class ContactListView(APIView):
+class ContactListView(ConditionalGetMixin, APIView):
     def get_permissions(self):
         if self.request.method == "GET":
             return [permissions.IsAdminUser()]
         else:
             return [permissions.AllowAny()]
 
+    def get_validators(self, request):
+        return list_etag(Contact.objects.filter(is_removed=False), 'updated_at'), None
+
     @swagger_auto_schema(
         request_body=ContactSerializer,
         responses={
@@ -425,3 +447,37 @@ class ContactListView(APIView):
             return Response(
                 {"message": e.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class ResponseCacheStatsView(APIView):
+    """ResponseCacheStatsView class
+
+    This view performs GET operation for the response cache statistics
+
+    Parameters
+    ----------
+    APIView : rest_framework.views
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """HTTP GET request
+
+        A HTTP endpoint that returns the hits, misses and hit ratio of every cached endpoint
+
+        Parameters
+        ----------
+        request : django.http.request
+
+        Returns
+        -------
+        rest_framework.response
+            returns HTTP 200 status if data returned successfully,error message otherwise
+        """
+        try:
+            return Response(response_cache.stats(), status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response(
+                {"message": e.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
@@ -0,0 +1,257 @@
+import gzip
+import json
+import os
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+# label of each archivable model -> its date field, rows are archived by age of this date
+DATE_FIELDS = {
+    'rest_framework_tracking.apirequestlog': 'requested_at',
+    'bidding_and_transection.nfttransaction': 'sold_date',
+    'wallet_management.wallettransaction': 'transaction_date',
+    'nft_management.nftpricehistory': 'date',
+}
+RETENTION_DAYS = {
+    'rest_framework_tracking.apirequestlog': 30,
+    'bidding_and_transection.nfttransaction': 365,
+    'wallet_management.wallettransaction': 365,
+    'nft_management.nftpricehistory': 365,
+}
+DATE_FORMAT = '%Y%m%dT%H%M%S'
+
+
+class ArchiveEncoder(DjangoJSONEncoder):
+    """
+    DjangoJSONEncoder keeping the microseconds of datetimes, so that restored rows are
+    the archived ones
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def root():
+    return getattr(settings, 'ARCHIVE_ROOT', os.path.join(settings.BASE_DIR, 'archive'))
+
+
+def retention_days(label):
+    return getattr(settings, 'ARCHIVE_RETENTION_DAYS', {}).get(label, RETENTION_DAYS[label])
+
+
+def _columns(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def _write(path, rows):
+    """
+    Writes gzip compressed JSON lines, under a temporary name renamed once on disk
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = path + '.partial'
+    with open(partial, 'wb') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb') as file:
+            for row in rows:
+                file.write(json.dumps(row, cls=ArchiveEncoder).encode() + b'\n')
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(partial, path)
+
+
+def archive(label, before, chunk_size=None):
+    """
+    Moves the rows of a model dated before ``before`` to archive files
+
+    Rows are read by chunks of ``ARCHIVE_CHUNK_SIZE`` in primary key order, each chunk
+    is written to its own file under ``ARCHIVE_ROOT/<label>/``, then deleted. A chunk is
+    only deleted once its file is on disk, if the run is interrupted in between the
+    chunk is archived again by the next run and restoring skips the duplicates.
+
+    Rows are deleted with a plain DELETE, without signals: statistics, leaderboards and
+    candles computed from these rows are kept, and rebuilt from the table and
+    ``archived`` rows.
+
+    Parameters
+    ----------
+    label : str
+        ``app_label.model_name``, one of DATE_FIELDS
+
+    before : datetime.datetime
+
+    chunk_size : integer
+
+    Returns
+    -------
+    generator
+        ``(file path, number of rows)`` of each written file
+    """
+    model = apps.get_model(label)
+    date_field = DATE_FIELDS[label]
+    chunk_size = chunk_size or getattr(settings, 'ARCHIVE_CHUNK_SIZE', 10000)
+    columns = _columns(model)
+    pk = model._meta.pk.attname
+    table, pk_column = model._meta.db_table, model._meta.pk.column
+    queryset = model.objects.filter(**{f'{date_field}__lt': before}).order_by(pk)
+    last = None
+    while True:
+        chunk = queryset if last is None else queryset.filter(pk__gt=last)
+        rows = list(chunk.values(*columns)[:chunk_size])
+        if not rows:
+            return
+        dates = [row[date_field].astimezone(dt_timezone.utc) for row in rows if row[date_field] is not None]
+        first, last = rows[0][pk], rows[-1][pk]
+        name = f"{min(dates).strftime(DATE_FORMAT)}-{max(dates).strftime(DATE_FORMAT)}-{first}-{last}.jsonl.gz" \
+            if dates else f"undated-{first}-{last}.jsonl.gz"
+        path = os.path.join(root(), label, name)
+        _write(path, rows)
+        with transaction.atomic(), connection.cursor() as cursor:
+            pks = [row[pk] for row in rows]
+            cursor.execute(
+                f"DELETE FROM {connection.ops.quote_name(table)} WHERE {connection.ops.quote_name(pk_column)} "
+                f"IN ({', '.join(['%s'] * len(pks))})",
+                pks,
+            )
+        yield path, len(rows)
+
+
+def archive_expired(label, chunk_size=None):
+    """
+    Archives the rows of a model older than its retention, see ``archive``
+    """
+    return archive(label, timezone.now() - timedelta(days=retention_days(label)), chunk_size)
+
+
+def _overlaps(name, since, until):
+    parts = name.split('-')
+    if parts[0] == 'undated':
+        return True
+    # file names hold the UTC dates of their first and last rows, to the second
+    first, last = (datetime.strptime(part, DATE_FORMAT).replace(tzinfo=dt_timezone.utc) for part in parts[:2])
+    return (since is None or last >= since.replace(microsecond=0)) and (until is None or first < until)
+
+
+def archives(label, since=None, until=None):
+    """
+    Returns the paths of the archive files of a model holding rows dated in a range
+    """
+    directory = os.path.join(root(), label)
+    if not os.path.isdir(directory):
+        return []
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+            if name.endswith('.jsonl.gz') and _overlaps(name, since, until)]
+
+
+def read(path):
+    """
+    Yields the rows of an archive file one at a time
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as file:
+        for line in file:
+            yield json.loads(line)
+
+
+def archived(label):
+    """
+    Yields the archived rows of a model which are not in its table, by file
+
+    This is what statistics rebuilt from a model must add to its table to account for
+    the rows archived out of it. Rows are converted back to Python values. Rows still
+    in the table (an interrupted run, or restored since), rows archived twice and rows
+    referring to a row which no longer exists, which ``restore`` would skip, are left
+    out.
+
+    Returns
+    -------
+    generator
+        list of ``{attname: value}`` dicts for each archive file, with one query per
+        file and foreign key
+    """
+    model = apps.get_model(label)
+    fields = model._meta.concrete_fields
+    pk = model._meta.pk.attname
+    relations = [field for field in fields if field.is_relation]
+    seen = set()
+    for path in archives(label):
+        rows = [row for row in read(path) if row[pk] not in seen]
+        seen.update(row[pk] for row in rows)
+        present = set(model.objects.filter(pk__in=[row[pk] for row in rows]).values_list('pk', flat=True))
+        rows = [{field.attname: field.to_python(row[field.attname]) for field in fields}
+                for row in rows if row[pk] not in present]
+        for field in relations:
+            target = field.target_field
+            values = {row[field.attname] for row in rows} - {None}
+            existing = set(field.related_model._base_manager.filter(**{f'{target.attname}__in': values})
+                           .values_list(target.attname, flat=True))
+            rows = [row for row in rows if row[field.attname] is None or row[field.attname] in existing]
+        if rows:
+            yield rows
+
+
+def restore(label, since=None, until=None, batch_size=1000):
+    """
+    Inserts back the archived rows of a model dated in ``[since, until)``
+
+    Archive files are left in place, rows already in the table are left as they are. A
+    batch is inserted row by row when one of its rows refers to a row which no longer
+    exists, those rows are skipped.
+
+    Returns
+    -------
+    tuple
+        numbers of rows restored (or already in the table) and of skipped rows
+    """
+    model = apps.get_model(label)
+    date_field = DATE_FIELDS[label]
+    # auto_now_add dates are overwritten on insert, they are written back afterwards
+    auto_dates = [field.attname for field in model._meta.concrete_fields
+                  if getattr(field, 'auto_now_add', False) or getattr(field, 'auto_now', False)]
+    restored = skipped = 0
+
+    def insert(rows):
+        instances = [model(**row) for row in rows]
+        with transaction.atomic():
+            model.objects.bulk_create(instances, ignore_conflicts=True)
+            if auto_dates:
+                for instance, row in zip(instances, rows):
+                    for attname in auto_dates:
+                        setattr(instance, attname, row[attname])
+                model.objects.bulk_update(instances, auto_dates)
+
+    for path in archives(label, since, until):
+        batch = []
+        for row in read(path):
+            date = row[date_field] and parse_datetime(row[date_field])
+            if date is not None and ((since and date < since) or (until and date >= until)):
+                continue
+            batch.append(row)
+            if len(batch) < batch_size:
+                continue
+            done, failed = _insert_batch(insert, batch)
+            restored, skipped, batch = restored + done, skipped + failed, []
+        if batch:
+            done, failed = _insert_batch(insert, batch)
+            restored, skipped = restored + done, skipped + failed
+    return restored, skipped
+
+
+def _insert_batch(insert, rows):
+    try:
+        insert(rows)
+        return len(rows), 0
+    except IntegrityError:
+        pass
+    done = 0
+    for row in rows:
+        try:
+            insert([row])
+            done += 1
+        except IntegrityError:
+            pass
+    return done, len(rows) - done
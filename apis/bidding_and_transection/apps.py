@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class BiddingAndTransectionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apis.bidding_and_transection'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,77 @@
+import time
+from collections import namedtuple
+
+from apis import events
+from apis.admin_site_management import counters
+from apis.nft_management.models import Nft
+from django.db import transaction
+from django.utils import timezone
+
+from . import order_book
+from .models import Bidding
+
+SweepResult = namedtuple('SweepResult', ['expired', 'nfts', 'batches', 'seconds', 'max_batch_seconds'])
+
+
+def expire_bids(batch_size=1000, now=None):
+    """
+    Rejects every live bid whose expiry date has passed
+
+    Bids are found through the (status, expiry_date) index and flipped in batches of
+    ``batch_size``, each batch in its own short transaction. Rows locked by another
+    transaction are skipped and picked up by the next sweep.
+
+    Parameters
+    ----------
+    batch_size : integer
+
+    now : datetime
+        expiry cut off, defaults to the current time
+
+    Returns
+    -------
+    SweepResult
+        number of expired bids, affected NFTs and batches, total and slowest batch time
+    """
+    now = now or timezone.now()
+    started = time.monotonic()
+    expired = batches = 0
+    max_batch_seconds = 0.0
+    nft_ids = set()
+
+    while True:
+        batch_started = time.monotonic()
+        with transaction.atomic():
+            rows = list(
+                Bidding.objects.select_for_update(skip_locked=True)
+                .filter(status=True, expiry_date__lte=now)
+                .order_by('expiry_date')
+                .values_list('id', 'nft_id')[:batch_size]
+            )
+            if not rows:
+                break
+            updated = Bidding.objects.filter(id__in=[bid_id for bid_id, _ in rows], status=True).update(status=False)
+            counters.add('open_bids', -updated)
+            expired += updated
+        batch_nft_ids = {nft_id for _, nft_id in rows}
+        order_book.invalidate(*batch_nft_ids)
+        publish_expired(rows)
+        nft_ids |= batch_nft_ids
+        batches += 1
+        max_batch_seconds = max(max_batch_seconds, time.monotonic() - batch_started)
+        if len(rows) < batch_size:
+            break
+
+    return SweepResult(expired, len(nft_ids), batches, time.monotonic() - started, max_batch_seconds)
+
+
+def publish_expired(rows):
+    """
+    Publishes one bid.expired event per NFT for a batch of ``(bid id, nft id)`` rows
+    """
+    bids = {}
+    for bid_id, nft_id in rows:
+        bids.setdefault(nft_id, []).append(bid_id)
+    collections = dict(Nft.objects.filter(pk__in=bids).values_list('id', 'collection_id'))
+    for nft_id, bid_ids in bids.items():
+        events.publish('bid.expired', nft_id, collections.get(nft_id), {'bids': bid_ids})
@@ -0,0 +1,116 @@
+from datetime import timedelta
+
+from accounts.models import Profile
+from apis.response_cache import invalidate
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import SellerLeaderboard, SellerRevenue
+
+WINDOWS = {
+    '24h': timedelta(hours=24),
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30),
+    'all': None,
+}
+MAX_LEADERBOARD_SIZE = 100
+CACHE_KEY = 'seller_leaderboard:{window}'
+
+
+def record_sale(seller_id, amount, sold_at):
+    """
+    Adds a sale to the seller's revenue in every window it falls into
+
+    Parameters
+    ----------
+    seller_id : integer
+
+    amount : float
+
+    sold_at : datetime
+    """
+    hour = sold_at.replace(minute=0, second=0, microsecond=0)
+    now = timezone.now()
+    with transaction.atomic():
+        _increment(SellerRevenue, {'seller_id': seller_id, 'hour': hour}, amount)
+        for window, span in WINDOWS.items():
+            if span is None or sold_at >= now - span:
+                _increment(SellerLeaderboard, {'seller_id': seller_id, 'window': window}, amount)
+    cache.delete_many([CACHE_KEY.format(window=window) for window in WINDOWS])
+
+
+def refresh_windows():
+    """
+    Rebuilds the time windowed leaderboards from the hourly buckets
+
+    Sales are added to every window when they happen, this drops them again once they
+    are older than the window. Meant to be run periodically.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        for window, span in WINDOWS.items():
+            if span is None:
+                continue
+            rows = SellerRevenue.objects.filter(hour__gte=now - span).values('seller').annotate(
+                total=Sum('revenue'), count=Sum('sales_count')
+            )
+            SellerLeaderboard.objects.filter(window=window).delete()
+            SellerLeaderboard.objects.bulk_create([
+                SellerLeaderboard(seller_id=row['seller'], window=window, revenue=row['total'],
+                                  sales_count=row['count'])
+                for row in rows.iterator()
+            ], batch_size=1000)
+    cache.delete_many([CACHE_KEY.format(window=window) for window in WINDOWS])
+    invalidate(SellerLeaderboard)
+
+
+def top_sellers(window, limit):
+    """
+    Returns the best sellers of a window ordered by revenue
+
+    The top ``MAX_LEADERBOARD_SIZE`` rows are read from the leaderboard index once and
+    cached until the next sale, so the cost does not depend on the catalogue size.
+
+    Parameters
+    ----------
+    window : str
+        one of ``WINDOWS``
+
+    limit : integer
+
+    Returns
+    -------
+    list
+        dicts with seller id, name, profile image, revenue and sales count
+    """
+    key = CACHE_KEY.format(window=window)
+    leaders = cache.get(key)
+    if leaders is None:
+        rows = list(
+            SellerLeaderboard.objects.filter(window=window, revenue__gt=0)
+            .order_by('-revenue', 'seller_id')
+            .values('seller_id', 'seller__first_name', 'seller__last_name', 'revenue', 'sales_count')
+            [:MAX_LEADERBOARD_SIZE]
+        )
+        images = dict(Profile.objects.filter(user_id__in=[row['seller_id'] for row in rows], is_removed=False)
+                      .values_list('user_id', 'profile_image'))
+        leaders = [
+            {
+                'user_id': row['seller_id'],
+                'user_name': f"{row['seller__first_name']} {row['seller__last_name']}",
+                'profile_image': images.get(row['seller_id']),
+                'revenue': row['revenue'],
+                'sales_count': row['sales_count'],
+            }
+            for row in rows
+        ]
+        cache.set(key, leaders)
+    return leaders[:limit]
+
+
+def _increment(model, lookup, amount):
+    row, created = model.objects.get_or_create(**lookup, defaults={'revenue': amount, 'sales_count': 1})
+    if not created:
+        model.objects.filter(pk=row.pk).update(revenue=F('revenue') + amount, sales_count=F('sales_count') + 1)
@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from accounts.models import User
+from apis.bidding_and_transection.management.commands.settle_auctions import describe
+from apis.bidding_and_transection.models import Bidding
+from apis.bidding_and_transection.settlement import settle_ended_auctions
+from apis.nft_management.models import Category, Collection, Nft
+from apis.wallet_management.models import Wallet
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    """
+    Measures settlement throughput and lock hold time on synthetic auctions
+
+    The auctions are created and settled inside a transaction that is rolled back, so the
+    command leaves the database untouched.
+    """
+    help = "Benchmark auction settlement"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--auctions', type=int, default=200, help='Ended auctions to create')
+        parser.add_argument('--bids', type=int, default=5, help='Bids per auction')
+        parser.add_argument('--limit', type=int, default=100, help='Auctions settled per pass')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options['auctions'], options['bids'])
+            passes = 0
+            while True:
+                result = settle_ended_auctions(limit=options['limit'])
+                if not result.settled + result.failed + result.unsold:
+                    break
+                passes += 1
+                self.stdout.write(f"Pass {passes}: {describe(result)}")
+            transaction.set_rollback(True)
+
+    def seed(self, auctions, bids):
+        ended = timezone.now() - timedelta(minutes=1)
+        users = [User(email=f'benchmark{i}@example.com', first_name='Benchmark', last_name=str(i))
+                 for i in range(bids + 1)]
+        users = User.objects.bulk_create(users)
+        Wallet.objects.bulk_create([Wallet(user=user, wallet_address=f'benchmark{user.pk}',
+                                           current_balance=auctions * bids * 10.0, is_active=True)
+                                    for user in users])
+        seller, bidders = users[0], users[1:]
+        category = Category.objects.create(name='benchmark')
+        collection = Collection.objects.create(name='benchmark', logo_image='logo.png', banner_image='banner.png',
+                                               category=category, user=seller)
+        nfts = Nft.objects.bulk_create([
+            Nft(name=f'benchmark {i}', description='benchmark', image='nft.png', sale_type='is_put_on_sale',
+                collection=collection, owner=seller, price=1.0, auction_end_date=ended)
+            for i in range(auctions)
+        ])
+        Bidding.objects.bulk_create([
+            Bidding(offer_by=bidder, nft=nft, price=float(j + 1))
+            for nft in nfts for j, bidder in enumerate(bidders)
+        ])
@@ -0,0 +1,31 @@
+import time
+
+from apis.bidding_and_transection.expiry import expire_bids
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+
+class Command(BaseCommand):
+    """
+    Rejects live bids whose expiry date has passed
+
+    Runs a single sweep, or keeps sweeping every ``--interval`` seconds with ``--loop``.
+    """
+    help = "Expire stale bids"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Bids updated per transaction')
+        parser.add_argument('--loop', action='store_true', help='Keep sweeping until interrupted')
+        parser.add_argument('--interval', type=float, default=60, help='Seconds between two sweeps with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            result = expire_bids(batch_size=options['batch_size'])
+            self.stdout.write(
+                f"Expired {result.expired} bids on {result.nfts} NFTs in {result.batches} batches, "
+                f"{result.seconds * 1000:.1f} ms total, {result.max_batch_seconds * 1000:.1f} ms slowest batch"
+            )
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
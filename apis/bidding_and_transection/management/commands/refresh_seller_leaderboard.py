@@ -0,0 +1,66 @@
+from apis import archive
+from apis.bidding_and_transection import leaderboard
+from apis.bidding_and_transection.models import NftTransaction, SellerLeaderboard, SellerRevenue
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    """
+    Refreshes the time windowed seller leaderboards
+
+    Run periodically (e.g. every few minutes from cron) so 24h, 7d and 30d windows roll over.
+    ``--rebuild`` recomputes hourly revenue and the all-time leaderboard from NftTransaction,
+    archived transactions included.
+    """
+    help = "Refresh seller leaderboards"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Recompute hourly revenue and all-time totals from scratch')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            self.rebuild()
+        leaderboard.refresh_windows()
+        self.stdout.write(self.style.SUCCESS("Refreshed seller leaderboards"))
+
+    @transaction.atomic
+    def rebuild(self):
+        hours = {
+            (row['seller'], row['hour']): row
+            for row in NftTransaction.objects.annotate(hour=TruncHour('sold_date'))
+            .values('seller', 'hour').annotate(revenue=Sum('sold_price'), sales_count=Count('id'))
+            .iterator()
+        }
+        totals = {
+            row['seller']: row
+            for row in NftTransaction.objects.values('seller')
+            .annotate(revenue=Sum('sold_price'), sales_count=Count('id')).iterator()
+        }
+        for rows in archive.archived('bidding_and_transection.nfttransaction'):
+            for row in rows:
+                hour = timezone.localtime(row['sold_date']).replace(minute=0, second=0, microsecond=0)
+                for bucket in (hours.setdefault((row['seller_id'], hour), {'seller': row['seller_id'], 'hour': hour,
+                                                                           'revenue': 0.0, 'sales_count': 0}),
+                               totals.setdefault(row['seller_id'], {'seller': row['seller_id'], 'revenue': 0.0,
+                                                                    'sales_count': 0})):
+                    bucket['revenue'] += row['sold_price']
+                    bucket['sales_count'] += 1
+
+        SellerRevenue.objects.all().delete()
+        SellerRevenue.objects.bulk_create([
+            SellerRevenue(seller_id=row['seller'], hour=row['hour'], revenue=row['revenue'],
+                          sales_count=row['sales_count'])
+            for row in hours.values()
+        ], batch_size=1000)
+
+        SellerLeaderboard.objects.filter(window='all').delete()
+        SellerLeaderboard.objects.bulk_create([
+            SellerLeaderboard(seller_id=row['seller'], window='all', revenue=row['revenue'],
+                              sales_count=row['sales_count'])
+            for row in totals.values()
+        ], batch_size=1000)
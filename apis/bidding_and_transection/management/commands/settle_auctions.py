@@ -0,0 +1,42 @@
+import time
+
+from apis.bidding_and_transection.settlement import settle_ended_auctions
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+
+class Command(BaseCommand):
+    """
+    Sells the NFTs whose auction has ended to their best live bid
+
+    Runs a single pass, or keeps settling every ``--interval`` seconds with ``--loop``.
+    """
+    help = "Settle ended auctions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100, help='Auctions settled per pass')
+        parser.add_argument('--loop', action='store_true', help='Keep settling until interrupted')
+        parser.add_argument('--interval', type=float, default=60, help='Seconds between two passes with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            result = settle_ended_auctions(limit=options['limit'])
+            self.stdout.write(describe(result))
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
+
+
+def describe(result):
+    """
+    Formats a settlement BatchResult as throughput and lock hold times
+    """
+    handled = result.settled + result.failed + result.unsold
+    throughput = result.settled / result.seconds if result.seconds else 0.0
+    locks = result.lock_seconds or [0.0]
+    return (
+        f"Handled {handled} auctions: {result.settled} settled, {result.failed} failed, {result.unsold} unsold "
+        f"in {result.seconds * 1000:.1f} ms ({throughput:.1f} settlements/s), lock held "
+        f"{sum(locks) / len(locks) * 1000:.2f} ms avg, {max(locks) * 1000:.2f} ms max"
+    )
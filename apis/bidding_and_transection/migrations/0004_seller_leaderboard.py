@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bidding_and_transection', '0003_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SellerLeaderboard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(choices=[('24h', '24 Hours'), ('7d', '7 Days'), ('30d', '30 Days'), ('all', 'All Time')], max_length=10)),
+                ('revenue', models.FloatField(default=0.0)),
+                ('sales_count', models.IntegerField(default=0)),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seller_leaderboard', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['window', '-revenue', 'seller'], name='leaderboard_window_revenue_idx')],
+                'unique_together': {('window', 'seller')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SellerRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('revenue', models.FloatField(default=0.0)),
+                ('sales_count', models.IntegerField(default=0)),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seller_revenue', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hour'], name='seller_revenue_hour_idx')],
+                'unique_together': {('seller', 'hour')},
+            },
+        ),
+    ]
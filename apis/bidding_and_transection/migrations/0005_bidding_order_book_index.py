@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bidding_and_transection', '0004_seller_leaderboard'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bidding',
+            index=models.Index(fields=['nft', 'status', '-price', 'bidding_date'], name='bidding_order_book_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bidding_and_transection', '0005_bidding_order_book_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bidding',
+            index=models.Index(fields=['status', 'expiry_date'], name='bidding_status_expiry_idx'),
+        ),
+    ]
@@ -12,6 +12,12 @@ class Bidding(models.Model):
     status = models.BooleanField(default=True)  # Accepted or Rejected
     nft = models.ForeignKey(Nft, related_name="bidding_nft", on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['nft', 'status', '-price', 'bidding_date'], name='bidding_order_book_idx'),
+            models.Index(fields=['status', 'expiry_date'], name='bidding_status_expiry_idx'),
+        ]
+
 
 class NftTransaction(models.Model):
     buyer = models.ForeignKey(User, related_name="nft_buyer", on_delete=models.CASCADE)
@@ -26,3 +32,44 @@ class NftTransaction(models.Model):
     class Meta:
         unique_together=['buyer','seller']
 
+
+class SellerRevenue(models.Model):
+    """
+    Model for hourly seller revenue
+
+    Windowed leaderboard rows are rebuilt from these buckets
+    """
+    seller = models.ForeignKey(User, related_name="seller_revenue", on_delete=models.CASCADE)
+    hour = models.DateTimeField()
+    revenue = models.FloatField(default=0.0)
+    sales_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['seller', 'hour']
+        indexes = [
+            models.Index(fields=['hour'], name='seller_revenue_hour_idx'),
+        ]
+
+
+class SellerLeaderboard(models.Model):
+    """
+    Model for Seller Leaderboard
+
+    One row per seller and window, kept sorted by the (window, -revenue) index
+    """
+    choices = [
+        ("24h", "24 Hours"),
+        ("7d", "7 Days"),
+        ("30d", "30 Days"),
+        ("all", "All Time")
+    ]
+    seller = models.ForeignKey(User, related_name="seller_leaderboard", on_delete=models.CASCADE)
+    window = models.CharField(max_length=10, choices=choices)
+    revenue = models.FloatField(default=0.0)
+    sales_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['window', 'seller']
+        indexes = [
+            models.Index(fields=['window', '-revenue', 'seller'], name='leaderboard_window_revenue_idx'),
+        ]
@@ -0,0 +1,136 @@
+import heapq
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Bidding
+
+MAX_CACHED_BOOKS = 10000
+VERSION_KEY = 'order_book_version:{nft_id}'
+
+
+class OrderBook:
+    """
+    Live bids of one NFT in a heap ordered by price (highest first), then bidding time
+
+    Bids that expire while the book is cached are dropped lazily when they reach the
+    top, so the best bid is an O(1) peek once the book is built.
+
+    Parameters
+    ----------
+    bids : iterable
+        dicts with ``id``, ``price``, ``bidding_date``, ``expiry_date`` and ``offer_by_id``
+    """
+
+    def __init__(self, bids=()):
+        self._heap = [self._entry(bid) for bid in bids]
+        heapq.heapify(self._heap)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _entry(bid):
+        placed = bid['bidding_date'].timestamp() if bid['bidding_date'] else 0.0
+        return -bid['price'], placed, bid['id'], bid
+
+    @staticmethod
+    def _is_live(entry, now):
+        expiry_date = entry[3]['expiry_date']
+        return expiry_date is None or expiry_date > now
+
+    def best(self, now=None):
+        """
+        Returns the highest live bid, or None if there is no live bid
+        """
+        now = now or timezone.now()
+        with self._lock:
+            while self._heap and not self._is_live(self._heap[0], now):
+                heapq.heappop(self._heap)
+            return self._heap[0][3] if self._heap else None
+
+    def top(self, k, now=None):
+        """
+        Returns the ``k`` highest live bids
+        """
+        now = now or timezone.now()
+        with self._lock:
+            return [entry[3] for entry in heapq.nsmallest(k, (e for e in self._heap if self._is_live(e, now)))]
+
+    def depth(self, now=None):
+        """
+        Returns the number of live bids
+        """
+        now = now or timezone.now()
+        with self._lock:
+            return sum(1 for entry in self._heap if self._is_live(entry, now))
+
+
+def live_bids(nft_id, now=None):
+    """
+    Returns the queryset of live bids of an NFT in order book order
+
+    Parameters
+    ----------
+    nft_id : integer
+
+    now : datetime
+    """
+    now = now or timezone.now()
+    return Bidding.objects.filter(nft_id=nft_id, status=True).filter(
+        Q(expiry_date__isnull=True) | Q(expiry_date__gt=now)
+    ).order_by('-price', 'bidding_date')
+
+
+_books = OrderedDict()
+_books_lock = threading.Lock()
+
+
+def get_order_book(nft_id):
+    """
+    Returns the order book of an NFT, loading it from the database when not cached
+
+    A book is reloaded when its version in the Django cache changes, which requires the
+    cache to be shared by every process (see ``CACHES``) for invalidations from other
+    processes, like the bid expiry and settlement commands, to be honoured. Books are
+    reloaded once older than ``ORDER_BOOK_MAX_AGE`` seconds anyway, which bounds their
+    staleness should an invalidation be missed.
+
+    Parameters
+    ----------
+    nft_id : integer
+    """
+    version = cache.get(VERSION_KEY.format(nft_id=nft_id), 0)
+    now = time.monotonic()
+    with _books_lock:
+        cached = _books.get(nft_id)
+        if cached is not None and cached[0] == version and \
+                now - cached[1] <= getattr(settings, 'ORDER_BOOK_MAX_AGE', 60):
+            _books.move_to_end(nft_id)
+            return cached[2]
+
+    book = OrderBook(live_bids(nft_id).values('id', 'price', 'bidding_date', 'expiry_date', 'offer_by_id'))
+    with _books_lock:
+        _books[nft_id] = (version, now, book)
+        _books.move_to_end(nft_id)
+        while len(_books) > MAX_CACHED_BOOKS:
+            _books.popitem(last=False)
+    return book
+
+
+def invalidate(*nft_ids):
+    """
+    Drops the cached order books of the given NFTs in every process sharing the cache
+    """
+    for nft_id in nft_ids:
+        key = VERSION_KEY.format(nft_id=nft_id)
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+        with _books_lock:
+            _books.pop(nft_id, None)
@@ -1,11 +1,16 @@
+from apis.fieldsets import SparseFieldsetMixin
+from apis.nft_management.serializers import EagerLoadingMixin
 from rest_framework.serializers import ModelSerializer
 from .models import *
 
 
-class BiddingSerializer(ModelSerializer):
+class BiddingSerializer(SparseFieldsetMixin, EagerLoadingMixin, ModelSerializer):
     """
     Serializer for Biddings
     """
+    select_related_fields = ('offer_by', 'nft')
+    related_only_fields = ('offer_by__first_name', 'offer_by__last_name', 'nft__name')
+
     class Meta:
         model = Bidding
         fields = '__all__'
@@ -13,15 +18,21 @@ class BiddingSerializer(ModelSerializer):
 
     def to_representation(self, instance):
         response = super().to_representation(instance)
-        response['offer_by'] = f"{instance.offer_by.first_name} {instance.offer_by.last_name}"
-        response['nft'] = f"{instance.nft.name}"
+        if self.wants('offer_by'):
+            response['offer_by'] = f"{instance.offer_by.first_name} {instance.offer_by.last_name}"
+        if self.wants('nft'):
+            response['nft'] = f"{instance.nft.name}"
         return response
 
 
-class NftTranactionSerializer(ModelSerializer):
+class NftTranactionSerializer(SparseFieldsetMixin, EagerLoadingMixin, ModelSerializer):
     """
     Model for Nft Transaction
     """
+    select_related_fields = ('buyer', 'seller', 'nft', 'wallet')
+    related_only_fields = ('buyer__first_name', 'buyer__last_name', 'seller__first_name', 'seller__last_name',
+                           'nft__name', 'wallet__wallet_address')
+
     class Meta:
         model = NftTransaction
         fields = '__all__'
@@ -29,8 +40,12 @@ class NftTranactionSerializer(ModelSerializer):
 
     def to_representation(self, instance):
         response = super().to_representation(instance)
-        response['buyer'] = f"{instance.buyer.first_name} {instance.buyer.last_name}"
-        response['seller'] = f"{instance.seller.first_name} {instance.seller.last_name}"
-        response['nft'] = f"{instance.nft.name}"
-        response['wallet'] = f"{instance.wallet.wallet_address}"
+        if self.wants('buyer'):
+            response['buyer'] = f"{instance.buyer.first_name} {instance.buyer.last_name}"
+        if self.wants('seller'):
+            response['seller'] = f"{instance.seller.first_name} {instance.seller.last_name}"
+        if self.wants('nft'):
+            response['nft'] = f"{instance.nft.name}"
+        if self.wants('wallet'):
+            response['wallet'] = f"{instance.wallet.wallet_address}"
         return response
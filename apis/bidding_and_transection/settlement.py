@@ -0,0 +1,180 @@
+import time
+from collections import namedtuple
+
+from apis import events
+from apis.admin_site_management import counters
+from apis.nft_management.models import Nft, NftPriceHistory
+from apis.wallet_management.models import Wallet
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import order_book
+from .models import Bidding, NftTransaction
+
+MAX_BIDS_TRIED = 5
+
+SettlementResult = namedtuple('SettlementResult', ['transaction', 'lock_seconds'])
+BatchResult = namedtuple('BatchResult', ['settled', 'failed', 'unsold', 'seconds', 'lock_seconds'])
+
+
+class SettlementError(Exception):
+    """
+    Raised when a bid cannot be turned into a sale
+    """
+
+
+class BidDoesNotExist(SettlementError):
+    """
+    Raised when the bid to settle does not exist
+    """
+
+
+class SettlementForbidden(SettlementError):
+    """
+    Raised when the user settling a bid does not own the NFT
+    """
+
+
+def _active_wallet_id(user_id):
+    wallet_id = Wallet.objects.filter(user_id=user_id, is_removed=False).order_by('-is_active', 'id') \
+        .values_list('id', flat=True).first()
+    if wallet_id is None:
+        raise SettlementError(f"User {user_id} has no wallet")
+    return wallet_id
+
+
+def settle_bid(bid_id, now=None, user=None):
+    """
+    Sells a NFT to the author of a live bid
+
+    In a single transaction the NFT, the bid and both wallets are locked, in that order
+    and wallets by id, so settlements and bid placements (which lock the NFT first)
+    cannot deadlock each other. The buyer is debited, the seller credited minus the
+    service fee, the NftTransaction and NftPriceHistory rows are written, ownership is
+    transferred and the other live bids on the NFT are rejected.
+
+    Parameters
+    ----------
+    bid_id : integer
+
+    now : datetime
+        time the bid has to be live at, defaults to the current time
+
+    user : accounts.models.User
+        user accepting the bid, who must own the NFT or be staff. Ownership is checked
+        once the NFT is locked, so a former owner cannot accept a bid. None for the
+        auction settlement, which sells on behalf of the owner
+
+    Returns
+    -------
+    SettlementResult
+        the created NftTransaction and the time the row locks were held
+
+    Raises
+    ------
+    BidDoesNotExist
+        if the bid does not exist
+    SettlementForbidden
+        if ``user`` does not own the NFT
+    SettlementError
+        if the bid is not live, the buyer owns the NFT or cannot pay for it
+    """
+    now = now or timezone.now()
+    try:
+        nft_id = Bidding.objects.values_list('nft_id', flat=True).get(pk=bid_id)
+    except Bidding.DoesNotExist:
+        raise BidDoesNotExist(f"Bid {bid_id} does not exist")
+
+    started = time.monotonic()
+    with transaction.atomic():
+        nft = Nft.objects.select_for_update().get(pk=nft_id)
+        if user is not None and nft.owner_id != user.pk and not user.is_staff:
+            raise SettlementForbidden("Only the owner of the NFT can accept a bid")
+        bid = Bidding.objects.select_for_update().get(pk=bid_id)
+        if not bid.status or (bid.expiry_date is not None and bid.expiry_date <= now):
+            raise SettlementError(f"Bid {bid_id} is not live")
+        if nft.is_removed:
+            raise SettlementError(f"NFT {nft_id} has been removed")
+        if bid.offer_by_id == nft.owner_id:
+            raise SettlementError(f"Bid {bid_id} was made by the owner of the NFT")
+
+        buyer_wallet_id = _active_wallet_id(bid.offer_by_id)
+        seller_wallet_id = _active_wallet_id(nft.owner_id)
+        wallets = {wallet.pk: wallet for wallet in
+                   Wallet.objects.select_for_update().filter(pk__in=[buyer_wallet_id, seller_wallet_id]).order_by('pk')}
+        if wallets[buyer_wallet_id].current_balance < bid.price:
+            raise SettlementError(f"Wallet {buyer_wallet_id} cannot pay {bid.price}")
+
+        service_fee = bid.price * getattr(settings, 'NFT_SERVICE_FEE_RATE', 0.0)
+        Wallet.objects.filter(pk=buyer_wallet_id).update(current_balance=F('current_balance') - bid.price)
+        Wallet.objects.filter(pk=seller_wallet_id).update(
+            current_balance=F('current_balance') + bid.price - service_fee
+        )
+        sale = NftTransaction.objects.create(buyer_id=bid.offer_by_id, seller_id=nft.owner_id, nft=nft,
+                                             wallet_id=buyer_wallet_id, sold_price=bid.price,
+                                             service_fee=service_fee)
+
+        nft.owner_id = bid.offer_by_id
+        nft.price = bid.price
+        nft.auction_end_date = None
+        nft.save(update_fields=['owner', 'price', 'auction_end_date', 'updated_at'])
+
+        NftPriceHistory.objects.filter(nft=nft, is_active=True).update(is_active=False)
+        NftPriceHistory.objects.create(nft=nft, price=bid.price, is_active=True)
+
+        rejected = list(Bidding.objects.filter(nft=nft, status=True).exclude(pk=bid.pk).values_list('id', flat=True))
+        if rejected:
+            counters.add('open_bids', -Bidding.objects.filter(pk__in=rejected).update(status=False))
+            events.publish('bid.cancelled', nft.pk, nft.collection_id, {'bids': rejected})
+        transaction.on_commit(lambda: order_book.invalidate(nft_id))
+
+    return SettlementResult(sale, time.monotonic() - started)
+
+
+def settle_ended_auctions(limit=100, now=None):
+    """
+    Settles the NFTs whose auction has ended with their best live bid
+
+    Each auction is settled in its own transaction. If the best bid cannot be settled
+    (e.g. the buyer cannot pay) the next ones are tried, up to ``MAX_BIDS_TRIED``. Auctions
+    that end without a sale are closed.
+
+    Parameters
+    ----------
+    limit : integer
+        maximum number of auctions handled in this pass
+
+    now : datetime
+
+    Returns
+    -------
+    BatchResult
+        settled, failed and unsold auction counts, total time and per sale lock times
+    """
+    now = now or timezone.now()
+    started = time.monotonic()
+    settled = failed = unsold = 0
+    lock_seconds = []
+
+    nft_ids = list(Nft.objects.filter(auction_end_date__lte=now, is_removed=False)
+                   .order_by('auction_end_date').values_list('id', flat=True)[:limit])
+    for nft_id in nft_ids:
+        bid_ids = list(order_book.live_bids(nft_id, now).values_list('id', flat=True)[:MAX_BIDS_TRIED])
+        for bid_id in bid_ids:
+            try:
+                result = settle_bid(bid_id, now=now)
+            except SettlementError:
+                continue
+            settled += 1
+            lock_seconds.append(result.lock_seconds)
+            break
+        else:
+            if bid_ids:
+                failed += 1
+            else:
+                unsold += 1
+            Nft.objects.filter(pk=nft_id, auction_end_date__lte=now).update(auction_end_date=None)
+
+    return BatchResult(settled, failed, unsold, time.monotonic() - started, lock_seconds)
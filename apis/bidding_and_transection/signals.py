@@ -0,0 +1,87 @@
+from apis import events, response_cache
+from apis.nft_management.stats import record_collection_sale
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import leaderboard, order_book
+from .models import Bidding, NftTransaction, SellerLeaderboard
+
+
+@receiver(post_save, sender=Bidding)
+@receiver(post_delete, sender=Bidding)
+def invalidate_order_book(sender, instance, **kwargs):
+    """
+    Drops the cached order book of the NFT once the bid change is committed
+    """
+    transaction.on_commit(lambda: order_book.invalidate(instance.nft_id))
+
+
+@receiver(post_save, sender=NftTransaction)
+def update_collection_volume(sender, instance, created, **kwargs):
+    """
+    Adds a new sale to the volume of the sold NFT's collection
+    """
+    if created:
+        record_collection_sale(instance.nft.collection_id, instance.sold_price, instance.sold_date)
+
+
+@receiver(post_save, sender=NftTransaction)
+def update_seller_leaderboard(sender, instance, created, **kwargs):
+    """
+    Adds a new sale to the seller's leaderboard revenue
+    """
+    if created:
+        leaderboard.record_sale(instance.seller_id, instance.sold_price, instance.sold_date)
+
+
+@receiver(pre_save, sender=Bidding)
+def remember_previous_status(sender, instance, update_fields=None, **kwargs):
+    """
+    Keeps the stored status of a bid about to be saved, to detect its cancellation
+    """
+    instance._previous_status = None
+    if instance.pk and (update_fields is None or 'status' in update_fields):
+        instance._previous_status = Bidding.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+
+
+@receiver(post_save, sender=Bidding)
+def publish_bid(sender, instance, created, **kwargs):
+    """
+    Publishes new bids, and bids that were cancelled by setting their status off
+    """
+    if created:
+        events.publish('bid.created', instance.nft_id, instance.nft.collection_id, {
+            'bid': instance.pk,
+            'price': instance.price,
+            'offer_by': instance.offer_by_id,
+            'expiry_date': instance.expiry_date.isoformat() if instance.expiry_date else None,
+        })
+    elif not instance.status and getattr(instance, '_previous_status', None):
+        events.publish('bid.cancelled', instance.nft_id, instance.nft.collection_id, {'bids': [instance.pk]})
+
+
+@receiver(post_delete, sender=Bidding)
+def publish_deleted_bid(sender, instance, **kwargs):
+    """
+    Publishes deleted bids as cancelled
+    """
+    events.publish('bid.cancelled', instance.nft_id, instance.nft.collection_id, {'bids': [instance.pk]})
+
+
+@receiver(post_save, sender=NftTransaction)
+def publish_sale(sender, instance, created, **kwargs):
+    """
+    Publishes new sales
+    """
+    if created:
+        events.publish('sale', instance.nft_id, instance.nft.collection_id, {
+            'transaction': instance.pk,
+            'buyer': instance.buyer_id,
+            'seller': instance.seller_id,
+            'sold_price': instance.sold_price,
+            'sold_date': instance.sold_date.isoformat(),
+        })
+
+
+response_cache.track(NftTransaction, SellerLeaderboard)
@@ -1,3 +1,325 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from accounts.models import User
+from apis import events, image_variants
+from apis.nft_management import image_hash
+from apis.nft_management.models import Category, Collection, Nft, NftPriceHistory
+from apis.wallet_management.models import Wallet
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import expiry, leaderboard, order_book, settlement
+from .models import Bidding, NftTransaction
+
+
+class SettlementTest(TestCase):
+    """
+    Settling a bid moves the money and the NFT together, or nothing at all
+    """
+
+    def setUp(self):
+        self.seller = User.objects.create_user('seller@example.com', 'Seller', 'User', 'password')
+        self.buyer = User.objects.create_user('buyer@example.com', 'Buyer', 'User', 'password')
+        self.other = User.objects.create_user('other@example.com', 'Other', 'User', 'password')
+        self.seller_wallet = Wallet.objects.create(user=self.seller, wallet_address='seller', current_balance=0,
+                                                   is_active=True)
+        self.buyer_wallet = Wallet.objects.create(user=self.buyer, wallet_address='buyer', current_balance=100,
+                                                  is_active=True)
+        self.other_wallet = Wallet.objects.create(user=self.other, wallet_address='other', current_balance=100,
+                                                  is_active=True)
+        category = Category.objects.create(name='category')
+        collection = Collection.objects.create(name='collection', logo_image='logo.png', banner_image='banner.png',
+                                               category=category, user=self.seller)
+        self.nft = Nft.objects.create(name='nft', description='description', image='nft.png',
+                                      sale_type='is_put_on_sale', collection=collection, owner=self.seller, price=10)
+        self.bid = Bidding.objects.create(offer_by=self.buyer, nft=self.nft, price=40)
+        self.other_bid = Bidding.objects.create(offer_by=self.other, nft=self.nft, price=30)
+
+    def balance(self, wallet):
+        wallet.refresh_from_db()
+        return wallet.current_balance
+
+    def test_settle(self):
+        with self.settings(NFT_SERVICE_FEE_RATE=0.1):
+            result = settlement.settle_bid(self.bid.pk, user=self.seller)
+        self.nft.refresh_from_db()
+        self.assertEqual(self.nft.owner_id, self.buyer.pk)
+        self.assertEqual(self.nft.price, 40)
+        self.assertEqual(self.balance(self.buyer_wallet), 60)
+        self.assertEqual(self.balance(self.seller_wallet), 36)
+        sale = NftTransaction.objects.get()
+        self.assertEqual(sale, result.transaction)
+        self.assertEqual((sale.buyer_id, sale.seller_id, sale.sold_price, sale.service_fee),
+                         (self.buyer.pk, self.seller.pk, 40, 4))
+        self.assertEqual(NftPriceHistory.objects.get(nft=self.nft, is_active=True).price, 40)
+
+    def test_other_bids_rejected(self):
+        settlement.settle_bid(self.bid.pk, user=self.seller)
+        self.other_bid.refresh_from_db()
+        self.assertFalse(self.other_bid.status)
+        self.assertEqual(self.balance(self.other_wallet), 100)
+        with self.assertRaises(settlement.SettlementError):
+            settlement.settle_bid(self.other_bid.pk, user=self.buyer)
+
+    def test_insufficient_balance(self):
+        Wallet.objects.filter(pk=self.buyer_wallet.pk).update(current_balance=39)
+        with self.assertRaises(settlement.SettlementError):
+            settlement.settle_bid(self.bid.pk, user=self.seller)
+        self.nft.refresh_from_db()
+        self.assertEqual(self.nft.owner_id, self.seller.pk)
+        self.assertEqual(self.balance(self.buyer_wallet), 39)
+        self.assertEqual(self.balance(self.seller_wallet), 0)
+        self.assertFalse(NftTransaction.objects.exists())
+        self.assertTrue(Bidding.objects.get(pk=self.other_bid.pk).status)
+
+    def test_former_owner_forbidden(self):
+        Nft.objects.filter(pk=self.nft.pk).update(owner=self.other)
+        with self.assertRaises(settlement.SettlementForbidden):
+            settlement.settle_bid(self.bid.pk, user=self.seller)
+        self.assertFalse(NftTransaction.objects.exists())
+
+    def test_settlement_view(self):
+        client = APIClient()
+        url = reverse('bid-settlement', args=[self.bid.pk])
+        client.force_authenticate(self.other)
+        self.assertEqual(client.post(url).status_code, 403)
+        client.force_authenticate(self.seller)
+        self.assertEqual(client.post(url).status_code, 200)
+        self.assertEqual(client.post(reverse('bid-settlement', args=[0])).status_code, 404)
+
+
+class EventStreamTest(TestCase):
+    """
+    Events published by any thread reach the async streams of their channels
+    """
+
+    def setUp(self):
+        self.broker = events.InProcessBroker()
+        patcher = mock.patch.object(events, 'get_broker', return_value=self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_stream(self):
+        response = await AsyncClient().get('/api/events/?nft=1,2')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+        event = {'id': '1-1', 'type': 'bid.created', 'nft': 2, 'collection': 3, 'data': {'price': 10}}
+        # published by a request or command thread, while the stream waits on the loop
+        for channel in (events.nft_channel(3), events.nft_channel(2)):
+            await asyncio.to_thread(self.broker.publish, channel, event)
+        chunk = await asyncio.wait_for(anext(stream), 5)
+        self.assertEqual(chunk.decode(), f"id: 1-1\nevent: bid.created\ndata: {json.dumps(event)}\n\n")
+
+    async def test_unsubscribed_when_closed(self):
+        stream = events.event_stream(self.broker.subscribe(['nft:1'], loop=asyncio.get_running_loop()), timeout=1)
+        await anext(stream)
+        self.assertIn('nft:1', self.broker._subscribers)
+        await stream.aclose()
+        self.assertEqual(self.broker._subscribers, {})
+
+    async def test_channels_required(self):
+        response = await AsyncClient().get('/api/events/?nft=a')
+        self.assertEqual(response.status_code, 400)
+
+    def test_refused_under_wsgi(self):
+        self.assertEqual(APIClient().get('/api/events/?nft=1').status_code, 503)
+
+
+# never the shared cache of a deployment, whose entries would outlive the test
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SellerLeaderboardTest(TestCase):
+    """
+    Top sellers are read from the leaderboard of their window, which sales update and
+    refresh_windows rolls over
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.sellers = [User.objects.create_user(f'seller{i}@example.com', f'Seller{i}', 'User', 'password')
+                        for i in range(3)]
+
+    def leaders(self, window, limit=10):
+        return [(leader['user_id'], leader['revenue'], leader['sales_count'])
+                for leader in leaderboard.top_sellers(window, limit)]
+
+    def test_windows(self):
+        now = timezone.now()
+        first, second, third = (seller.pk for seller in self.sellers)
+        leaderboard.record_sale(first, 5, now - timedelta(hours=1))
+        leaderboard.record_sale(first, 3, now - timedelta(hours=2))
+        leaderboard.record_sale(second, 6, now - timedelta(days=2))
+        leaderboard.record_sale(third, 20, now - timedelta(days=40))
+        self.assertEqual(self.leaders('24h'), [(first, 8, 2)])
+        self.assertEqual(self.leaders('7d'), [(first, 8, 2), (second, 6, 1)])
+        self.assertEqual(self.leaders('all'), [(third, 20, 1), (first, 8, 2), (second, 6, 1)])
+        self.assertEqual(self.leaders('all', limit=1), [(third, 20, 1)])
+        with mock.patch('django.utils.timezone.now', return_value=now + timedelta(days=1)):
+            leaderboard.refresh_windows()
+        self.assertEqual(self.leaders('24h'), [])
+        self.assertEqual(self.leaders('7d'), [(first, 8, 2), (second, 6, 1)])
+        self.assertEqual(self.leaders('all'), [(third, 20, 1), (first, 8, 2), (second, 6, 1)])
+
+    def test_recorded_from_sales(self):
+        self.assertEqual(self.leaders('all'), [])
+        buyer = self.sellers[2]
+        category = Category.objects.create(name='category')
+        collection = Collection.objects.create(name='collection', logo_image='logo.png', banner_image='banner.png',
+                                               category=category, user=self.sellers[0])
+        nft = Nft.objects.create(name='nft', description='description', image='nft.png', sale_type='is_put_on_sale',
+                                 collection=collection, owner=self.sellers[0], price=10)
+        wallet = Wallet.objects.create(user=buyer, wallet_address='buyer')
+        NftTransaction.objects.create(buyer=buyer, seller=self.sellers[0], nft=nft, wallet=wallet, sold_price=10)
+        response = APIClient().get('/api/top_sellers/', {'window': '24h', 'limit': 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(leader['user_id'], leader['revenue']) for leader in response.data['top_sellers']],
+                         [(self.sellers[0].pk, 10)])
+        self.assertEqual(APIClient().get('/api/top_sellers/', {'window': '1y'}).status_code, 400)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class OrderBookTest(TestCase):
+    """
+    Order books serve the live bids of an NFT by price then time, from a heap cached
+    until a bid of the NFT changes
+    """
+
+    def setUp(self):
+        cache.clear()
+        order_book._books.clear()
+        self.addCleanup(order_book._books.clear)
+        self.owner = User.objects.create_user('owner@example.com', 'Owner', 'User', 'password')
+        self.bidder = User.objects.create_user('bidder@example.com', 'Bidder', 'User', 'password')
+        category = Category.objects.create(name='category')
+        collection = Collection.objects.create(name='collection', logo_image='logo.png', banner_image='banner.png',
+                                               category=category, user=self.owner)
+        self.nft = Nft.objects.create(name='nft', description='description', image='nft.png',
+                                      sale_type='is_put_on_sale', collection=collection, owner=self.owner, price=10)
+        now = timezone.now()
+        self.bids = {}
+        for name, price, placed, expiry_date, live in (
+                ('low', 30, now - timedelta(hours=3), None, True),
+                ('first', 40, now - timedelta(hours=2), None, True),
+                ('second', 40, now - timedelta(hours=1), now + timedelta(hours=1), True),
+                ('expired', 50, now - timedelta(hours=1), now - timedelta(minutes=1), True),
+                ('rejected', 60, now - timedelta(hours=1), None, False)):
+            bid = Bidding.objects.create(offer_by=self.bidder, nft=self.nft, price=price, expiry_date=expiry_date,
+                                         status=live)
+            # bidding_date is set on creation
+            Bidding.objects.filter(pk=bid.pk).update(bidding_date=placed)
+            self.bids[name] = bid.pk
+
+    def test_order(self):
+        book = order_book.get_order_book(self.nft.pk)
+        self.assertEqual(book.best()['id'], self.bids['first'])
+        self.assertEqual([bid['id'] for bid in book.top(5)],
+                         [self.bids['first'], self.bids['second'], self.bids['low']])
+        self.assertEqual(book.depth(), 3)
+        # bids expiring while the book is cached are skipped
+        later = timezone.now() + timedelta(hours=2)
+        self.assertEqual([bid['id'] for bid in book.top(5, now=later)], [self.bids['first'], self.bids['low']])
+        self.assertEqual(book.depth(now=later), 2)
+
+    def test_cached_until_invalidated(self):
+        book = order_book.get_order_book(self.nft.pk)
+        self.assertIs(order_book.get_order_book(self.nft.pk), book)
+        with self.captureOnCommitCallbacks(execute=True):
+            bid = Bidding.objects.create(offer_by=self.bidder, nft=self.nft, price=45)
+        reloaded = order_book.get_order_book(self.nft.pk)
+        self.assertIsNot(reloaded, book)
+        self.assertEqual(reloaded.best()['id'], bid.pk)
+        with self.settings(ORDER_BOOK_MAX_AGE=-1):
+            self.assertIsNot(order_book.get_order_book(self.nft.pk), reloaded)
+
+    def test_order_book_view(self):
+        response = APIClient().get(reverse('order-book', args=[self.nft.pk]), {'top': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['best_bid']['id'], self.bids['first'])
+        self.assertEqual([bid['id'] for bid in response.data['bids']], [self.bids['first'], self.bids['second']])
+        self.assertEqual(response.data['depth'], 3)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class BidExpiryTest(TransactionTestCase):
+    """
+    Sweeps reject expired bids by batches, skipping the bids locked by other transactions
+    """
+
+    def setUp(self):
+        # committed NFTs would schedule their image variants and hash
+        for module in (image_variants, image_hash):
+            patcher = mock.patch.object(module, 'schedule')
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        owner = User.objects.create_user('owner@example.com', 'Owner', 'User', 'password')
+        self.bidder = User.objects.create_user('bidder@example.com', 'Bidder', 'User', 'password')
+        category = Category.objects.create(name='category')
+        collection = Collection.objects.create(name='collection', logo_image='logo.png', banner_image='banner.png',
+                                               category=category, user=owner)
+        self.nfts = [Nft.objects.create(name=f'nft {i}', description='description', image='nft.png',
+                                        sale_type='is_put_on_sale', collection=collection, owner=owner, price=10)
+                     for i in range(2)]
+        now = timezone.now()
+        self.expired = [self.bid(self.nfts[i % 2], now - timedelta(minutes=i + 1)) for i in range(3)]
+        self.live = [self.bid(self.nfts[0], now + timedelta(hours=1)), self.bid(self.nfts[1], None)]
+
+    def bid(self, nft, expiry_date):
+        return Bidding.objects.create(offer_by=self.bidder, nft=nft, price=20, expiry_date=expiry_date).pk
+
+    def live_bids(self):
+        return set(Bidding.objects.filter(status=True).values_list('id', flat=True))
+
+    def test_sweep(self):
+        with mock.patch.object(events, 'publish') as publish, \
+                mock.patch.object(order_book, 'invalidate') as invalidate:
+            result = expiry.expire_bids(batch_size=2)
+        self.assertEqual((result.expired, result.nfts, result.batches), (3, 2, 2))
+        self.assertEqual(self.live_bids(), set(self.live))
+        self.assertEqual({nft_id for call in invalidate.call_args_list for nft_id in call.args},
+                         {nft.pk for nft in self.nfts})
+        expired = {bid_id for call in publish.call_args_list for bid_id in call.args[3]['bids']}
+        self.assertEqual(expired, set(self.expired))
+        self.assertEqual({call.args[0] for call in publish.call_args_list}, {'bid.expired'})
+        self.assertEqual(expiry.expire_bids().expired, 0)
+
+    def test_command(self):
+        stdout = io.StringIO()
+        call_command('expire_bids', batch_size=2, stdout=stdout)
+        self.assertIn("Expired 3 bids on 2 NFTs in 2 batches", stdout.getvalue())
+        self.assertEqual(self.live_bids(), set(self.live))
+
+    @skipUnlessDBFeature('has_select_for_update_skip_locked')
+    def test_locked_bids_skipped(self):
+        locked, release = threading.Event(), threading.Event()
+
+        def hold():
+            try:
+                with transaction.atomic():
+                    list(Bidding.objects.select_for_update().filter(pk=self.expired[0]))
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        try:
+            self.assertTrue(locked.wait(10))
+            result = expiry.expire_bids()
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(result.expired, 2)
+        self.assertEqual(self.live_bids(), {self.expired[0], *self.live})
+        # picked up by the next sweep
+        self.assertEqual(expiry.expire_bids().expired, 1)
@@ -4,7 +4,10 @@ from . import views
 
 urlpatterns = [
     path('bidding/<int:pk>/', views.BiddingView.as_view(), name='bidding'),
+    path('bidding/<int:pk>/settle/', views.BidSettlementView.as_view(), name='bid-settlement'),
     path('bidding/', views.BiddingListView.as_view(), name='bidding_list'),
+    path('order_book/<int:nft_id>/', views.OrderBookView.as_view(), name='order-book'),
+    path('events/', views.EventStreamView.as_view(), name='event-stream'),
     path('nft-transaction/', views.NftTransactionView.as_view(), name='nft-transaction'),
     path('nft-transaction-detail/<int:pk>', views.NftTransactionDetail.as_view(), name='nft-transaction-detail')
 ]
@@ -1,8 +1,19 @@
+import asyncio
+
+from apis import events
+from apis.fieldsets import sparse_fieldset
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from . import order_book, settlement
 from .models import *
 from .serializers import BiddingSerializer, NftTranactionSerializer
 
@@ -36,8 +47,9 @@ class BiddingView(APIView):
              returns HTTP 200 status if data returned successfully,error message otherwise
          """
         try:
-            bid_obj = Bidding.objects.get(pk=pk)
-            serializer = BiddingSerializer(bid_obj)
+            fieldset = sparse_fieldset(request)
+            bid_obj = BiddingSerializer.setup_eager_loading(Bidding.objects.all(), **fieldset).get(pk=pk)
+            serializer = BiddingSerializer(bid_obj, **fieldset)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Bidding.DoesNotExist:
             return Response({"message": "does not exist"}, status=status.HTTP_404_NOT_FOUND)
@@ -73,6 +85,8 @@ class BiddingListView(APIView):
 
         A HTTP endpoint that saves a Bidding object  in DB
 
+        The NFT row is locked while the bid is checked against the current best live bid,
+        so concurrent bids on the same NFT are validated one after the other.
 
         Parameters
         ----------
@@ -85,12 +99,18 @@ class BiddingListView(APIView):
         """
         try:
             serializer = BiddingSerializer(data=request.data)
-            if serializer.is_valid():
-                serializer.save()
-                return Response(serializer.data, status=status.HTTP_200_OK)
-            else:
+            if not serializer.is_valid():
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+            with transaction.atomic():
+                nft = Nft.objects.select_for_update().get(pk=serializer.validated_data['nft'].pk)
+                best_bid = order_book.live_bids(nft.pk).values_list('price', flat=True).first()
+                if best_bid is not None and serializer.validated_data['price'] <= best_bid:
+                    return Response({"message": f"Bid must be higher than the current best bid of {best_bid}"},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                serializer.save()
+            return Response(serializer.data, status=status.HTTP_200_OK)
+
         except Exception as e:
             return Response({"message": e.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -117,13 +137,177 @@ class BiddingListView(APIView):
                  returns HTTP 200 status if data returned successfully,error message otherwise
         """
         try:
-            bid = Bidding.objects.all()
-            serializer = BiddingSerializer(bid, many=True)
+            fieldset = sparse_fieldset(request)
+            bid = BiddingSerializer.setup_eager_loading(Bidding.objects.all(), **fieldset)
+            serializer = BiddingSerializer(bid, many=True, **fieldset)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({"message": e.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class BidSettlementView(APIView):
+    """
+    BidSettlementView class
+
+        This view performs POST operation to accept a bid
+
+        Parameters
+        ----------
+        APIView : rest_framework.views
+
+    """
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        responses={
+            200: "OK",
+            400: "Bad Request",
+            403: "Forbidden",
+            404: "Not Found",
+            500: "Internal Server Error",
+        },
+    )
+    def post(self, request, pk):
+        """
+        HTTP POST request
+
+        A HTTP endpoint that accepts the bid of provided PK: the NFT is sold to the bidder,
+        wallets are debited and credited and a NftTransaction is saved in one DB transaction.
+        Only the owner of the NFT or an admin can accept a bid.
+
+        Parameters
+        ----------
+        request : django.http.request
+
+        pk : integer
+
+        Returns
+        -------
+        rest_framework.response
+            returns the saved NftTransaction if the bid was settled,error message otherwise
+        """
+        try:
+            result = settlement.settle_bid(pk, user=request.user)
+            serializer = NftTranactionSerializer(result.transaction)
+            return Response(serializer.data, status=status.HTTP_200_OK)
+        except settlement.BidDoesNotExist:
+            return Response({"message": "does not exist"}, status=status.HTTP_404_NOT_FOUND)
+        except settlement.SettlementForbidden as e:
+            return Response({"message": e.args[0]}, status=status.HTTP_403_FORBIDDEN)
+        except settlement.SettlementError as e:
+            return Response({"message": e.args[0]}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"message": e.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class OrderBookView(APIView):
+    """
+    OrderBookView class
+
+        This view performs GET operation for the live bids of a NFT
+
+        Parameters
+        ----------
+        APIView : rest_framework.views
+
+    """
+
+    def get(self, request, nft_id):
+        """
+        HTTP GET request
+
+        A HTTP endpoint that returns the best bid, the ``top`` highest bids (10 by default)
+        and the number of live bids of a NFT. Expired and rejected bids are skipped.
+
+        Parameters
+        ----------
+        request : django.http.request
+
+        nft_id : integer
+
+        Returns
+        -------
+        rest_framework.response
+            returns HTTP 200 status if data returned successfully,error message otherwise
+        """
+        try:
+            try:
+                top = min(max(int(request.query_params.get('top', 10)), 1), 100)
+            except ValueError:
+                return Response({"message": "top must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+            book = order_book.get_order_book(nft_id)
+            return Response({
+                "nft": nft_id,
+                "best_bid": book.best(),
+                "bids": book.top(top),
+                "depth": book.depth(),
+            }, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"message": e.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class EventStreamView(View):
+    """
+    EventStreamView class
+
+        This view streams bid, sale and price events as Server-Sent Events
+
+        An async view: it is served by the ASGI application (NFT_Marketplace.asgi), where
+        open streams hold no worker. Under WSGI each stream would hold a sync worker for
+        up to ``EVENT_STREAM_TIMEOUT`` seconds, it is refused there unless DEBUG is on.
+
+        Parameters
+        ----------
+        View : django.views
+
+    """
+
+    async def get(self, request):
+        """
+        HTTP GET request
+
+        A HTTP endpoint that streams the events of the NFTs and collections given as comma
+        separated ``nft`` and ``collection`` ids, e.g. ``?nft=1,2&collection=3``. Events are
+        ``bid.created``, ``bid.cancelled``, ``bid.expired``, ``sale`` and ``price.changed``.
+
+        Parameters
+        ----------
+        request : django.http.request
+
+        Returns
+        -------
+        django.http.StreamingHttpResponse
+            text/event-stream response, error message if no valid channel was given
+        """
+        if not isinstance(request, ASGIRequest) and not settings.DEBUG:
+            return JsonResponse({"message": "Events are streamed by the ASGI application"},
+                                status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        try:
+            try:
+                channels = [events.nft_channel(int(pk)) for pk in
+                            request.GET.get('nft', '').split(',') if pk] + \
+                           [events.collection_channel(int(pk)) for pk in
+                            request.GET.get('collection', '').split(',') if pk]
+            except ValueError:
+                return JsonResponse({"message": "nft and collection must be comma separated ids"},
+                                    status=status.HTTP_400_BAD_REQUEST)
+            if not channels:
+                return JsonResponse({"message": "nft or collection is required"},
+                                    status=status.HTTP_400_BAD_REQUEST)
+
+            subscription = events.get_broker().subscribe(channels, loop=asyncio.get_running_loop())
+            response = StreamingHttpResponse(
+                events.event_stream(subscription,
+                                    keepalive=getattr(settings, 'EVENT_STREAM_KEEPALIVE', 15),
+                                    timeout=getattr(settings, 'EVENT_STREAM_TIMEOUT', 300)),
+                content_type='text/event-stream',
+            )
+            response['Cache-Control'] = 'no-cache'
+            response['X-Accel-Buffering'] = 'no'
+            return response
+        except Exception as e:
+            return JsonResponse({"message": e.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 class NftTransactionView(APIView):
     """
         NftTransactionView class
@@ -186,8 +370,9 @@ class NftTransactionView(APIView):
             returns HTTP 200 status if data returned successfully,error message otherwise
         """
         try:
-            trans_obj = NftTransaction.objects.all()
-            serializer = NftTranactionSerializer(trans_obj, many=True)
+            fieldset = sparse_fieldset(request)
+            trans_obj = NftTranactionSerializer.setup_eager_loading(NftTransaction.objects.all(), **fieldset)
+            serializer = NftTranactionSerializer(trans_obj, many=True, **fieldset)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({"message": e.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -214,8 +399,9 @@ class NftTransactionDetail(APIView):
              returns HTTP 200 status if data returned successfully,error message otherwise
         """
         try:
-            trans_obj = NftTransaction.objects.get(pk=pk)
-            serializer = NftTranactionSerializer(trans_obj)
+            fieldset = sparse_fieldset(request)
+            trans_obj = NftTranactionSerializer.setup_eager_loading(NftTransaction.objects.all(), **fieldset).get(pk=pk)
+            serializer = NftTranactionSerializer(trans_obj, **fieldset)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except NftTransaction.DoesNotExist:
             return Response({"message": "Nft transaction detail doesn't exist against this id"},
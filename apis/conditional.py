@@ -0,0 +1,109 @@
+from calendar import timegm
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+class NotModified(Exception):
+    """
+    Raised by ConditionalGetMixin when the client already holds the current representation
+    """
+
+    def __init__(self, response):
+        super().__init__(response)
+        self.response = response
+
+
+def timestamp(value):
+    """
+    Returns the whole seconds since the epoch of an aware datetime, None for None
+    """
+    return timegm(value.utctimetuple()) if value is not None else None
+
+
+def list_etag(queryset, *fields):
+    """
+    Returns an ETag for a list from the number of rows and their latest timestamps
+
+    A single aggregate query, the rows are neither fetched nor serialized. Adding or
+    deleting a row changes the count, saving one moves the latest timestamp.
+
+    Parameters
+    ----------
+    queryset : django.db.models.QuerySet
+        rows of the list, filters applied
+
+    fields : str
+        timestamp fields, related ones included (``stats__updated_at``)
+    """
+    latest = [f'latest_{i}' for i in range(len(fields))]
+    aggregates = queryset.order_by().aggregate(count=Count('pk'), **{
+        alias: Max(field) for alias, field in zip(latest, fields)
+    })
+    return '-'.join([str(aggregates['count'])] + [
+        aggregates[alias].isoformat() if aggregates[alias] is not None else '' for alias in latest
+    ])
+
+
+class ConditionalGetMixin:
+    """
+    Conditional GET support for APIView classes
+
+    Views implement ``get_validators`` returning the ETag and the last modification
+    date of the requested resource, computed from a couple of columns or from the
+    ``response_cache.generations`` of the models it is built from, related ones
+    included, rather than from the serialized response. When the ``If-None-Match`` or ``If-Modified-Since``
+    headers of a GET request match them, a 304 response is returned without calling
+    the handler, otherwise the handler's response carries ``ETag`` and ``Last-Modified``.
+
+    Validators are checked after authentication and permissions, so a 304 never leaks
+    the existence of a resource to a client not allowed to read it.
+    """
+
+    def get_validators(self, request, *args, **kwargs):
+        """
+        Returns the ETag and the last modification datetime of the resource
+
+        Either may be None, the resource having no validators if both are. Lists should
+        only return an ETag, the latest timestamp of the remaining rows does not move
+        when a row is deleted.
+
+        Returns
+        -------
+        tuple
+            ETag string, unquoted, and aware datetime
+        """
+        return None, None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.validators = None
+        if request.method not in ('GET', 'HEAD'):
+            return
+        etag, last_modified = self.get_validators(request, *args, **kwargs)
+        if etag is None and last_modified is None:
+            return
+        self.validators = (quote_etag(etag) if etag is not None else None, timestamp(last_modified))
+        response = get_conditional_response(request, etag=self.validators[0], last_modified=self.validators[1])
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return self.set_validators(exc.response)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'validators', None) is not None and response.status_code == 200:
+            self.set_validators(response)
+        return response
+
+    def set_validators(self, response):
+        etag, last_modified = self.validators
+        if etag is not None:
+            response.headers['ETag'] = etag
+        if last_modified is not None:
+            response.headers['Last-Modified'] = http_date(last_modified)
+        return response
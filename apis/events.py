@@ -0,0 +1,354 @@
+import asyncio
+import json
+import logging
+import os
+import queue
+import select
+import threading
+import time
+from itertools import count
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """
+    Events received by one subscriber of the in-process broker
+
+    A subscription made with the event ``loop`` of an async view is read with ``aget``,
+    which waits without holding a thread: events are handed to the loop, whichever
+    thread publishes them.
+
+    Parameters
+    ----------
+    broker : InProcessBroker
+
+    channels : list of str
+
+    max_size : integer
+        events buffered for a slow subscriber, the oldest are dropped past it
+
+    loop : asyncio.AbstractEventLoop
+    """
+
+    def __init__(self, broker, channels, max_size=1000, loop=None):
+        self.broker = broker
+        self.channels = channels
+        self.loop = loop
+        if loop is None:
+            self.queue = queue.Queue(maxsize=max_size)
+        else:
+            self.queue = asyncio.Queue(maxsize=max_size)
+
+    def put(self, event):
+        if self.loop is None:
+            self._put(event)
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # the loop is closed, the subscriber is gone
+            pass
+
+    def _put(self, event):
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except (queue.Full, asyncio.QueueFull):
+                try:
+                    self.queue.get_nowait()
+                except (queue.Empty, asyncio.QueueEmpty):
+                    pass
+
+    def get(self, timeout=None):
+        """
+        Returns the next event, None if none arrived within ``timeout`` seconds
+        """
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    async def aget(self, timeout=None):
+        """
+        Returns the next event of a subscription made with a loop, None if none arrived
+        within ``timeout`` seconds
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Fans events out to the subscribers of the current process
+
+    Only reaches clients connected to the same process: events published by other
+    workers or by management commands are not streamed. Use ``PostgresBroker`` or
+    ``RedisBroker`` when the application runs on several processes.
+    """
+
+    def __init__(self, max_queue_size=1000):
+        self.max_queue_size = max_queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(event)
+        return len(subscribers)
+
+    def subscribe(self, channels, loop=None):
+        subscription = Subscription(self, list(channels), self.max_queue_size, loop)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+
+class RedisBroker:
+    """
+    Fans events out through Redis pub/sub, to the subscribers of every process
+
+    Publishing sends the event and its channel on ``channel``. Each process subscribing
+    keeps one pub/sub connection listening in a background thread, which hands the
+    messages to its subscribers through an in-process broker.
+
+    Parameters
+    ----------
+    url : str
+        redis connection url
+
+    channel : str
+        Redis channel the events are sent on
+
+    max_queue_size : integer
+        events buffered for a slow subscriber
+    """
+
+    def __init__(self, url='redis://localhost:6379/0', channel='marketplace_events', max_queue_size=1000):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.channel = channel
+        self.local = InProcessBroker(max_queue_size)
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def publish(self, channel, event):
+        return self.client.publish(self.channel, json.dumps({'channel': channel, 'event': event}))
+
+    def subscribe(self, channels, loop=None):
+        self._start()
+        return self.local.subscribe(channels, loop)
+
+    def _start(self):
+        # the listening thread of a parent process does not run after a fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            threading.Thread(target=self._listen, name='event-listener', daemon=True).start()
+            self._pid = os.getpid()
+
+    def _listen(self):
+        while True:
+            pubsub = None
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    if message['type'] == 'message':
+                        message = json.loads(message['data'])
+                        self.local.publish(message['channel'], message['event'])
+            except Exception:
+                logger.exception("event listener failed, reconnecting")
+                time.sleep(1)
+            finally:
+                if pubsub is not None:
+                    pubsub.close()
+
+
+class PostgresBroker:
+    """
+    Fans events out through PostgreSQL NOTIFY, to the subscribers of every process
+
+    Publishing sends a NOTIFY on ``channel`` holding the event and its channel, from
+    the web workers and the management commands (auction settlement, bid expiry)
+    alike. Each process subscribing keeps one connection listening in a background
+    thread, which hands the notifications to its subscribers through an in-process
+    broker, so clients do not hold a database connection each.
+
+    On another database than PostgreSQL it falls back to the in-process broker.
+
+    Parameters
+    ----------
+    channel : str
+        PostgreSQL channel the events are sent on
+
+    max_queue_size : integer
+        events buffered for a slow subscriber
+    """
+
+    def __init__(self, channel='marketplace_events', max_queue_size=1000):
+        self.channel = channel
+        self.local = InProcessBroker(max_queue_size)
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def publish(self, channel, event):
+        if connection.vendor != 'postgresql':
+            return self.local.publish(channel, event)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, json.dumps({'channel': channel, 'event': event})])
+        return None
+
+    def subscribe(self, channels, loop=None):
+        if connection.vendor == 'postgresql':
+            self._start()
+        return self.local.subscribe(channels, loop)
+
+    def _start(self):
+        # the listening thread of a parent process does not run after a fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            threading.Thread(target=self._listen, name='event-listener', daemon=True).start()
+            self._pid = os.getpid()
+
+    def _listen(self):
+        while True:
+            listener = None
+            try:
+                listener = connection.Database.connect(**connection.get_connection_params())
+                listener.autocommit = True
+                with listener.cursor() as cursor:
+                    cursor.execute(f"LISTEN {connection.ops.quote_name(self.channel)}")
+                while True:
+                    if select.select([listener], [], [], 5) == ([], [], []):
+                        continue
+                    listener.poll()
+                    while listener.notifies:
+                        message = json.loads(listener.notifies.pop(0).payload)
+                        self.local.publish(message['channel'], message['event'])
+            except Exception:
+                logger.exception("event listener failed, reconnecting")
+                time.sleep(1)
+            finally:
+                if listener is not None:
+                    listener.close()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+_event_ids = count(1)
+
+
+def get_broker():
+    """
+    Returns the broker configured by ``EVENT_BROKER`` and ``EVENT_BROKER_OPTIONS``
+    """
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                broker_class = import_string(getattr(settings, 'EVENT_BROKER', 'apis.events.PostgresBroker'))
+                _broker = broker_class(**getattr(settings, 'EVENT_BROKER_OPTIONS', {}))
+    return _broker
+
+
+def nft_channel(nft_id):
+    return f'nft:{nft_id}'
+
+
+def collection_channel(collection_id):
+    return f'collection:{collection_id}'
+
+
+def publish(event_type, nft_id, collection_id, data=None):
+    """
+    Publishes an event on the channels of a NFT and of its collection
+
+    The event is sent once the current transaction commits, so subscribers never see
+    changes that were rolled back.
+
+    Parameters
+    ----------
+    event_type : str
+        e.g. ``bid.created``, ``bid.cancelled``, ``bid.expired``, ``sale``, ``price.changed``
+
+    nft_id : integer
+
+    collection_id : integer
+
+    data : dict
+        JSON serializable payload
+    """
+    event = {
+        'id': f'{time.time_ns()}-{next(_event_ids)}',
+        'type': event_type,
+        'nft': nft_id,
+        'collection': collection_id,
+        'data': data or {},
+    }
+
+    def send():
+        broker = get_broker()
+        broker.publish(nft_channel(nft_id), event)
+        broker.publish(collection_channel(collection_id), event)
+
+    transaction.on_commit(send)
+
+
+async def event_stream(subscription, keepalive=15, timeout=300):
+    """
+    Formats the events of a subscription as a Server-Sent Events stream
+
+    An async generator, served by the ASGI application: waiting clients hold no worker
+    nor thread. A comment is sent every ``keepalive`` seconds without events so proxies
+    keep the connection open. The stream ends after ``timeout`` seconds, browsers
+    reconnect on their own.
+
+    Parameters
+    ----------
+    subscription : Subscription
+        made with the loop of the stream
+
+    keepalive : integer
+
+    timeout : integer
+    """
+    deadline = time.monotonic() + timeout
+    try:
+        yield 'retry: 3000\n\n'
+        while time.monotonic() < deadline:
+            event = await subscription.aget(timeout=min(keepalive, max(deadline - time.monotonic(), 0)))
+            if event is None:
+                yield ': keepalive\n\n'
+                continue
+            yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        subscription.close()
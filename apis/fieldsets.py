@@ -0,0 +1,56 @@
+def split(value):
+    """
+    Returns the names of a comma separated list, or of an iterable of names
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    return [name.strip() for name in value if name.strip()]
+
+
+def sparse_fieldset(request):
+    """
+    Returns the ``fields`` and ``exclude`` query parameters of a request as serializer kwargs
+
+    ``NFTSerializer(page, many=True, **sparse_fieldset(request))``
+    """
+    return {
+        'fields': split(request.query_params.get('fields')),
+        'exclude': split(request.query_params.get('exclude')),
+    }
+
+
+class SparseFieldsetMixin:
+    """
+    Mixin for serializers letting clients choose the fields of a response
+
+    ``fields`` keeps only the given fields, ``exclude`` drops the given ones, both take
+    a comma separated string or a list. Unknown names are ignored. ``extra_fields``
+    lists the keys ``to_representation`` adds on top of the declared fields, which
+    can be selected too and must only be added when ``wants`` them.
+    """
+
+    extra_fields = ()
+
+    def __init__(self, *args, fields=None, exclude=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.selected = self.select(list(self.fields) + list(self.extra_fields), fields, exclude)
+        for name in set(self.fields) - self.selected:
+            self.fields.pop(name)
+
+    @staticmethod
+    def select(names, fields=None, exclude=None):
+        """
+        Returns the subset of ``names`` kept by the ``fields`` and ``exclude`` lists
+        """
+        fields, exclude = split(fields), split(exclude)
+        selected = set(names)
+        if fields:
+            selected &= set(fields)
+        if exclude:
+            selected -= set(exclude)
+        return selected
+
+    def wants(self, name):
+        return name in self.selected
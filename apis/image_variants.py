@@ -0,0 +1,224 @@
+import atexit
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from apis import response_cache
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+from django.utils import timezone
+from NFT_Marketplace.storage import DerivedFile
+from PIL import Image, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+SIZES = {
+    'thumb': (200, 200, True),
+    'medium': (600, 600, False),
+    'large': (1200, 1200, False),
+}
+FORMATS = ('webp', 'avif')
+QUALITY = {'webp': 80, 'avif': 60}
+
+# model -> names of its image fields with variants
+registry = {}
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def sizes():
+    return getattr(settings, 'IMAGE_VARIANT_SIZES', SIZES)
+
+
+def formats():
+    """
+    Returns the configured formats the installed Pillow can encode
+    """
+    return [format for format in getattr(settings, 'IMAGE_VARIANT_FORMATS', FORMATS) if features.check(format)]
+
+
+def variant_name(name, size, format):
+    """
+    Returns the storage name of a variant, next to its original
+
+    ``posts/dragon.png`` gives ``posts/dragon.thumb.webp``
+    """
+    return f"{os.path.splitext(name)[0]}.{size}.{format}"
+
+
+def render(data, sizes, formats):
+    """
+    Encodes the resized variants of an image
+
+    Runs in the worker processes, it only depends on Pillow.
+
+    Parameters
+    ----------
+    data : bytes
+        content of the original
+
+    sizes : dict
+        ``name: (width, height, crop)``, cropped variants have exactly this size, the
+        others fit in it and are never upscaled
+
+    formats : list of str
+
+    Returns
+    -------
+    dict
+        ``(size, format): bytes``
+    """
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+        variants = {}
+        for size, (width, height, crop) in sizes.items():
+            if crop:
+                resized = ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+            else:
+                resized = image.copy()
+                resized.thumbnail((width, height), Image.Resampling.LANCZOS)
+            for format in formats:
+                output = io.BytesIO()
+                resized.save(output, format=format.upper(), quality=QUALITY.get(format, 80))
+                variants[(size, format)] = output.getvalue()
+        return variants
+
+
+def urls(variants):
+    """
+    Returns the URLs of stored variants, ``{field: {'thumb.webp': url, ...}}``
+    """
+    return {
+        field: {key: default_storage.url(name) for key, name in names.items() if key != 'source'}
+        for field, names in (variants or {}).items()
+    }
+
+
+def is_current(instance, field):
+    """
+    Returns True if every configured variant of an image field was generated from its
+    current file
+    """
+    name = getattr(instance, field).name
+    if not name:
+        return True
+    generated = (instance.image_variants or {}).get(field, {})
+    return generated.get('source') == name and \
+        all(f'{size}.{format}' in generated for size in sizes() for format in formats())
+
+
+def generate(model, pk, fields):
+    """
+    Generates and stores the missing variants of image fields of a row
+
+    Variants are rendered in the process pool, or inline without workers. Existing
+    variant files are reused, uploads are never overwritten under the same name. The
+    names the storage saved the variants under are written with a queryset update so that no signal fires again.
+    """
+    instance = model.objects.filter(pk=pk).only('pk', 'image_variants', *fields).first()
+    if instance is None:
+        return
+    variants = dict(instance.image_variants or {})
+    for field in fields:
+        file = getattr(instance, field)
+        if is_current(instance, field):
+            continue
+        storage = file.storage
+        wanted = {(size, format): variant_name(file.name, size, format) for size in sizes() for format in formats()}
+        missing = {key: name for key, name in wanted.items() if not storage.exists(name)}
+        if missing:
+            with storage.open(file.name, 'rb') as original:
+                data = original.read()
+            rendered = _pool_render(data, {size: sizes()[size] for size, _ in missing},
+                                    sorted({format for _, format in missing}))
+            for key, name in missing.items():
+                wanted[key] = storage.save(name, DerivedFile(rendered[key]))
+        variants[field] = {f'{size}.{format}': name for (size, format), name in wanted.items()}
+        variants[field]['source'] = file.name
+    updates = {'image_variants': variants}
+    if any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+        updates['updated_at'] = timezone.now()
+    model.objects.filter(pk=pk).update(**updates)
+    response_cache.invalidate(model)
+
+
+def _pool_render(data, sizes, formats):
+    workers = getattr(settings, 'IMAGE_VARIANT_WORKERS', 2)
+    if not workers:
+        return render(data, sizes, formats)
+    return _get_executor(ProcessPoolExecutor, workers).submit(render, data, sizes, formats).result()
+
+
+def _get_executor(kind, workers):
+    with _executors_lock:
+        if kind not in _executors:
+            _executors[kind] = kind(max_workers=workers)
+            atexit.register(_executors[kind].shutdown, wait=False)
+        return _executors[kind]
+
+
+def _run_logged(function, *args):
+    try:
+        function(*args)
+    except Exception:
+        logger.exception("%s%r failed", function.__name__, args)
+
+
+def _run_in_background(function, *args):
+    try:
+        _run_logged(function, *args)
+    finally:
+        connection.close()
+
+
+def after_commit(function, *args):
+    """
+    Calls ``function(*args)`` once the current transaction is committed
+
+    With ``IMAGE_VARIANT_WORKERS`` set, the call is made by one of as many threads as
+    workers and the request returns right away, without workers it is made before the
+    request returns. Errors are logged.
+    """
+    def run():
+        workers = getattr(settings, 'IMAGE_VARIANT_WORKERS', 2)
+        if workers:
+            _get_executor(ThreadPoolExecutor, workers).submit(_run_in_background, function, *args)
+        else:
+            _run_logged(function, *args)
+    transaction.on_commit(run)
+
+
+def schedule(model, pk, fields):
+    """
+    Generates the variants of a row once the current transaction is committed
+
+    With ``IMAGE_VARIANT_WORKERS`` set, the request returns right away: the threads of
+    ``after_commit`` feed the process pool, which does the CPU bound decoding, resizing
+    and encoding out of the web process.
+    """
+    after_commit(generate, model, pk, fields)
+
+
+def _schedule_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    fields = [field for field in registry[sender] if not is_current(instance, field)]
+    if fields:
+        schedule(sender, instance.pk, fields)
+
+
+def track(model, *fields):
+    """
+    Generates the variants of the image ``fields`` of ``model`` whenever they change
+
+    The model needs an ``image_variants`` JSON field holding, per image field, the
+    name of the original the variants were generated from and the variant names.
+    """
+    registry[model] = fields
+    post_save.connect(_schedule_changed, sender=model, weak=False, dispatch_uid=f'image_variants:{model._meta.label}')
@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+class AddPostgresIndex(migrations.AddIndex):
+    """
+    AddIndex for PostgreSQL only indexes (GIN, trigram), skipped on other databases
+
+    Keeps the migrations runnable on the SQLite databases used in development.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
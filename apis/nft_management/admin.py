@@ -3,7 +3,10 @@ from .models import *
 
 admin.site.register(Category)
 admin.site.register(Collection)
+admin.site.register(CollectionStats)
 admin.site.register(Nft)
 admin.site.register(NftPriceHistory)
+admin.site.register(NftPriceCandle)
+admin.site.register(CollectionPriceCandle)
 admin.site.register(FavouriteNft)
 admin.site.register(ReportedNft)
\ No newline at end of file
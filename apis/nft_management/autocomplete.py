@@ -0,0 +1,213 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Sum
+
+from .models import Category, Collection, Nft
+
+KINDS = ('nft', 'collection', 'category')
+KIND_OF_MODEL = {Nft: 'nft', Collection: 'collection', Category: 'category'}
+MAX_WORDS = 5
+
+
+def normalize(text):
+    return ' '.join(text.casefold().split())
+
+
+def word_suffixes(name):
+    """
+    Returns the suffixes of a normalized name starting at each of its first words
+
+    ``red dragon egg`` gives ``red dragon egg``, ``dragon egg`` and ``egg``, so a name
+    is found from the beginning of any of its words.
+    """
+    words = name.split(' ')[:MAX_WORDS]
+    suffixes, start = [], 0
+    for word in words:
+        suffixes.append(name[start:])
+        start += len(word) + 1
+    return suffixes
+
+
+class PrefixIndex:
+    """
+    In-memory sorted array of names answering prefix queries with bisect
+
+    Entries are ``(key, kind, id)`` tuples kept sorted, one per word suffix of a name,
+    so a prefix query is two binary searches and a slice. Matches are ranked by weight
+    (NFT views, summed up for collections and categories).
+
+    Short prefixes match large ranges which would be slow to rank, for those the names
+    of each kind are walked heaviest first instead until enough of them match, which
+    stops early precisely because so many names match. These results are memoized
+    until the index changes.
+    """
+
+    scan_limit = 4000
+    memo_size = 10000
+
+    def __init__(self):
+        self._entries = []
+        self._by_weight = {kind: [] for kind in KINDS}
+        self._items = {}
+        self._memo = {}
+        self._lock = threading.RLock()
+        self.built_at = None
+
+    def build(self, items):
+        """
+        Replaces the content of the index
+
+        Parameters
+        ----------
+        items : iterable of tuple
+            ``(kind, id, name, weight)``
+        """
+        entries, by_weight, indexed = [], {kind: [] for kind in KINDS}, {}
+        for kind, pk, name, weight in items:
+            suffixes = word_suffixes(normalize(name))
+            indexed[(kind, pk)] = (name, weight, suffixes)
+            entries.extend((suffix, kind, pk) for suffix in suffixes)
+            by_weight[kind].append((-weight, len(name), pk))
+        entries.sort()
+        for ranking in by_weight.values():
+            ranking.sort()
+        with self._lock:
+            self._entries, self._by_weight, self._items, self._memo = entries, by_weight, indexed, {}
+            self.built_at = time.monotonic()
+
+    def add(self, kind, pk, name, weight=None):
+        """
+        Adds, renames or reweights an entry, ``weight`` None keeps the current weight
+        """
+        with self._lock:
+            current = self._items.get((kind, pk))
+            if weight is None:
+                weight = current[1] if current else 0
+            self._remove(kind, pk)
+            suffixes = word_suffixes(normalize(name))
+            self._items[(kind, pk)] = (name, weight, suffixes)
+            for suffix in suffixes:
+                insort(self._entries, (suffix, kind, pk))
+            insort(self._by_weight[kind], (-weight, len(name), pk))
+            self._memo = {}
+
+    def remove(self, kind, pk):
+        with self._lock:
+            self._remove(kind, pk)
+            self._memo = {}
+
+    def _remove(self, kind, pk):
+        current = self._items.pop((kind, pk), None)
+        if current is None:
+            return
+        name, weight, suffixes = current
+        for entry, entries in [((suffix, kind, pk), self._entries) for suffix in suffixes] + \
+                [((-weight, len(name), pk), self._by_weight[kind])]:
+            position = bisect_left(entries, entry)
+            if position < len(entries) and entries[position] == entry:
+                del entries[position]
+
+    def complete(self, prefix, limit=10, kinds=KINDS):
+        """
+        Returns the heaviest entries with a word starting with ``prefix``
+
+        Parameters
+        ----------
+        prefix : str
+
+        limit : integer
+
+        kinds : tuple of str
+
+        Returns
+        -------
+        list of dict
+            ``type``, ``id`` and ``name`` of each match, heaviest first
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        memo_key = (prefix, limit, tuple(kinds))
+        with self._lock:
+            if memo_key in self._memo:
+                return self._memo[memo_key]
+            items = self._items
+            start = bisect_left(self._entries, (prefix,))
+            end = bisect_left(self._entries, (prefix + '\uffff',))
+            if end - start <= self.scan_limit:
+                matches = {(kind, pk) for _, kind, pk in self._entries[start:end] if kind in kinds}
+                ranked = [(-items[ref][1], len(items[ref][0]), ref) for ref in matches]
+            else:
+                ranked = []
+                for kind in kinds:
+                    found = 0
+                    for negative_weight, length, pk in self._by_weight[kind]:
+                        if found == limit:
+                            break
+                        if any(suffix.startswith(prefix) for suffix in items[(kind, pk)][2]):
+                            ranked.append((negative_weight, length, (kind, pk)))
+                            found += 1
+            result = [{'type': kind, 'id': pk, 'name': items[(kind, pk)][0]}
+                      for _, _, (kind, pk) in heapq.nsmallest(limit, ranked)]
+            if end - start > self.scan_limit:
+                if len(self._memo) >= self.memo_size:
+                    self._memo = {}
+                self._memo[memo_key] = result
+        return result
+
+
+def load_items():
+    """
+    Reads the names and weights of visible NFTs, collections and categories
+    """
+    nfts = Nft.objects.filter(is_removed=False, is_hidden=False).values_list('id', 'name', 'total_views')
+    collections = Collection.objects.filter(is_removed=False).annotate(
+        views=Sum('nft_collection__total_views')
+    ).values_list('id', 'name', 'category_id', 'views')
+    category_views = {}
+    for pk, name, views in nfts.iterator():
+        yield 'nft', pk, name, views
+    for pk, name, category_id, views in collections.iterator():
+        category_views[category_id] = category_views.get(category_id, 0) + (views or 0)
+        yield 'collection', pk, name, views or 0
+    for pk, name in Category.objects.filter(is_removed=False, is_active=True).values_list('id', 'name'):
+        yield 'category', pk, name, category_views.get(pk, 0)
+
+
+_index = PrefixIndex()
+_build_lock = threading.Lock()
+
+
+def _rebuild():
+    try:
+        _index.build(load_items())
+    finally:
+        connection.close()
+        _build_lock.release()
+
+
+def get_index():
+    """
+    Returns the process wide index, built on first use
+
+    Signals keep the index of the process handling a write up to date. Other processes
+    pick the change up when their index is rebuilt, in a background thread, once it is
+    older than ``AUTOCOMPLETE_MAX_AGE`` seconds.
+    """
+    if _index.built_at is None:
+        with _build_lock:
+            if _index.built_at is None:
+                _index.build(load_items())
+    elif time.monotonic() - _index.built_at > getattr(settings, 'AUTOCOMPLETE_MAX_AGE', 300):
+        if _build_lock.acquire(blocking=False):
+            threading.Thread(target=_rebuild, daemon=True).start()
+    return _index
+
+
+def is_built():
+    return _index.built_at is not None
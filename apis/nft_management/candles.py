@@ -0,0 +1,207 @@
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Q, Value, When
+from django.db.models.functions import Greatest, Least
+
+from .models import CollectionPriceCandle, NftPriceCandle
+
+RESOLUTIONS = {
+    '1h': lambda at: at.replace(minute=0, second=0, microsecond=0),
+    '1d': lambda at: at.replace(hour=0, minute=0, second=0, microsecond=0),
+    '1w': lambda at: (at - timedelta(days=at.weekday())).replace(hour=0, minute=0, second=0, microsecond=0),
+}
+RESOLUTION_LENGTHS = {'1h': timedelta(hours=1), '1d': timedelta(days=1), '1w': timedelta(weeks=1)}
+# start of a bucket of each resolution, periods of several buckets are aligned on it
+EPOCHS = {
+    '1h': datetime(1970, 1, 1, tzinfo=dt_timezone.utc),
+    '1d': datetime(1970, 1, 1, tzinfo=dt_timezone.utc),
+    '1w': datetime(1970, 1, 5, tzinfo=dt_timezone.utc),
+}
+
+
+def bucket_of(resolution, at):
+    """
+    Returns the UTC start of the candle of ``resolution`` containing ``at``
+    """
+    return RESOLUTIONS[resolution](at.astimezone(dt_timezone.utc))
+
+
+def record_price(nft_id, collection_id, price, at):
+    """
+    Adds a price to the candles of a NFT and of its collection, at every resolution
+
+    Parameters
+    ----------
+    nft_id : integer
+
+    collection_id : integer
+
+    price : float
+
+    at : datetime
+        date of the price, older dates only move open, high and low
+    """
+    price = float(price)
+    with transaction.atomic():
+        for resolution in RESOLUTIONS:
+            bucket = bucket_of(resolution, at)
+            _add(NftPriceCandle, {'nft_id': nft_id}, resolution, bucket, price, at)
+            _add(CollectionPriceCandle, {'collection_id': collection_id}, resolution, bucket, price, at)
+
+
+def _add(model, scope, resolution, bucket, price, at):
+    candles = model.objects.filter(resolution=resolution, bucket=bucket, **scope)
+    # open and close are assigned before opened_at and closed_at so databases applying
+    # assignments in order (MySQL) compare against the previous dates too
+    updated = candles.update(
+        high=Greatest('high', Value(price)),
+        low=Least('low', Value(price)),
+        open=Case(When(opened_at__gt=at, then=Value(price)), default=F('open')),
+        close=Case(When(closed_at__lte=at, then=Value(price)), default=F('close')),
+        opened_at=Least('opened_at', Value(at)),
+        closed_at=Greatest('closed_at', Value(at)),
+        points=F('points') + 1,
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(resolution=resolution, bucket=bucket, open=price, high=price, low=price,
+                                 close=price, opened_at=at, closed_at=at, **scope)
+    except IntegrityError:
+        # created concurrently, the row exists now
+        _add(model, scope, resolution, bucket, price, at)
+
+
+def rollup(prices):
+    """
+    Builds candles from ``(nft id, collection id, price, date)`` rows
+
+    Returns
+    -------
+    tuple of list
+        unsaved NftPriceCandle and CollectionPriceCandle objects
+    """
+    candles = {}
+    for nft_id, collection_id, price, at in prices:
+        for resolution in RESOLUTIONS:
+            bucket = bucket_of(resolution, at)
+            for key in (('nft_id', nft_id, resolution, bucket), ('collection_id', collection_id, resolution, bucket)):
+                candle = candles.get(key)
+                if candle is None:
+                    candles[key] = {'open': price, 'high': price, 'low': price, 'close': price, 'points': 1,
+                                    'opened_at': at, 'closed_at': at}
+                    continue
+                candle['high'] = max(candle['high'], price)
+                candle['low'] = min(candle['low'], price)
+                if at < candle['opened_at']:
+                    candle['open'], candle['opened_at'] = price, at
+                if at >= candle['closed_at']:
+                    candle['close'], candle['closed_at'] = price, at
+                candle['points'] += 1
+
+    nft_candles, collection_candles = [], []
+    for (field, scope_id, resolution, bucket), values in candles.items():
+        model, target = (NftPriceCandle, nft_candles) if field == 'nft_id' else \
+            (CollectionPriceCandle, collection_candles)
+        target.append(model(resolution=resolution, bucket=bucket, **{field: scope_id}, **values))
+    return nft_candles, collection_candles
+
+
+def get_candles(model, scope, resolution, start, end, max_points):
+    """
+    Returns the candles of a NFT or collection between two dates
+
+    Candles are read from the rollup table through its (scope, resolution, bucket)
+    index. When the range holds more than ``max_points`` candles, the finest coarser
+    resolution holding at most ``max_points`` candles is read instead, the candles of
+    every resolution being counted with a single grouped query. Years of hourly history
+    are thus charted from a few hundred daily or weekly rows.
+
+    Past the coarsest resolution, candles are merged into fixed periods of several of
+    its candles aligned on the epoch, so that candles apart in time are never merged
+    across a gap in trading.
+
+    Parameters
+    ----------
+    model : NftPriceCandle or CollectionPriceCandle
+
+    scope : dict
+        ``{'nft_id': ...}`` or ``{'collection_id': ...}``
+
+    resolution : str
+        one of RESOLUTIONS
+
+    start : datetime
+        included, None for no lower bound
+
+    end : datetime
+        excluded, None for no upper bound
+
+    max_points : integer
+
+    Returns
+    -------
+    tuple
+        resolution the candles were read at and the list of candles
+    """
+    def in_range(resolution):
+        condition = Q(resolution=resolution)
+        if start is not None:
+            condition &= Q(bucket__gte=bucket_of(resolution, start))
+        if end is not None:
+            condition &= Q(bucket__lt=end)
+        return condition
+
+    def rows_at(resolution, limit=None):
+        rows = model.objects.filter(in_range(resolution), **scope).order_by('bucket') \
+            .values_list('bucket', 'open', 'high', 'low', 'close', 'points')
+        return list(rows[:limit] if limit is not None else rows)
+
+    rows = rows_at(resolution, max_points + 1)
+    if len(rows) > max_points:
+        resolutions = list(RESOLUTIONS)
+        coarser = resolutions[resolutions.index(resolution) + 1:]
+        if coarser:
+            condition = Q()
+            for candidate in coarser:
+                condition |= in_range(candidate)
+            counts = dict(model.objects.filter(condition, **scope).order_by()
+                          .values_list('resolution').annotate(count=Count('pk')))
+            resolution = next((candidate for candidate in coarser if counts.get(candidate, 0) <= max_points),
+                              coarser[-1])
+        rows = rows_at(resolution)
+
+    return resolution, [_candle(group) for group in _merge(rows, resolution, max_points)]
+
+
+def _merge(rows, resolution, max_points):
+    """
+    Groups candles by fixed periods of ``size`` candles of ``resolution``, so that at
+    most ``max_points`` groups are left
+    """
+    if len(rows) <= max_points:
+        return [[row] for row in rows]
+    length, epoch = RESOLUTION_LENGTHS[resolution], EPOCHS[resolution]
+    first, last = rows[0][0] - epoch, rows[-1][0] - epoch
+    size = math.ceil(((last - first) // length + 1) / max_points)
+    # periods aligned on the epoch may straddle one more period than the span needs
+    while last // (length * size) - first // (length * size) + 1 > max_points:
+        size += 1
+    groups = {}
+    for row in rows:
+        groups.setdefault((row[0] - epoch) // (length * size), []).append(row)
+    return [groups[period] for period in sorted(groups)]
+
+
+def _candle(group):
+    return {
+        'time': group[0][0].isoformat(),
+        'open': group[0][1],
+        'high': max(row[2] for row in group),
+        'low': min(row[3] for row in group),
+        'close': group[-1][4],
+        'points': sum(row[5] for row in group),
+    }
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.db.models import Case, Count, F, IntegerField, Value, When
+
+from .models import choices
+
+
+def price_buckets():
+    """
+    Returns the ``(label, lower bound, upper bound)`` price ranges of the price facet
+    """
+    edges = getattr(settings, 'NFT_PRICE_FACET_EDGES', [0.1, 1, 10, 100])
+    bounds = [None, *edges, None]
+    return [
+        (f"{low if low is not None else ''}-{high if high is not None else ''}", low, high)
+        for low, high in zip(bounds, bounds[1:])
+    ]
+
+
+def facet_counts(queryset):
+    """
+    Counts the NFTs of a queryset per category, sale type and price range
+
+    All facets come from a single ``GROUP BY category, sale_type, price bucket`` query
+    whose groups are summed up per facet, instead of one COUNT per facet value.
+
+    Parameters
+    ----------
+    queryset : django.db.models.QuerySet
+        filtered NFTs
+
+    Returns
+    -------
+    dict
+        ``category``, ``sale_type`` and ``price`` lists of values with their count
+    """
+    buckets = price_buckets()
+    bucket = Case(
+        *[When(price__lt=high, then=Value(position)) for position, (_, _, high) in enumerate(buckets[:-1])],
+        default=Value(len(buckets) - 1),
+        output_field=IntegerField(),
+    )
+    groups = queryset.order_by().values(
+        category=F('collection__category'), category_name=F('collection__category__name'),
+        sale=F('sale_type'), bucket=bucket,
+    ).annotate(count=Count('id'))
+
+    categories, sale_types, prices = {}, dict.fromkeys(dict(choices), 0), [0] * len(buckets)
+    for group in groups:
+        category = categories.setdefault(group['category'], {
+            'id': group['category'], 'name': group['category_name'], 'count': 0
+        })
+        category['count'] += group['count']
+        sale_types[group['sale']] = sale_types.get(group['sale'], 0) + group['count']
+        prices[group['bucket']] += group['count']
+
+    return {
+        'category': sorted(categories.values(), key=lambda category: (-category['count'], category['id'])),
+        'sale_type': [{'value': value, 'count': count} for value, count in sale_types.items()],
+        'price': [{'value': label, 'min': low, 'max': high, 'count': count}
+                  for (label, low, high), count in zip(buckets, prices)],
+    }
@@ -0,0 +1,18 @@
+from django_filters import DateTimeFilter, FilterSet, NumberFilter
+
+from .models import Nft
+
+
+class NftFilter(FilterSet):
+    """
+    Filters of the public NFT list
+    """
+    category = NumberFilter(field_name='collection__category')
+    min_price = NumberFilter(field_name='price', lookup_expr='gte')
+    max_price = NumberFilter(field_name='price', lookup_expr='lt')
+    created_after = DateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = DateTimeFilter(field_name='created_at', lookup_expr='lt')
+
+    class Meta:
+        model = Nft
+        fields = ['category', 'collection', 'owner', 'sale_type', 'is_hidden']
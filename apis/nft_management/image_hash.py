@@ -0,0 +1,350 @@
+import threading
+import time
+from functools import lru_cache
+from itertools import combinations
+
+from apis import image_variants
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from PIL import Image, ImageOps
+
+from .models import Nft, StoredImageHash
+
+BITS = 64
+SIGN = 1 << (BITS - 1)
+
+
+def dhash(file):
+    """
+    Returns the 64 bits difference hash of an image
+
+    The image is reduced to 9x8 gray pixels and each bit tells whether a pixel is
+    brighter than its right neighbour. Resized, recompressed or slightly retouched
+    copies of an image get the same hash or one a few bits away.
+
+    Parameters
+    ----------
+    file : file object or path
+
+    Returns
+    -------
+    integer
+        unsigned hash
+    """
+    with Image.open(file) as image:
+        # lets JPEG decode at a fraction of its size
+        image.draft('L', (64, 64))
+        image = ImageOps.exif_transpose(image).convert('L').resize((9, 8), Image.Resampling.LANCZOS)
+        pixels = list(image.getdata())
+    value = 0
+    for row in range(8):
+        for column in range(8):
+            left, right = pixels[row * 9 + column], pixels[row * 9 + column + 1]
+            value = value << 1 | (left > right)
+    return value
+
+
+def hash_upload(file):
+    """
+    Returns the hash of an uploaded image, None if it is not an image Pillow can read
+
+    The hash is kept on the file, which is decoded once however many times it is
+    hashed: by the view checking it for copies, then when it is stored.
+    """
+    if not hasattr(file, '_image_hash'):
+        try:
+            file.seek(0)
+            file._image_hash = dhash(file)
+        except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+            file._image_hash = None
+        finally:
+            file.seek(0)
+    return file._image_hash
+
+
+def record(name, file):
+    """
+    Records the hash of a stored file, unless it is known already
+    """
+    if StoredImageHash.objects.filter(name=name).exists():
+        return
+    value = hash_upload(file)
+    StoredImageHash.objects.get_or_create(name=name, defaults={'image_hash': None if value is None else to_db(value)})
+
+
+def stored_hashes(names):
+    """
+    Returns the hashes of stored files recorded when they were uploaded or when the
+    image of an NFT showing them was hashed
+
+    Returns
+    -------
+    dict
+        unsigned hash, or None for files which are not images, of each known name.
+        Files stored before hashes were recorded are left out.
+    """
+    known = dict(StoredImageHash.objects.filter(name__in=names).values_list('name', 'image_hash'))
+    missing = set(names) - known.keys()
+    if missing:
+        known.update(Nft.objects.filter(image__in=missing, image_hash__isnull=False)
+                     .values_list('image', 'image_hash'))
+    return {name: None if value is None else from_db(value) for name, value in known.items()}
+
+
+def to_db(value):
+    """
+    Returns an unsigned hash as the signed integer stored in a BigIntegerField
+    """
+    return value - (1 << BITS) if value >= SIGN else value
+
+
+def from_db(value):
+    return value + (1 << BITS) if value < 0 else value
+
+
+def distance(a, b):
+    """
+    Returns the number of differing bits of two hashes
+    """
+    return (a ^ b).bit_count()
+
+
+@lru_cache(maxsize=None)
+def _masks(bits, radius):
+    """
+    Returns the masks flipping at most ``radius`` of ``bits`` bits
+    """
+    return tuple(sum(1 << bit for bit in flipped)
+                 for count in range(radius + 1) for flipped in combinations(range(bits), count))
+
+
+class HammingIndex:
+    """
+    In-memory multi-index hash table answering "hashes within distance k" queries
+
+    Hashes are cut in ``chunks`` substrings, each indexed in its own table. Two hashes
+    within ``k`` bits of each other have at least one substring within ``k // chunks``
+    bits of each other, so a query only looks up the few substrings that close to its
+    own in each table and compares the full hashes of the candidates found, instead of
+    every hash. With 16 bits substrings, a million hashes leave a handful of hashes per
+    bucket, and the distances near-duplicates are within (up to 11 bits) mean at most
+    137 lookups per table.
+
+    The ids of the NFTs with each hash are kept apart, several NFTs may share an image.
+    """
+
+    chunks = 4
+    chunk_bits = BITS // chunks
+
+    def __init__(self):
+        self._tables = [{} for _ in range(self.chunks)]
+        self._ids = {}
+        self._hashes = {}
+        self._lock = threading.RLock()
+        self.built_at = None
+
+    def _substrings(self, value):
+        mask = (1 << self.chunk_bits) - 1
+        return [(value >> (self.chunk_bits * i)) & mask for i in range(self.chunks)]
+
+    def build(self, items):
+        """
+        Replaces the content of the index
+
+        Parameters
+        ----------
+        items : iterable of tuple
+            ``(id, unsigned hash)``
+        """
+        index = HammingIndex()
+        for pk, value in items:
+            index.add(pk, value)
+        with self._lock:
+            self._tables, self._ids, self._hashes = index._tables, index._ids, index._hashes
+            self.built_at = time.monotonic()
+
+    def add(self, pk, value):
+        with self._lock:
+            self._remove(pk)
+            if value not in self._ids:
+                self._ids[value] = set()
+                for table, substring in zip(self._tables, self._substrings(value)):
+                    table.setdefault(substring, set()).add(value)
+            self._ids[value].add(pk)
+            self._hashes[pk] = value
+
+    def remove(self, pk):
+        with self._lock:
+            self._remove(pk)
+
+    def _remove(self, pk):
+        value = self._hashes.pop(pk, None)
+        if value is None:
+            return
+        ids = self._ids[value]
+        ids.discard(pk)
+        if not ids:
+            del self._ids[value]
+            for table, substring in zip(self._tables, self._substrings(value)):
+                table[substring].discard(value)
+                if not table[substring]:
+                    del table[substring]
+
+    def search(self, value, k):
+        """
+        Returns ``(distance, id)`` pairs of the hashes within ``k`` bits of ``value``,
+        closest first
+        """
+        masks = _masks(self.chunk_bits, k // self.chunks)
+        found = []
+        with self._lock:
+            candidates = set()
+            for table, substring in zip(self._tables, self._substrings(value)):
+                for mask in masks:
+                    candidates.update(table.get(substring ^ mask, ()))
+            for candidate in candidates:
+                d = distance(value, candidate)
+                if d <= k:
+                    found.extend((d, pk) for pk in self._ids[candidate])
+        return sorted(found)
+
+    def __len__(self):
+        return len(self._hashes)
+
+
+def load_items():
+    """
+    Reads the image hashes of the NFTs which are not removed
+    """
+    hashes = Nft.objects.filter(is_removed=False, image_hash__isnull=False).values_list('id', 'image_hash')
+    for pk, value in hashes.iterator(chunk_size=10000):
+        yield pk, from_db(value)
+
+
+_index = HammingIndex()
+_build_lock = threading.Lock()
+
+
+def _rebuild():
+    try:
+        _index.build(load_items())
+    finally:
+        connection.close()
+        _build_lock.release()
+
+
+def get_index():
+    """
+    Returns the process wide index, built on first use
+
+    Hashes computed by this process are added to its index. Other processes pick them
+    up when their index is rebuilt, in a background thread, once it is older than
+    ``IMAGE_HASH_MAX_AGE`` seconds.
+    """
+    if _index.built_at is None:
+        with _build_lock:
+            if _index.built_at is None:
+                _index.build(load_items())
+    elif time.monotonic() - _index.built_at > getattr(settings, 'IMAGE_HASH_MAX_AGE', 300):
+        if _build_lock.acquire(blocking=False):
+            threading.Thread(target=_rebuild, daemon=True).start()
+    return _index
+
+
+def is_built():
+    return _index.built_at is not None
+
+
+def similar(value, k=None, exclude=None):
+    """
+    Returns the NFTs whose image is within ``k`` bits of a hash, closest first
+
+    Parameters
+    ----------
+    value : integer
+        unsigned hash
+
+    k : integer
+        ``IMAGE_HASH_MAX_DISTANCE`` by default
+
+    exclude : integer
+        id of an NFT left out of the results, the one the hash is of
+
+    Returns
+    -------
+    list of tuple
+        ``(Nft, distance)``, removed NFTs left out
+    """
+    k = getattr(settings, 'IMAGE_HASH_MAX_DISTANCE', 10) if k is None else k
+    matches = [(d, pk) for d, pk in get_index().search(value, k) if pk != exclude]
+    nfts = Nft.objects.filter(pk__in=[pk for _, pk in matches], is_removed=False).in_bulk()
+    return [(nfts[pk], d) for d, pk in matches if pk in nfts]
+
+
+def copies(values, owner_id, k=None):
+    """
+    Returns the NFTs of other owners whose image is a copy of one of the given hashes
+
+    Exact copies are looked up in the database, so that the NFTs other processes
+    minted since the index of this process was built are found too, near copies in the
+    index. Both come from a single query.
+
+    Parameters
+    ----------
+    values : iterable of integer
+        unsigned hashes
+
+    owner_id : integer
+        owner minting the images, whose own NFTs are not copies
+
+    k : integer
+        ``NFT_DUPLICATE_IMAGE_DISTANCE`` by default
+
+    Returns
+    -------
+    dict
+        sorted ids of the copies of each hash having some
+    """
+    k = getattr(settings, 'NFT_DUPLICATE_IMAGE_DISTANCE', 4) if k is None else k
+    values = set(values)
+    if not values:
+        return {}
+    index = get_index()
+    near = {value: {pk for _, pk in index.search(value, k)} for value in values}
+    rows = Nft.objects.filter(Q(pk__in=set().union(*near.values())) | Q(image_hash__in=[to_db(v) for v in values]),
+                              is_removed=False).exclude(owner_id=owner_id).values_list('id', 'image_hash')
+    found = {}
+    for pk, stored in rows:
+        for value in values:
+            if pk in near[value] or (stored is not None and from_db(stored) == value):
+                found.setdefault(value, []).append(pk)
+    return {value: sorted(ids) for value, ids in found.items()}
+
+
+def update(pk):
+    """
+    Computes and stores the hash of the current image of an NFT
+
+    The hash is written with a queryset update so that no signal fires again.
+    """
+    nft = Nft.objects.filter(pk=pk).only('pk', 'image').first()
+    if nft is None or not nft.image.name:
+        return
+    with nft.image.open('rb') as file:
+        value = hash_upload(file)
+    StoredImageHash.objects.get_or_create(name=nft.image.name,
+                                          defaults={'image_hash': None if value is None else to_db(value)})
+    if value is None:
+        return
+    Nft.objects.filter(pk=pk).update(image_hash=to_db(value))
+    if is_built():
+        _index.add(pk, value)
+
+
+def schedule(pk):
+    """
+    Hashes the image of an NFT in the background once the current transaction is
+    committed
+    """
+    image_variants.after_commit(update, pk)
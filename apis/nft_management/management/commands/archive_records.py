@@ -0,0 +1,35 @@
+from apis import archive
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """
+    Moves request logs, transactions and price history past their retention to archives
+
+    Run periodically (e.g. daily from cron) so these tables keep their recent rows only.
+    Rows older than ``ARCHIVE_RETENTION_DAYS`` are written to gzip compressed JSON Lines
+    files under ``ARCHIVE_ROOT`` then deleted, by chunks of ``ARCHIVE_CHUNK_SIZE``. Use
+    restore_archive to insert archived rows back.
+
+    Statistics, leaderboards and price candles keep the archived rows, and their
+    rebuilds from scratch (refresh_collection_stats --rebuild, refresh_seller_leaderboard
+    --rebuild, rebuild_price_candles) read the archives along with the tables.
+    """
+    help = "Archive old records"
+
+    def add_arguments(self, parser):
+        parser.add_argument('labels', nargs='*', metavar='app_label.model_name',
+                            help=f"Models to archive, among {', '.join(archive.DATE_FIELDS)}, all by default")
+        parser.add_argument('--chunk-size', type=int, help='Rows per archive file')
+
+    def handle(self, *args, **options):
+        labels = options['labels'] or list(archive.DATE_FIELDS)
+        unknown = set(labels) - archive.DATE_FIELDS.keys()
+        if unknown:
+            raise CommandError(f"Cannot archive {', '.join(sorted(unknown))}")
+        for label in labels:
+            files = rows = 0
+            for path, count in archive.archive_expired(label, options['chunk_size']):
+                files, rows = files + 1, rows + count
+                self.stdout.write(f"{label}: {count} rows archived to {path}")
+            self.stdout.write(self.style.SUCCESS(f"{label}: archived {rows} rows in {files} files"))
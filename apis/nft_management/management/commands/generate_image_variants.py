@@ -0,0 +1,38 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from apis import image_variants
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+
+class Command(BaseCommand):
+    """
+    Generates the missing image variants of NFTs, collections and profiles
+
+    Variants are generated when images are uploaded, run this once to backfill existing
+    images or after adding sizes or formats to IMAGE_VARIANT_SIZES or IMAGE_VARIANT_FORMATS.
+    """
+    help = "Generate image variants"
+
+    def handle(self, *args, **options):
+        pending = []
+        for model, fields in image_variants.registry.items():
+            for instance in model.objects.only('pk', 'image_variants', *fields).iterator(chunk_size=2000):
+                stale = [field for field in fields if not image_variants.is_current(instance, field)]
+                if stale:
+                    pending.append((model, instance.pk, stale))
+
+        def generate(model, pk, fields):
+            try:
+                image_variants.generate(model, pk, fields)
+                return True
+            except Exception as e:
+                self.stderr.write(f"{model.__name__} {pk}: {e}")
+                return False
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=max(getattr(settings, 'IMAGE_VARIANT_WORKERS', 2), 1)) as executor:
+            done = sum(executor.map(lambda job: generate(*job), pending))
+        self.stdout.write(self.style.SUCCESS(f"Generated the variants of {done} of {len(pending)} rows"))
@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from apis.nft_management import image_hash
+from apis.nft_management.models import Nft
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+
+class Command(BaseCommand):
+    """
+    Computes the missing image hashes of NFTs
+
+    Images are hashed when they are uploaded, run this once to backfill the hashes of
+    existing NFTs.
+    """
+    help = "Hash NFT images"
+
+    def handle(self, *args, **options):
+        pending = list(Nft.objects.filter(image_hash__isnull=True).exclude(image='').values_list('id', flat=True))
+
+        def hash_image(pk):
+            try:
+                image_hash.update(pk)
+                return True
+            except Exception as e:
+                self.stderr.write(f"Nft {pk}: {e}")
+                return False
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=max(getattr(settings, 'IMAGE_VARIANT_WORKERS', 2), 1)) as executor:
+            done = sum(executor.map(hash_image, pending))
+        self.stdout.write(self.style.SUCCESS(f"Hashed the images of {done} of {len(pending)} NFTs"))
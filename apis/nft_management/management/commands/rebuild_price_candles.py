@@ -0,0 +1,43 @@
+from itertools import chain
+
+from apis import archive
+from apis.nft_management.candles import rollup
+from apis.nft_management.models import CollectionPriceCandle, Nft, NftPriceCandle, NftPriceHistory
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the OHLC price candles from NftPriceHistory, archived prices included
+
+    Candles are kept up to date as prices are added, run this once to backfill existing
+    history or after prices were edited or deleted.
+    """
+    help = "Rebuild price candles"
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        prices = NftPriceHistory.objects.filter(date__isnull=False) \
+            .values_list('nft_id', 'nft__collection_id', 'price', 'date').iterator(chunk_size=5000)
+        nft_candles, collection_candles = rollup(chain(prices, archived_prices()))
+
+        NftPriceCandle.objects.all().delete()
+        CollectionPriceCandle.objects.all().delete()
+        NftPriceCandle.objects.bulk_create(nft_candles, batch_size=1000)
+        CollectionPriceCandle.objects.bulk_create(collection_candles, batch_size=1000)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(nft_candles)} NFT and {len(collection_candles)} collection candles"
+        ))
+
+
+def archived_prices():
+    """
+    Yields the archived prices as ``(nft id, collection id, price, date)`` rows
+    """
+    for rows in archive.archived('nft_management.nftpricehistory'):
+        collections = dict(Nft.objects.filter(pk__in={row['nft_id'] for row in rows})
+                           .values_list('id', 'collection_id'))
+        for row in rows:
+            if row['date'] is not None:
+                yield row['nft_id'], collections[row['nft_id']], row['price'], row['date']
@@ -0,0 +1,77 @@
+from apis import archive
+from apis.bidding_and_transection.models import NftTransaction
+from apis.nft_management.models import Collection, CollectionStats, CollectionVolume, Nft
+from apis.nft_management.stats import refresh_collection_windows
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Min, Q, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    """
+    Refreshes the windowed volumes of CollectionStats
+
+    Run periodically (e.g. every few minutes from cron) so 24h and 7d volumes roll over.
+    ``--rebuild`` recomputes every statistic from Nft and NftTransaction, archived
+    transactions included.
+    """
+    help = "Refresh collection statistics"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Recompute all statistics and hourly volumes from scratch')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            self.rebuild()
+        updated = refresh_collection_windows()
+        self.stdout.write(self.style.SUCCESS(f"Refreshed windowed volume of {updated} collections"))
+
+    @transaction.atomic
+    def rebuild(self):
+        items = {
+            row.pop('collection'): row
+            for row in Nft.objects.filter(is_removed=False).values('collection').annotate(
+                floor_price=Min('price', filter=Q(is_hidden=False)),
+                owners_count=Count('owner', distinct=True),
+                items_count=Count('id'),
+            )
+        }
+        volumes = dict(
+            NftTransaction.objects.values('nft__collection').annotate(total=Sum('sold_price'))
+            .values_list('nft__collection', 'total')
+        )
+        hours = {
+            (row['nft__collection'], row['hour']): row
+            for row in NftTransaction.objects.annotate(hour=TruncHour('sold_date'))
+            .values('nft__collection', 'hour').annotate(volume=Sum('sold_price'), sales_count=Count('id'))
+            .iterator()
+        }
+        for rows in archive.archived('bidding_and_transection.nfttransaction'):
+            collections = dict(Nft.objects.filter(pk__in={row['nft_id'] for row in rows})
+                               .values_list('id', 'collection_id'))
+            for row in rows:
+                collection_id = collections[row['nft_id']]
+                volumes[collection_id] = (volumes.get(collection_id) or 0.0) + row['sold_price']
+                hour = timezone.localtime(row['sold_date']).replace(minute=0, second=0, microsecond=0)
+                bucket = hours.setdefault((collection_id, hour), {'nft__collection': collection_id, 'hour': hour,
+                                                                  'volume': 0.0, 'sales_count': 0})
+                bucket['volume'] += row['sold_price']
+                bucket['sales_count'] += 1
+
+        CollectionStats.objects.all().delete()
+        CollectionStats.objects.bulk_create([
+            CollectionStats(collection_id=collection_id, volume_all=volumes.get(collection_id) or 0.0,
+                            **items.get(collection_id, {}))
+            for collection_id in Collection.objects.values_list('id', flat=True).iterator()
+        ], batch_size=1000)
+
+        CollectionVolume.objects.all().delete()
+        CollectionVolume.objects.bulk_create([
+            CollectionVolume(collection_id=row['nft__collection'], hour=row['hour'], volume=row['volume'],
+                             sales_count=row['sales_count'])
+            for row in hours.values()
+        ], batch_size=1000)
+        self.stdout.write(f"Rebuilt statistics of {len(items)} collections with items")
@@ -0,0 +1,33 @@
+from apis import archive
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+
+class Command(BaseCommand):
+    """
+    Inserts back archived rows of a model dated in a range
+
+    Archive files are kept, restoring a range twice does not duplicate rows. Restored
+    rows older than the retention are archived again by the next archive_records run.
+    """
+    help = "Restore archived records"
+
+    def add_arguments(self, parser):
+        parser.add_argument('label', metavar='app_label.model_name',
+                            help=f"Model to restore, among {', '.join(archive.DATE_FIELDS)}")
+        parser.add_argument('--since', help='ISO 8601 date of the first rows to restore')
+        parser.add_argument('--until', help='ISO 8601 date the restored rows are older than')
+
+    def handle(self, *args, **options):
+        if options['label'] not in archive.DATE_FIELDS:
+            raise CommandError(f"Cannot restore {options['label']}")
+        dates = {}
+        for name in ('since', 'until'):
+            value = options[name]
+            dates[name] = value and (parse_datetime(value) or parse_datetime(f'{value}T00:00:00+00:00'))
+            if value and dates[name] is None:
+                raise CommandError(f"--{name} must be an ISO 8601 date")
+            if dates[name] is not None and dates[name].tzinfo is None:
+                raise CommandError(f"--{name} must have a time zone")
+        restored, skipped = archive.restore(options['label'], **dates)
+        self.stdout.write(self.style.SUCCESS(f"Restored {restored} rows, skipped {skipped} rows"))
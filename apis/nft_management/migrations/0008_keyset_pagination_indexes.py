@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nft_management', '0007_alter_category_options_alter_nft_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['created_at', 'id'], name='category_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nft',
+            index=models.Index(fields=['created_at', 'id'], name='nft_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nft',
+            index=models.Index(fields=['price', 'id'], name='nft_price_id_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Min, Q
+
+
+def create_collection_stats(apps, schema_editor):
+    Collection = apps.get_model('nft_management', 'Collection')
+    CollectionStats = apps.get_model('nft_management', 'CollectionStats')
+    Nft = apps.get_model('nft_management', 'Nft')
+    items = {
+        row.pop('collection'): row
+        for row in Nft.objects.filter(is_removed=False).values('collection').annotate(
+            floor_price=Min('price', filter=Q(is_hidden=False)),
+            owners_count=Count('owner', distinct=True),
+            items_count=Count('id'),
+        )
+    }
+    CollectionStats.objects.bulk_create([
+        CollectionStats(collection_id=collection_id, **items.get(collection_id, {}))
+        for collection_id in Collection.objects.values_list('id', flat=True)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nft_management', '0008_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectionStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('floor_price', models.FloatField(blank=True, null=True)),
+                ('volume_24h', models.FloatField(default=0.0)),
+                ('volume_7d', models.FloatField(default=0.0)),
+                ('volume_all', models.FloatField(default=0.0)),
+                ('owners_count', models.IntegerField(default=0)),
+                ('items_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('collection', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='nft_management.collection')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['volume_24h', 'collection'], name='stats_volume_24h_idx'), models.Index(fields=['volume_7d', 'collection'], name='stats_volume_7d_idx'), models.Index(fields=['volume_all', 'collection'], name='stats_volume_all_idx'), models.Index(fields=['items_count', 'collection'], name='stats_items_count_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CollectionVolume',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('volume', models.FloatField(default=0.0)),
+                ('sales_count', models.IntegerField(default=0)),
+                ('collection', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='volume_buckets', to='nft_management.collection')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hour'], name='collection_volume_hour_idx')],
+                'unique_together': {('collection', 'hour')},
+            },
+        ),
+        migrations.RunPython(create_collection_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nft_management', '0009_collection_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nft',
+            name='auction_end_date',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nft_management', '0010_nft_auction_end_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectionPriceCandle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('1h', '1 Hour'), ('1d', '1 Day'), ('1w', '1 Week')], max_length=2)),
+                ('bucket', models.DateTimeField()),
+                ('open', models.FloatField()),
+                ('high', models.FloatField()),
+                ('low', models.FloatField()),
+                ('close', models.FloatField()),
+                ('points', models.IntegerField(default=1)),
+                ('opened_at', models.DateTimeField()),
+                ('closed_at', models.DateTimeField()),
+                ('collection', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_candles', to='nft_management.collection')),
+            ],
+            options={
+                'unique_together': {('collection', 'resolution', 'bucket')},
+            },
+        ),
+        migrations.CreateModel(
+            name='NftPriceCandle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('1h', '1 Hour'), ('1d', '1 Day'), ('1w', '1 Week')], max_length=2)),
+                ('bucket', models.DateTimeField()),
+                ('open', models.FloatField()),
+                ('high', models.FloatField()),
+                ('low', models.FloatField()),
+                ('close', models.FloatField()),
+                ('points', models.IntegerField(default=1)),
+                ('opened_at', models.DateTimeField()),
+                ('closed_at', models.DateTimeField()),
+                ('nft', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_candles', to='nft_management.nft')),
+            ],
+            options={
+                'unique_together': {('nft', 'resolution', 'bucket')},
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:41
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from apis.migration_operations import AddPostgresIndex
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def fill_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for model_name in ('Collection', 'Nft'):
+        apps.get_model('nft_management', model_name).objects.update(
+            search_vector=SearchVector('name', weight='A', config='english')
+            + SearchVector('description', weight='B', config='english')
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nft_management', '0011_price_candles'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='collection',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='nft',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        AddPostgresIndex(
+            model_name='collection',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='collection_search_idx'),
+        ),
+        AddPostgresIndex(
+            model_name='collection',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='collection_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        AddPostgresIndex(
+            model_name='nft',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='nft_search_idx'),
+        ),
+        AddPostgresIndex(
+            model_name='nft',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='nft_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunPython(fill_search_vectors, migrations.RunPython.noop),
+    ]
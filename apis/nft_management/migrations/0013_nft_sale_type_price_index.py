@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nft_management', '0012_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='nft',
+            index=models.Index(fields=['sale_type', 'price'], name='nft_sale_type_price_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nft_management', '0013_nft_sale_type_price_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collection',
+            name='image_variants',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='nft',
+            name='image_variants',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
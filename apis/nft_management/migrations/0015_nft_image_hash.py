@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nft_management', '0014_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nft',
+            name='image_hash',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
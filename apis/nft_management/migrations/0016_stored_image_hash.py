@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nft_management', '0015_nft_image_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredImageHash',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('image_hash', models.BigIntegerField(blank=True, null=True)),
+            ],
+        ),
+    ]
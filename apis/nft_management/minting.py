@@ -0,0 +1,233 @@
+import csv
+import io
+import json
+import time
+from collections import defaultdict, namedtuple
+from itertools import islice
+
+from apis import image_variants, response_cache
+from apis.admin_site_management import counters
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+
+from . import autocomplete, image_hash, search
+from .models import Collection, Nft
+from .serializers import NftManifestRowSerializer
+from .stats import CollectionItem, update_collection_items
+
+FORMATS = ('jsonl', 'csv')
+
+MintResult = namedtuple('MintResult', ['created', 'errors', 'seconds'])
+
+
+class ManifestError(Exception):
+    """
+    Raised when a manifest cannot be read at all
+    """
+
+
+def manifest_format(name, requested=None):
+    """
+    Returns the format of a manifest, given explicitly or guessed from its file name
+    """
+    if requested:
+        if requested not in FORMATS:
+            raise ManifestError(f"format must be one of {', '.join(FORMATS)}")
+        return requested
+    return 'csv' if (name or '').lower().endswith('.csv') else 'jsonl'
+
+
+def read_manifest(file, format):
+    """
+    Yields the rows of a JSON Lines or CSV manifest one at a time
+
+    The file is decoded as it is read, so an upload spooled to disk is never loaded
+    whole. Rows that cannot be parsed are yielded as their error message.
+
+    Parameters
+    ----------
+    file : binary file object
+
+    format : str
+        one of FORMATS
+
+    Returns
+    -------
+    generator
+        ``(row number, dict or error message)`` pairs, rows are numbered from 1
+    """
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='' if format == 'csv' else None)
+    try:
+        if format == 'csv':
+            for number, row in enumerate(csv.DictReader(text), 1):
+                yield number, {key: value for key, value in row.items() if key is not None and value != ''}
+            return
+        number = 0
+        for line in text:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield number, f"Invalid JSON: {e}"
+                continue
+            yield number, row if isinstance(row, dict) else "Row must be a JSON object"
+    except UnicodeDecodeError:
+        raise ManifestError("Manifest must be UTF-8 encoded")
+    finally:
+        text.detach()
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def mint(rows, owner, chunk_size=None):
+    """
+    Creates the NFTs of a manifest for ``owner``
+
+    Rows are validated and inserted by chunks. Per chunk, the unknown collections, the
+    names the owner already uses, the hashes recorded when the rows' images were
+    uploaded and the NFTs of other owners these are copies of are each looked up with a
+    single query, the valid
+    rows are inserted with one ``bulk_create`` and the work the Nft signals would have
+    done row by row (collection statistics, search documents, autocomplete entries,
+    cached responses) is done once. Invalid rows are skipped and reported, the others
+    are created. Images are never read here: those uploaded before hashes were recorded
+    are hashed in the background once minted, like any new image.
+
+    Parameters
+    ----------
+    rows : iterable
+        ``(row number, dict or error message)`` pairs, see ``read_manifest``
+
+    owner : accounts.models.User
+
+    chunk_size : integer
+        rows per chunk, ``NFT_BULK_MINT_CHUNK_SIZE`` by default
+
+    Returns
+    -------
+    MintResult
+        number of created NFTs, ``{'row': ..., 'errors': ...}`` dicts and duration
+    """
+    chunk_size = chunk_size or getattr(settings, 'NFT_BULK_MINT_CHUNK_SIZE', 500)
+    started = time.monotonic()
+    created, errors = 0, []
+    collections = {}
+    names = set()
+    # image name -> recorded hash, None if not an image, looked up once per name
+    hashes, looked_up = {}, set()
+    # built once and reused for every row, as ListSerializer does with its child
+    serializer = NftManifestRowSerializer()
+    for chunk in _chunks(rows, chunk_size):
+        valid = []
+        for number, row in chunk:
+            if isinstance(row, str):
+                errors.append({'row': number, 'errors': {'non_field_errors': [row]}})
+                continue
+            try:
+                valid.append((number, serializer.run_validation(row)))
+            except ValidationError as e:
+                errors.append({'row': number, 'errors': e.detail})
+
+        unknown = {data['collection'] for _, data in valid} - collections.keys()
+        if unknown:
+            found = set(Collection.objects.filter(pk__in=unknown, is_removed=False).values_list('id', flat=True))
+            collections.update((pk, pk in found) for pk in unknown)
+        taken = set(Nft.objects.filter(owner=owner, name__in=[data['name'] for _, data in valid])
+                    .values_list('name', flat=True))
+        images = {data['image'] for _, data in valid}
+        hashes.update(image_hash.stored_hashes(images - looked_up))
+        looked_up |= images
+        copies = image_hash.copies([hashes[image] for image in images if hashes.get(image) is not None], owner.pk)
+
+        nfts, numbers = [], []
+        for number, data in valid:
+            value = hashes.get(data['image'])
+            if not collections[data['collection']]:
+                errors.append({'row': number, 'errors': {'collection': ["Collection does not exist"]}})
+            elif data['name'] in taken or data['name'] in names:
+                errors.append({'row': number, 'errors': {'name': ["You already own a NFT with this name"]}})
+            elif data['image'] in hashes and value is None:
+                errors.append({'row': number, 'errors': {'image': [
+                    "Upload a valid image. The file you uploaded was either not an image or a corrupted image."]}})
+            elif value in copies:
+                errors.append({'row': number, 'errors': {'image': ["This image is already minted as another NFT"],
+                                                         'similar_nfts': copies[value]}})
+            else:
+                names.add(data['name'])
+                collection_id = data.pop('collection')
+                nfts.append(Nft(owner=owner, collection_id=collection_id,
+                                image_hash=None if value is None else image_hash.to_db(value), **data))
+                numbers.append(number)
+        created += _insert(nfts, numbers, errors)
+    return MintResult(created, sorted(errors, key=lambda error: error['row']), time.monotonic() - started)
+
+
+def _insert(nfts, numbers, errors):
+    """
+    Inserts a chunk of NFTs, row by row if a conflicting row was inserted concurrently
+    """
+    if not nfts:
+        return 0
+    try:
+        with transaction.atomic():
+            nfts = Nft.objects.bulk_create(nfts)
+            _after_insert(nfts)
+        return len(nfts)
+    except IntegrityError:
+        pass
+    inserted = []
+    for number, nft in zip(numbers, nfts):
+        nft.pk = None
+        try:
+            with transaction.atomic():
+                Nft.objects.bulk_create([nft])
+            inserted.append(nft)
+        except IntegrityError:
+            errors.append({'row': number, 'errors': {'name': ["You already own a NFT with this name"]}})
+    with transaction.atomic():
+        _after_insert(inserted)
+    return len(inserted)
+
+
+def _after_insert(nfts):
+    """
+    Does for bulk created NFTs what the Nft post_save signals do for saved ones
+    """
+    if not nfts:
+        return
+    items = defaultdict(list)
+    for nft in nfts:
+        items[nft.collection_id].append(CollectionItem(nft.owner_id, nft.price, nft.is_hidden))
+    for collection_id in sorted(items):
+        update_collection_items(collection_id, added=items[collection_id])
+    if search.is_supported():
+        Nft.objects.filter(pk__in=[nft.pk for nft in nfts]).update(search_vector=search.search_vector())
+    if autocomplete.is_built():
+        items = [(nft.pk, nft.name) for nft in nfts if not nft.is_hidden]
+
+        def index():
+            for pk, name in items:
+                autocomplete.get_index().add('nft', pk, name, 0)
+        transaction.on_commit(index)
+    transaction.on_commit(lambda: response_cache.invalidate(Nft))
+    counters.add('nfts', len(nfts))
+    hashed = [(nft.pk, image_hash.from_db(nft.image_hash)) for nft in nfts if nft.image_hash is not None]
+    if hashed and image_hash.is_built():
+        def index_hashes():
+            for pk, value in hashed:
+                image_hash.get_index().add(pk, value)
+        transaction.on_commit(index_hashes)
+    for nft in nfts:
+        image_variants.schedule(Nft, nft.pk, ('image',))
+        if nft.image_hash is None:
+            image_hash.schedule(nft.pk)
@@ -1,4 +1,6 @@
 from accounts.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 
@@ -24,6 +26,9 @@ class Category(models.Model):
 
     class Meta:
         ordering = ('id',)
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='category_created_id_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -42,10 +47,16 @@ class Collection(models.Model):
     category = models.ForeignKey(Category, related_name="collection_category", on_delete=models.CASCADE)
     user = models.ForeignKey(User, related_name="user_collection", on_delete=models.CASCADE)
     is_removed = models.BooleanField(default=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+    image_variants = models.JSONField(null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ('id',)
         unique_together = ('name', 'user',)
+        indexes = [
+            GinIndex(fields=['search_vector'], name='collection_search_idx'),
+            GinIndex(fields=['name'], name='collection_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
 
     def __str__(self):
         return self.name
@@ -70,15 +81,75 @@ class Nft(models.Model):
     owner = models.ForeignKey(User, related_name="nft_owner", on_delete=models.CASCADE)
     total_views = models.IntegerField(default=0)
     price = models.FloatField()
+    auction_end_date = models.DateTimeField(null=True, blank=True, db_index=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+    image_variants = models.JSONField(null=True, blank=True, editable=False)
+    # 64 bits difference hash of the image, see apis.nft_management.image_hash
+    image_hash = models.BigIntegerField(null=True, blank=True, editable=False, db_index=True)
 
     class Meta:
         ordering = ('id',)
         unique_together = ('name', 'owner',)
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='nft_created_id_idx'),
+            models.Index(fields=['price', 'id'], name='nft_price_id_idx'),
+            models.Index(fields=['sale_type', 'price'], name='nft_sale_type_price_idx'),
+            GinIndex(fields=['search_vector'], name='nft_search_idx'),
+            GinIndex(fields=['name'], name='nft_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class CollectionStats(models.Model):
+    """
+    Model for Collection Statistics
+
+    Read model maintained incrementally from Nft and NftTransaction writes
+    """
+    collection = models.OneToOneField(Collection, related_name="stats", on_delete=models.CASCADE)
+    floor_price = models.FloatField(null=True, blank=True)
+    volume_24h = models.FloatField(default=0.0)
+    volume_7d = models.FloatField(default=0.0)
+    volume_all = models.FloatField(default=0.0)
+    owners_count = models.IntegerField(default=0)
+    items_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['volume_24h', 'collection'], name='stats_volume_24h_idx'),
+            models.Index(fields=['volume_7d', 'collection'], name='stats_volume_7d_idx'),
+            models.Index(fields=['volume_all', 'collection'], name='stats_volume_all_idx'),
+            models.Index(fields=['items_count', 'collection'], name='stats_items_count_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.collection}"
+
+
+class CollectionVolume(models.Model):
+    """
+    Model for hourly Collection sales volume
+
+    Windowed volumes in CollectionStats are rebuilt from these buckets
+    """
+    collection = models.ForeignKey(Collection, related_name="volume_buckets", on_delete=models.CASCADE)
+    hour = models.DateTimeField()
+    volume = models.FloatField(default=0.0)
+    sales_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('collection', 'hour',)
+        indexes = [
+            models.Index(fields=['hour'], name='collection_volume_hour_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.collection} : {self.hour}"
+
+
 class NftPriceHistory(models.Model):
     """
     Model for NFT Price History
@@ -92,6 +163,58 @@ class NftPriceHistory(models.Model):
         return f"{self.nft}"
 
 
+class PriceCandle(models.Model):
+    """
+    Abstract model for an OHLC candle of NftPriceHistory prices
+
+    ``opened_at`` and ``closed_at`` are the dates of the first and last price of the
+    bucket, they keep open and close right when prices are inserted out of order.
+    """
+    choices = [
+        ("1h", "1 Hour"),
+        ("1d", "1 Day"),
+        ("1w", "1 Week"),
+    ]
+    resolution = models.CharField(max_length=2, choices=choices)
+    bucket = models.DateTimeField()
+    open = models.FloatField()
+    high = models.FloatField()
+    low = models.FloatField()
+    close = models.FloatField()
+    points = models.IntegerField(default=1)
+    opened_at = models.DateTimeField()
+    closed_at = models.DateTimeField()
+
+    class Meta:
+        abstract = True
+
+
+class NftPriceCandle(PriceCandle):
+    """
+    Model for the price candles of a NFT
+    """
+    nft = models.ForeignKey(Nft, related_name="price_candles", on_delete=models.CASCADE)
+
+    class Meta:
+        unique_together = ('nft', 'resolution', 'bucket',)
+
+    def __str__(self):
+        return f"{self.nft} : {self.resolution} {self.bucket}"
+
+
+class CollectionPriceCandle(PriceCandle):
+    """
+    Model for the price candles of all NFTs of a Collection
+    """
+    collection = models.ForeignKey(Collection, related_name="price_candles", on_delete=models.CASCADE)
+
+    class Meta:
+        unique_together = ('collection', 'resolution', 'bucket',)
+
+    def __str__(self):
+        return f"{self.collection} : {self.resolution} {self.bucket}"
+
+
 class FavouriteNft(models.Model):
     """
     Model for Favourite Nft
@@ -123,3 +246,18 @@ class ReportedNft(models.Model):
 
     def __str__(self):
         return f"{self.nft}:  {self.reporter}"
+
+
+class StoredImageHash(models.Model):
+    """
+    Model for the hash of an uploaded file, recorded when it is stored
+
+    NFTs minted from the name of an uploaded file are checked for copies with it,
+    without reading the file again. Stored names always refer to the same content.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    # see apis.nft_management.image_hash, None if the file is not an image
+    image_hash = models.BigIntegerField(null=True, blank=True)
+
+    def __str__(self):
+        return self.name
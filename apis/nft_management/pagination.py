@@ -0,0 +1,172 @@
+import base64
+import json
+from functools import reduce
+
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over ``(ordering field, id)``
+
+    Every page is fetched with an indexed ``WHERE (field, id) > (value, pk) LIMIT n``
+    query, so the cost of a page does not depend on how deep the client has scrolled.
+    Cursors are opaque, url-safe base64 strings holding the boundary row and the
+    ordering it was taken in, a cursor sent with another ordering is refused.
+
+    NULL values of nullable orderings come after all others in ascending order and
+    before them in descending order, as PostgreSQL sorts them by default, on every
+    database.
+
+    Parameters
+    ----------
+    orderings : tuple or dict
+        field names a client may order by, ``?ordering=-price`` reverses the order.
+        A dict maps the names exposed to clients to model field paths.
+    default_ordering : str
+        ordering used when the client does not send one
+    """
+
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    page_size_query_param = 'page_size'
+    page_size = 20
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+    ordering_mismatch_message = 'The cursor was taken in another ordering, start again without it'
+
+    def __init__(self, orderings=('created_at',), default_ordering='-created_at'):
+        if not isinstance(orderings, dict):
+            orderings = {field: field for field in orderings}
+        self.orderings = orderings
+        self.default_ordering = default_ordering
+
+    @classmethod
+    def is_requested(cls, request):
+        """
+        Returns True if the client asked for a paginated response
+        """
+        return any(param in request.query_params for param in
+                   (cls.cursor_query_param, cls.page_size_query_param))
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, request):
+        """
+        Returns the ordering requested by the client, its model field path and whether
+        it is descending
+        """
+        ordering = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        if ordering.lstrip('-') not in self.orderings:
+            ordering = self.default_ordering
+        return ordering, self.orderings[ordering.lstrip('-')], ordering.startswith('-')
+
+    def encode_cursor(self, row, reverse):
+        payload = {'o': self.ordering, 'v': self._value(row), 'id': row.pk, 'r': reverse}
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            ordering, cursor = payload['o'], (payload['v'], int(payload['id']), bool(payload['r']))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if ordering != self.ordering:
+            raise ValidationError({self.cursor_query_param: [self.ordering_mismatch_message]})
+        return cursor
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering, self.field, self.descending = self.get_ordering(request)
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        # A "previous" cursor walks the index in the opposite direction and the page is
+        # flipped back afterwards.
+        backwards = cursor[2] if cursor else False
+        descending = self.descending != backwards
+        if descending:
+            queryset = queryset.order_by(F(self.field).desc(nulls_first=True), '-id')
+        else:
+            queryset = queryset.order_by(F(self.field).asc(nulls_last=True), 'id')
+
+        if cursor:
+            value, pk, _ = cursor
+            queryset = queryset.filter(self._after(queryset.model, value, pk, descending))
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if backwards:
+            rows.reverse()
+
+        self.has_next = has_more if not backwards else cursor is not None
+        self.has_previous = cursor is not None if not backwards else has_more
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1], False))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[0], True))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def _after(self, model, value, pk, descending):
+        """
+        Returns the condition of the rows coming after ``(value, pk)`` in the walked order
+        """
+        lookup = 'lt' if descending else 'gt'
+        if value is None:
+            # NULLs are the greatest values: last walking up, first walking down
+            after = Q(**{f'{self.field}__isnull': True, f'id__{lookup}': pk})
+            return after | Q(**{f'{self.field}__isnull': False}) if descending else after
+        after = Q(**{f'{self.field}__{lookup}': value}) | Q(**{self.field: value, f'id__{lookup}': pk})
+        if not descending and _nullable(model, self.field):
+            after |= Q(**{f'{self.field}__isnull': True})
+        return after
+
+    def _value(self, row):
+        value = reduce(getattr, self.field.split('__'), row)
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return value
+
+
+def _nullable(model, path):
+    """
+    Returns True if the field at the end of a lookup path may be NULL, through a
+    nullable or reverse relation too
+    """
+    for name in path.split('__'):
+        field = model._meta.get_field(name)
+        if field.null or (field.is_relation and not field.concrete):
+            return True
+        model = field.related_model
+    return False
@@ -0,0 +1,82 @@
+from accounts.models import User
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity, \
+    TrigramWordSimilarity
+from django.db import connection
+from django.db.models import Exists, F, OuterRef, Q, Value
+from django.db.models.functions import Greatest
+
+from .models import Collection, Nft
+
+SEARCH_CONFIG = 'english'
+
+
+def search_vector():
+    """
+    Returns the weighted document of NFTs and collections, name before description
+    """
+    return SearchVector('name', weight='A', config=SEARCH_CONFIG) + \
+        SearchVector('description', weight='B', config=SEARCH_CONFIG)
+
+
+def is_supported():
+    """
+    Returns True if the database supports full-text and trigram search
+    """
+    return connection.vendor == 'postgresql'
+
+
+def update_search_vector(model, pk):
+    """
+    Recomputes the search document of a NFT or collection from its stored columns
+    """
+    if is_supported():
+        model.objects.filter(pk=pk).update(search_vector=search_vector())
+
+
+def _ranked(queryset, query, text):
+    """
+    Matches the full-text document, or a word of the name within trigram distance of the
+    text for typos
+
+    Both conditions are served by GIN indexes, the rank adds the text rank and the
+    name similarity.
+    """
+    return queryset.filter(Q(search_vector=query) | Q(name__trigram_word_similar=text)).annotate(
+        rank=SearchRank(F('search_vector'), query) + TrigramWordSimilarity(text, 'name')
+    ).order_by('-rank', 'id')
+
+
+def search_nfts(text, limit):
+    """
+    Returns the visible NFTs best matching ``text``
+    """
+    queryset = Nft.objects.filter(is_removed=False, is_hidden=False).only('id', 'name', 'image', 'image_variants',
+                                                                         'price', 'collection')
+    if not is_supported():
+        return queryset.filter(name__icontains=text).annotate(rank=Value(0.0)).order_by('-total_views', 'id')[:limit]
+    return _ranked(queryset, SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch'), text)[:limit]
+
+
+def search_collections(text, limit):
+    """
+    Returns the collections best matching ``text``
+    """
+    queryset = Collection.objects.filter(is_removed=False).only('id', 'name', 'logo_image', 'image_variants')
+    if not is_supported():
+        return queryset.filter(name__icontains=text).annotate(rank=Value(0.0)).order_by('id')[:limit]
+    return _ranked(queryset, SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch'), text)[:limit]
+
+
+def search_creators(text, limit):
+    """
+    Returns the users owning a collection whose first or last name is close to ``text``
+    """
+    queryset = User.objects.filter(
+        Exists(Collection.objects.filter(user=OuterRef('pk'), is_removed=False)), is_active=True
+    ).only('id', 'first_name', 'last_name')
+    if not is_supported():
+        return queryset.filter(Q(first_name__icontains=text) | Q(last_name__icontains=text)) \
+            .annotate(rank=Value(0.0)).order_by('id')[:limit]
+    return queryset.filter(Q(first_name__trigram_similar=text) | Q(last_name__trigram_similar=text)).annotate(
+        rank=Greatest(TrigramSimilarity('first_name', text), TrigramSimilarity('last_name', text))
+    ).order_by('-rank', 'id')[:limit]
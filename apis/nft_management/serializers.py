@@ -1,10 +1,52 @@
+from apis import image_variants
+from apis.fieldsets import SparseFieldsetMixin
 from apis.user_management.serializers import UserSerializer
-from rest_framework.serializers import ModelSerializer
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.utils import validate_file_name
+from rest_framework.serializers import CharField, FloatField, IntegerField, ModelSerializer, ValidationError
 
 from .models import *
 
 
-class CategorySerializer(ModelSerializer):
+class EagerLoadingMixin:
+    """
+    Mixin for serializers that read related objects in to_representation
+
+    ``select_related_fields`` lists the relations the serializer touches and
+    ``related_only_fields`` the columns it reads from them, so list views can fetch
+    a page in a single query instead of one extra query per row and relation.
+    """
+
+    select_related_fields = ()
+    related_only_fields = ()
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None, exclude=None):
+        """
+        Returns the queryset joined with the relations needed for serialization
+
+        With a sparse fieldset, only the columns and relations of the selected fields
+        are loaded.
+        """
+        sparse = bool(fields or exclude)
+        if not cls.select_related_fields and not sparse:
+            return queryset
+        excluded = getattr(cls.Meta, 'exclude', ())
+        local_fields = [field for field in queryset.model._meta.concrete_fields if field.name not in excluded]
+        relations = cls.select_related_fields
+        if sparse:
+            selected = SparseFieldsetMixin.select(
+                [field.name for field in local_fields] + list(getattr(cls, 'extra_fields', ())), fields, exclude
+            )
+            local_fields = [field for field in local_fields if field.primary_key or field.name in selected]
+            relations = [relation for relation in relations if relation in selected]
+        if relations:
+            queryset = queryset.select_related(*relations)
+        related_only_fields = [field for field in cls.related_only_fields if field.split('__')[0] in relations]
+        return queryset.only(*[field.attname for field in local_fields], *related_only_fields)
+
+
+class CategorySerializer(SparseFieldsetMixin, ModelSerializer):
     """
     Serializer for Category
     """
@@ -15,24 +57,60 @@ class CategorySerializer(ModelSerializer):
         read_only_fields = ("is_removed", "is_active")
 
 
-class NFTSerializer(ModelSerializer):
+class NFTSerializer(SparseFieldsetMixin, EagerLoadingMixin, ModelSerializer):
     """
     Serializer for NFT
     """
 
+    select_related_fields = ('collection', 'owner')
+    related_only_fields = ('collection__name', 'owner__first_name', 'owner__last_name')
+
     class Meta:
         model = Nft
-        fields = '__all__'
+        exclude = ('search_vector',)
         read_only_fields = (
             "is_hidden", "is_put_on_sale", "updated_at", "is_removed", "created_at", 'total_views', 'sale_type')
 
     def to_representation(self, instance):
         response = super().to_representation(instance)
-        response['collection'] = f"{instance.collection.name}"
-        response['owner'] = f"{instance.owner.first_name} {instance.owner.last_name}"
+        if self.wants('collection'):
+            response['collection'] = f"{instance.collection.name}"
+        if self.wants('owner'):
+            response['owner'] = f"{instance.owner.first_name} {instance.owner.last_name}"
+        if self.wants('image_variants'):
+            response['image_variants'] = image_variants.urls(instance.image_variants)
         return response
 
 
+class NftManifestRowSerializer(ModelSerializer):
+    """
+    Serializer for a row of a bulk mint manifest
+
+    The image is the name of an already uploaded file, relative to the storage of NFT
+    images. Collections and the uniqueness of names are checked for a whole chunk of
+    rows by the bulk mint, not row by row.
+    """
+
+    image = CharField(max_length=100)
+    collection = IntegerField()
+
+    class Meta:
+        model = Nft
+        fields = ('name', 'description', 'image', 'royalty', 'size', 'no_of_copies', 'collection', 'price')
+        validators = []
+
+    def validate_image(self, value):
+        storage = Nft._meta.get_field('image').storage
+        try:
+            validate_file_name(value, allow_relative_path=True)
+            exists = storage.exists(value)
+        except SuspiciousFileOperation:
+            raise ValidationError("Invalid file name")
+        if not exists:
+            raise ValidationError("No file was uploaded with this name")
+        return value
+
+
 class CollectionUserSerializer(ModelSerializer):
     """
     Serializer for  Collection
@@ -42,15 +120,18 @@ class CollectionUserSerializer(ModelSerializer):
 
     class Meta:
         model = Collection
-        fields = "__all__"
+        exclude = ('search_vector',)
         depth = 2
 
 
-class FavouriteNftSerializer(ModelSerializer):
+class FavouriteNftSerializer(SparseFieldsetMixin, EagerLoadingMixin, ModelSerializer):
     """
     Serializer for Favourite NFTs
     """
 
+    select_related_fields = ('nft', 'user')
+    related_only_fields = ('nft__name', 'user__first_name', 'user__last_name')
+
     class Meta:
         model = FavouriteNft
         fields = "__all__"
@@ -58,16 +139,21 @@ class FavouriteNftSerializer(ModelSerializer):
 
     def to_representation(self, instance):
         response = super().to_representation(instance)
-        response["nft"] = f"{instance.nft.name}"
-        response["user"] = f"{instance.user.first_name} {instance.user.last_name}"
+        if self.wants('nft'):
+            response["nft"] = f"{instance.nft.name}"
+        if self.wants('user'):
+            response["user"] = f"{instance.user.first_name} {instance.user.last_name}"
         return response
 
 
-class ReportedNftSerializer(ModelSerializer):
+class ReportedNftSerializer(SparseFieldsetMixin, EagerLoadingMixin, ModelSerializer):
     """
     Serializer for Reported NFTs
     """
 
+    select_related_fields = ('nft', 'reporter')
+    related_only_fields = ('nft__name', 'reporter__first_name', 'reporter__last_name')
+
     class Meta:
         model = ReportedNft
         fields = "__all__"
@@ -75,25 +161,96 @@ class ReportedNftSerializer(ModelSerializer):
 
     def to_representation(self, instance):
         response = super().to_representation(instance)
-        response["nft"] = f"{instance.nft.name}"
-        response[
-            "reporter"
-        ] = f"{instance.reporter.first_name} {instance.reporter.last_name}"
+        if self.wants('nft'):
+            response["nft"] = f"{instance.nft.name}"
+        if self.wants('reporter'):
+            response[
+                "reporter"
+            ] = f"{instance.reporter.first_name} {instance.reporter.last_name}"
         return response
 
 
-class CollectionSerializer(ModelSerializer):
+class CollectionStatsSerializer(ModelSerializer):
+    """
+    Serializer for Collection Statistics
+    """
+
+    class Meta:
+        model = CollectionStats
+        exclude = ('id', 'collection')
+
+
+class CollectionSerializer(SparseFieldsetMixin, EagerLoadingMixin, ModelSerializer):
     """
     Serializer for Collection
     """
 
+    extra_fields = ('stats',)
+    select_related_fields = ('category', 'user', 'stats')
+    related_only_fields = ('category__name', 'user__first_name', 'user__last_name', 'stats__floor_price',
+                           'stats__volume_24h', 'stats__volume_7d', 'stats__volume_all', 'stats__owners_count',
+                           'stats__items_count', 'stats__updated_at')
+
     class Meta:
         model = Collection
-        fields = '__all__'
+        exclude = ('search_vector',)
         read_only_fields = ("is_removed", "created_at", "updated_at")
 
     def to_representation(self, instance):
         response = super().to_representation(instance)
-        response["category"] = f"{instance.category.name}"
-        response["user"] = f"{instance.user.first_name} {instance.user.last_name}"
+        if self.wants('category'):
+            response["category"] = f"{instance.category.name}"
+        if self.wants('user'):
+            response["user"] = f"{instance.user.first_name} {instance.user.last_name}"
+        if self.wants('stats'):
+            stats = getattr(instance, 'stats', None)
+            response["stats"] = CollectionStatsSerializer(stats).data if stats else None
+        if self.wants('image_variants'):
+            response["image_variants"] = image_variants.urls(instance.image_variants)
         return response
+
+
+class NftSearchSerializer(ModelSerializer):
+    """
+    Serializer for NFT search results
+    """
+
+    rank = FloatField(read_only=True)
+
+    class Meta:
+        model = Nft
+        fields = ('id', 'name', 'image', 'image_variants', 'price', 'collection', 'rank')
+
+    def to_representation(self, instance):
+        response = super().to_representation(instance)
+        response['image_variants'] = image_variants.urls(instance.image_variants)
+        return response
+
+
+class CollectionSearchSerializer(ModelSerializer):
+    """
+    Serializer for Collection search results
+    """
+
+    rank = FloatField(read_only=True)
+
+    class Meta:
+        model = Collection
+        fields = ('id', 'name', 'logo_image', 'image_variants', 'rank')
+
+    def to_representation(self, instance):
+        response = super().to_representation(instance)
+        response['image_variants'] = image_variants.urls(instance.image_variants)
+        return response
+
+
+class CreatorSearchSerializer(ModelSerializer):
+    """
+    Serializer for creator search results
+    """
+
+    rank = FloatField(read_only=True)
+
+    class Meta:
+        model = User
+        fields = ('id', 'first_name', 'last_name', 'rank')
@@ -0,0 +1,188 @@
+from apis import events, image_variants, response_cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from NFT_Marketplace.storage import file_stored
+
+from . import autocomplete, image_hash
+from .candles import record_price
+from .models import Category, Collection, CollectionStats, Nft, NftPriceHistory
+from .search import update_search_vector
+from .stats import CollectionItem, update_collection_items
+
+COLLECTION_ITEM_FIELDS = ('collection_id', 'owner_id', 'price', 'is_hidden', 'is_removed')
+
+
+@receiver(post_save, sender=Collection)
+def create_collection_stats(sender, instance, created, **kwargs):
+    """
+    Creates the statistics row of a new collection
+    """
+    if created:
+        CollectionStats.objects.get_or_create(collection=instance)
+
+
+@receiver(post_save, sender=Nft)
+def update_collection_stats(sender, instance, created, **kwargs):
+    """
+    Applies a new NFT, or a change of the collection, owner, price or visibility of an
+    NFT, soft deletes included, to the statistics of the collections it left and joined
+    """
+    previous = getattr(instance, '_previous_item', None)
+    if not created and previous is None:
+        # none of these fields were saved
+        return
+    before = None if created else _collection_item(previous)
+    after = _collection_item({field: getattr(instance, field) for field in COLLECTION_ITEM_FIELDS})
+    if before == after:
+        return
+    if before is not None and after is not None and before[0] == after[0]:
+        update_collection_items(after[0], added=[after[1]], removed=[before[1]])
+        return
+    if before is not None:
+        update_collection_items(before[0], removed=[before[1]])
+    if after is not None:
+        update_collection_items(after[0], added=[after[1]])
+
+
+@receiver(post_delete, sender=Nft)
+def remove_from_collection_stats(sender, instance, **kwargs):
+    """
+    Removes a deleted NFT from the statistics of its collection
+    """
+    item = _collection_item({field: getattr(instance, field) for field in COLLECTION_ITEM_FIELDS})
+    if item is not None:
+        update_collection_items(item[0], removed=[item[1]])
+
+
+def _collection_item(values):
+    """
+    Returns the collection id and CollectionItem an NFT counts as in the collection
+    statistics, None for a removed NFT
+    """
+    if values['is_removed']:
+        return None
+    return values['collection_id'], CollectionItem(values['owner_id'], values['price'], values['is_hidden'])
+
+
+@receiver(pre_save, sender=Nft)
+def remember_previous_values(sender, instance, update_fields=None, **kwargs):
+    """
+    Keeps the stored price and image of an NFT about to be saved, to detect their
+    changes, and the stored values its collection statistics depend on
+    """
+    instance._previous_price = instance._previous_image = instance._previous_item = None
+    fields = [field for field, names in (('price', {'price'}), ('image', {'image'}),
+                                         ('collection_id', {'collection', 'collection_id'}),
+                                         ('owner_id', {'owner', 'owner_id'}), ('is_hidden', {'is_hidden'}),
+                                         ('is_removed', {'is_removed'}))
+              if update_fields is None or names & set(update_fields)]
+    if instance.pk and fields:
+        previous = Nft.objects.filter(pk=instance.pk).values(*fields).first() or {}
+        instance._previous_price = previous.get('price')
+        instance._previous_image = previous.get('image')
+        if previous and set(COLLECTION_ITEM_FIELDS) & set(fields):
+            # fields left out of update_fields keep their stored value
+            instance._previous_item = {field: previous.get(field, getattr(instance, field))
+                                       for field in COLLECTION_ITEM_FIELDS}
+
+
+@receiver(post_save, sender=Nft)
+def publish_price_change(sender, instance, created, **kwargs):
+    """
+    Publishes a price.changed event when the price of an existing NFT changes
+    """
+    previous = getattr(instance, '_previous_price', None)
+    if not created and previous is not None and previous != instance.price:
+        events.publish('price.changed', instance.pk, instance.collection_id,
+                       {'old_price': previous, 'price': instance.price})
+
+
+@receiver(post_save, sender=Nft)
+def update_image_hash(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    Hashes the image of an NFT in the background when it is uploaded or replaced
+    """
+    if raw or not instance.image.name or (update_fields is not None and 'image' not in update_fields):
+        return
+    if created and instance.image_hash is not None:
+        # hashed by the view, while checking it for copies
+        if image_hash.is_built():
+            pk, value = instance.pk, image_hash.from_db(instance.image_hash)
+            transaction.on_commit(lambda: image_hash.get_index().add(pk, value))
+        return
+    if created or instance._previous_image != instance.image.name:
+        image_hash.schedule(instance.pk)
+
+
+@receiver(file_stored)
+def record_image_hash(sender, name, content, **kwargs):
+    """
+    Hashes uploaded images once, when they are stored
+    """
+    image_hash.record(name, content)
+
+
+@receiver(post_save, sender=NftPriceHistory)
+def update_price_candles(sender, instance, created, **kwargs):
+    """
+    Adds a new price to the candles of its NFT and collection
+    """
+    if created:
+        record_price(instance.nft_id, instance.nft.collection_id, instance.price, instance.date)
+
+
+@receiver(post_save, sender=Nft)
+@receiver(post_save, sender=Collection)
+def update_search_document(sender, instance, update_fields=None, **kwargs):
+    """
+    Keeps the full-text search document of NFTs and collections in sync with their text
+    """
+    if update_fields is None or {'name', 'description'} & set(update_fields):
+        update_search_vector(sender, instance.pk)
+
+
+@receiver(post_save, sender=Nft)
+@receiver(post_save, sender=Collection)
+@receiver(post_save, sender=Category)
+def update_autocomplete(sender, instance, **kwargs):
+    """
+    Adds, renames or drops the entry of a saved NFT, collection or category in the
+    autocomplete index of this process once the change is committed
+    """
+    if not autocomplete.is_built():
+        return
+    kind = autocomplete.KIND_OF_MODEL[sender]
+    hidden = instance.is_removed or getattr(instance, 'is_hidden', False) or not getattr(instance, 'is_active', True)
+    if hidden:
+        transaction.on_commit(lambda: autocomplete.get_index().remove(kind, instance.pk))
+    else:
+        weight = instance.total_views if sender is Nft else None
+        transaction.on_commit(lambda: autocomplete.get_index().add(kind, instance.pk, instance.name, weight))
+
+
+@receiver(post_delete, sender=Nft)
+@receiver(post_delete, sender=Collection)
+@receiver(post_delete, sender=Category)
+def remove_from_autocomplete(sender, instance, **kwargs):
+    """
+    Drops the entry of a deleted NFT, collection or category from the autocomplete index
+    """
+    if autocomplete.is_built():
+        kind, pk = autocomplete.KIND_OF_MODEL[sender], instance.pk
+        transaction.on_commit(lambda: autocomplete.get_index().remove(kind, pk))
+
+
+@receiver(post_delete, sender=Nft)
+def remove_from_image_hash_index(sender, instance, **kwargs):
+    """
+    Drops a deleted NFT from the image hash index of this process
+    """
+    if image_hash.is_built():
+        pk = instance.pk
+        transaction.on_commit(lambda: image_hash.get_index().remove(pk))
+
+
+response_cache.track(Category, Collection, CollectionStats, Nft)
+image_variants.track(Nft, 'image')
+image_variants.track(Collection, 'logo_image', 'banner_image')
@@ -0,0 +1,140 @@
+from collections import Counter, namedtuple
+from datetime import timedelta
+
+from apis.response_cache import invalidate
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Min, Q, Subquery, Sum, Value, When
+from django.utils import timezone
+
+from .models import CollectionStats, CollectionVolume, Nft
+
+VOLUME_WINDOWS = {
+    'volume_24h': timedelta(hours=24),
+    'volume_7d': timedelta(days=7),
+}
+
+
+CollectionItem = namedtuple('CollectionItem', ['owner_id', 'price', 'is_hidden'])
+
+
+def update_collection_items(collection_id, added=(), removed=()):
+    """
+    Applies NFTs joining or leaving a collection to its floor price, owner and item counts
+
+    The counts are adjusted in place instead of aggregating the whole collection. Owners
+    are only looked up when their number of items changes, and the floor price is only
+    recomputed, from the visible NFTs of the collection, when an item priced at the
+    floor leaves it. Call once the change is written, with the NFTs that are not removed.
+    A price change is the NFT leaving with its old price and joining with the new one.
+    The statistics row is created with the collection, it is only updated here so NFTs
+    deleted along with their collection do not recreate it. ``refresh_collection_stats
+    --rebuild`` recomputes everything from scratch.
+
+    Parameters
+    ----------
+    collection_id : integer
+
+    added : list of CollectionItem
+        NFTs now counted in the collection
+
+    removed : list of CollectionItem
+        NFTs no longer counted in the collection, as they were
+    """
+    if not added and not removed:
+        return
+    changes = {}
+    if len(added) != len(removed):
+        changes['items_count'] = F('items_count') + len(added) - len(removed)
+
+    owners = Counter(item.owner_id for item in added)
+    owners.subtract(item.owner_id for item in removed)
+    owners = {owner_id: change for owner_id, change in owners.items() if change}
+    if owners:
+        held = dict(Nft.objects.filter(collection_id=collection_id, is_removed=False, owner_id__in=owners)
+                    .order_by().values('owner').annotate(count=Count('id')).values_list('owner', 'count'))
+        joined = sum(1 for owner_id, change in owners.items() if change > 0 and held.get(owner_id, 0) == change)
+        left = sum(1 for owner_id, change in owners.items() if change < 0 and not held.get(owner_id))
+        if joined != left:
+            changes['owners_count'] = F('owners_count') + joined - left
+
+    listed = [item.price for item in added if not item.is_hidden]
+    if listed:
+        lowest = min(listed)
+        changes['floor_price'] = Case(When(Q(floor_price__isnull=True) | Q(floor_price__gt=lowest),
+                                           then=Value(lowest, output_field=FloatField())), default=F('floor_price'))
+    stats = CollectionStats.objects.filter(collection_id=collection_id)
+    stats.update(updated_at=timezone.now(), **changes)
+
+    unlisted = [item.price for item in removed if not item.is_hidden]
+    if unlisted:
+        # nothing is listed below the floor, a leaving price at least as low was the floor
+        floor = Nft.objects.filter(collection_id=collection_id, is_removed=False, is_hidden=False) \
+            .order_by().values('collection').annotate(floor=Min('price')).values('floor')
+        stats.filter(floor_price__gte=min(unlisted)).update(floor_price=Subquery(floor))
+
+
+def record_collection_sale(collection_id, amount, sold_at):
+    """
+    Adds a sale to the collection volumes
+
+    Parameters
+    ----------
+    collection_id : integer
+
+    amount : float
+
+    sold_at : datetime
+    """
+    hour = sold_at.replace(minute=0, second=0, microsecond=0)
+    with transaction.atomic():
+        bucket, created = CollectionVolume.objects.get_or_create(
+            collection_id=collection_id, hour=hour, defaults={'volume': amount, 'sales_count': 1}
+        )
+        if not created:
+            CollectionVolume.objects.filter(pk=bucket.pk).update(volume=F('volume') + amount,
+                                                                 sales_count=F('sales_count') + 1)
+
+        CollectionStats.objects.get_or_create(collection_id=collection_id)
+        increments = {'volume_all': F('volume_all') + amount}
+        for field, window in VOLUME_WINDOWS.items():
+            if sold_at >= timezone.now() - window:
+                increments[field] = F(field) + amount
+        CollectionStats.objects.filter(collection_id=collection_id).update(updated_at=timezone.now(), **increments)
+
+
+def refresh_collection_windows():
+    """
+    Rolls expired hourly buckets out of the windowed volumes
+
+    Sales are added to every window when they happen, this drops them again once they
+    are older than the window. Meant to be run periodically.
+
+    Returns
+    -------
+    integer
+        number of collections whose windowed volume was updated
+    """
+    now = timezone.now()
+    oldest = now - max(VOLUME_WINDOWS.values())
+    volumes = CollectionVolume.objects.filter(hour__gte=oldest).values('collection').annotate(**{
+        field: Sum('volume', filter=Q(hour__gte=now - window)) for field, window in VOLUME_WINDOWS.items()
+    })
+
+    updated = 0
+    seen = []
+    with transaction.atomic():
+        for row in volumes:
+            collection_id = row.pop('collection')
+            seen.append(collection_id)
+            updated += CollectionStats.objects.filter(collection_id=collection_id).update(
+                updated_at=now, **{field: value or 0.0 for field, value in row.items()}
+            )
+        stale = Q()
+        for field in VOLUME_WINDOWS:
+            stale |= Q(**{f'{field}__gt': 0})
+        updated += CollectionStats.objects.filter(stale).exclude(collection_id__in=seen).update(
+            updated_at=now, **{field: 0.0 for field in VOLUME_WINDOWS}
+        )
+    if updated:
+        invalidate(CollectionStats)
+    return updated
@@ -1,3 +1,900 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock, skipUnless
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from accounts.models import User
+from apis import archive, image_variants
+from apis.bidding_and_transection.models import NftTransaction, SellerLeaderboard
+from apis.renderers import FastJSONRenderer
+from apis.wallet_management.models import Wallet
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from . import autocomplete, candles, image_hash, minting, search, view_counter
+from .facets import facet_counts
+from .pagination import KeysetPagination
+from .serializers import NFTSerializer
+from .models import (Category, Collection, CollectionPriceCandle, CollectionStats, CollectionVolume, Nft, FavouriteNft,
+                     NftPriceCandle, NftPriceHistory, ReportedNft, StoredImageHash)
+
+
+# never the shared cache of a deployment, whose entries would outlive the test
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ListQueryBudgetTest(TestCase):
+    """
+    The number of queries issued by a list endpoint must not grow with the number of rows
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser('admin@example.com', 'Admin', 'User', 'password')
+        self.client.force_authenticate(self.admin)
+        self.wallet = Wallet.objects.create(user=self.admin, wallet_address='address')
+        cache.clear()
+
+    def create_rows(self, count):
+        start = Nft.objects.count()
+        for i in range(start, start + count):
+            user = User.objects.create_user(f'user{i}@example.com', f'First{i}', f'Last{i}', 'password')
+            category = Category.objects.create(name=f'category {i}')
+            collection = Collection.objects.create(name=f'collection {i}', logo_image='logo.png',
+                                                   banner_image='banner.png', category=category, user=user)
+            nft = Nft.objects.create(name=f'nft {i}', description='description', image='nft.png',
+                                     sale_type='is_put_on_sale', collection=collection, owner=user, price=i)
+            FavouriteNft.objects.create(user=self.admin, nft=nft)
+            ReportedNft.objects.create(nft=nft, reporter=user, report_type='fake')
+            NftTransaction.objects.create(buyer=self.admin, seller=user, nft=nft, wallet=self.wallet, sold_price=i)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def assertQueryBudget(self, url):
+        self.create_rows(2)
+        small = self.count_queries(url)
+        self.create_rows(10)
+        large = self.count_queries(url)
+        self.assertEqual(small, large, f"{url} issues more queries as rows are added")
+
+    def test_nft_list(self):
+        self.assertQueryBudget(reverse('nft-list'))
+
+    def test_nft_list_page(self):
+        self.assertQueryBudget(reverse('nft-list') + '?page_size=50&ordering=-price')
+
+    def test_nft_list_facets(self):
+        self.assertQueryBudget(reverse('nft-list') + '?page_size=50&facets&min_price=1')
+
+    def test_collection_list(self):
+        self.assertQueryBudget(reverse('collection-list'))
+
+    def test_collection_list_page(self):
+        self.assertQueryBudget(reverse('collection-list') + '?page_size=50')
+
+    def test_category_list(self):
+        self.assertQueryBudget(reverse('category-list'))
+
+    def test_favourite_nft_list(self):
+        self.assertQueryBudget(reverse('favourites-nft'))
+
+    def test_reported_nft_list(self):
+        self.assertQueryBudget(reverse('reported-nft-list'))
+
+    def test_top_sellers(self):
+        self.assertQueryBudget(reverse('top-sellers'))
+
+
+class KeysetPaginationTest(TestCase):
+    """
+    Following next then previous links visits every row once, in order, ties and NULLs
+    included
+    """
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user('owner@example.com', 'Owner', 'User', 'password')
+        category = Category.objects.create(name='category')
+        collection = Collection.objects.create(name='collection', logo_image='logo.png', banner_image='banner.png',
+                                               category=category, user=user)
+        now = timezone.now()
+        for i, (price, days) in enumerate([(5, 3), (5, None), (5, 1), (1, None), (9, 3), (9, 2), (3, None)]):
+            Nft.objects.create(name=f'nft {i}', description='description', image='nft.png',
+                               sale_type='is_put_on_sale', collection=collection, owner=user, price=price,
+                               auction_end_date=None if days is None else now + timedelta(days=days))
+
+    def walk(self, url):
+        """
+        Returns the ids of the pages reached through the next links, then through the
+        previous links back from the last page
+        """
+        client = APIClient()
+        pages = []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['id'] for row in response.data['results']])
+            url = response.data['next']
+        forward = pages
+        url, pages = response.data['previous'], [pages[-1]]
+        while url:
+            response = client.get(url)
+            pages.insert(0, [row['id'] for row in response.data['results']])
+            url = response.data['previous']
+        return forward, pages
+
+    def test_ties(self):
+        for ordering in ('price', '-price'):
+            expected = list(
+                Nft.objects.order_by(ordering, ordering.replace('price', 'id')).values_list('id', flat=True))
+            forward, backward = self.walk(f'/api/nft_list/?page_size=2&ordering={ordering}')
+            self.assertEqual([pk for page in forward for pk in page], expected)
+            self.assertEqual(backward, forward)
+            self.assertEqual([len(page) for page in forward], [2, 2, 2, 1])
+
+    def test_nullable_ordering(self):
+        rows = list(Nft.objects.values_list('auction_end_date', 'id'))
+        ascending = [pk for _, pk in sorted(rows, key=lambda row: (row[0] is None, row[0] or timezone.now(), row[1]))]
+        request = APIRequestFactory().get
+        for ordering, expected in (('auction_end_date', ascending), ('-auction_end_date', ascending[::-1])):
+            paginator = KeysetPagination(orderings=('auction_end_date',), default_ordering=ordering)
+            ids, params = [], {'page_size': 3}
+            while True:
+                page = paginator.paginate_queryset(Nft.objects.all(), Request(request('/', params)))
+                ids.extend(nft.id for nft in page)
+                link = paginator.get_next_link()
+                if link is None:
+                    break
+                params['cursor'] = parse_qs(urlparse(link).query)['cursor'][0]
+            self.assertEqual(ids, expected)
+            # and back from the last page
+            params['cursor'] = parse_qs(urlparse(paginator.get_previous_link()).query)['cursor'][0]
+            page = paginator.paginate_queryset(Nft.objects.all(), Request(request('/', params)))
+            self.assertEqual([nft.id for nft in page], expected[3:6])
+
+    def test_cursor_of_another_ordering(self):
+        client = APIClient()
+        cursor = parse_qs(urlparse(client.get('/api/nft_list/?page_size=2&ordering=price').data['next']).query)
+        response = client.get(
+            '/api/nft_list/', {'page_size': 2, 'ordering': '-created_at', 'cursor': cursor['cursor'][0]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cursor', response.data)
+        self.assertEqual(client.get('/api/nft_list/', {'cursor': 'garbage'}).status_code, 404)
+
+
+class CollectionStatsTest(TestCase):
+    """
+    The statistics of a collection follow its NFTs without aggregating the collection
+    """
+
+    def setUp(self):
+        for module in (image_variants, image_hash):
+            patcher = mock.patch.object(module, 'schedule')
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.users = [User.objects.create_user(f'user{i}@example.com', f'First{i}', f'Last{i}', 'password')
+                      for i in range(3)]
+        category = Category.objects.create(name='category')
+        self.collections = [Collection.objects.create(name=f'collection {i}', logo_image='logo.png',
+                                                      banner_image='banner.png', category=category,
+                                                      user=self.users[0])
+                            for i in range(2)]
+
+    def create(self, name, owner, price, collection=0, **kwargs):
+        return Nft.objects.create(name=name, description='description', image='nft.png', sale_type='is_put_on_sale',
+                                  collection=self.collections[collection], owner=self.users[owner], price=price,
+                                  **kwargs)
+
+    def assertStats(self):
+        for collection in self.collections:
+            nfts = Nft.objects.filter(collection=collection, is_removed=False)
+            expected = {
+                'floor_price': min((nft.price for nft in nfts if not nft.is_hidden), default=None),
+                'owners_count': len({nft.owner_id for nft in nfts}),
+                'items_count': len(nfts),
+            }
+            stats = CollectionStats.objects.filter(collection=collection).values(*expected).get()
+            self.assertEqual(stats, expected, collection.name)
+
+    def test_incremental(self):
+        first = self.create('first', 0, 5)
+        second = self.create('second', 0, 3)
+        hidden = self.create('hidden', 1, 1, is_hidden=True)
+        self.assertStats()
+        second.price = 8
+        second.save(update_fields=['price'])
+        self.assertStats()
+        first.price = 2
+        first.save()
+        self.assertStats()
+        first.owner = self.users[2]
+        first.save(update_fields=['owner'])
+        self.assertStats()
+        hidden.is_hidden = False
+        hidden.save()
+        self.assertStats()
+        hidden.collection = self.collections[1]
+        hidden.save(update_fields=['collection'])
+        self.assertStats()
+        first.is_removed = True
+        first.save()
+        self.assertStats()
+        second.delete()
+        self.assertStats()
+        with CaptureQueriesContext(connection) as context:
+            hidden.total_views = 10
+            hidden.save(update_fields=['total_views'])
+        self.assertEqual(len(context), 1)
+
+    def test_bulk_mint(self):
+        self.create('existing', 1, 4)
+        nfts = Nft.objects.bulk_create([
+            Nft(name=f'minted {i}', description='description', image='nft.png', sale_type='is_put_on_sale',
+                collection=self.collections[i % 2], owner=self.users[i % 3], price=i + 1, is_hidden=i == 0)
+            for i in range(6)
+        ])
+        minting._after_insert(nfts)
+        self.assertStats()
+
+
+class PriceCandlesTest(TestCase):
+    """
+    Candles are kept from prices added in any order and read at a resolution fitting
+    the number of points asked for
+    """
+
+    def setUp(self):
+        for module in (image_variants, image_hash):
+            patcher = mock.patch.object(module, 'schedule')
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        owner = User.objects.create_user('owner@example.com', 'Owner', 'User', 'password')
+        category = Category.objects.create(name='category')
+        self.collection = Collection.objects.create(name='collection', logo_image='logo.png',
+                                                    banner_image='banner.png', category=category, user=owner)
+        self.nfts = [Nft.objects.create(name=f'nft {i}', description='description', image='nft.png',
+                                        sale_type='is_put_on_sale', collection=self.collection, owner=owner, price=1)
+                     for i in range(2)]
+        self.start = datetime(2024, 1, 1, 10, tzinfo=dt_timezone.utc)
+
+    def record(self, prices):
+        for nft, price, at in prices:
+            candles.record_price(nft.pk, self.collection.pk, price, at)
+
+    def stored(self, model):
+        return sorted(model.objects.values_list('resolution', 'bucket', 'open', 'high', 'low', 'close', 'points'))
+
+    def test_out_of_order(self):
+        first, second = self.nfts
+        prices = [(first, 5, self.start + timedelta(minutes=45)), (first, 3, self.start + timedelta(minutes=15)),
+                  (first, 8, self.start + timedelta(minutes=30)), (second, 1, self.start + timedelta(minutes=50)),
+                  (first, 6, self.start + timedelta(minutes=70))]
+        self.record(prices)
+        self.assertEqual(
+            NftPriceCandle.objects.filter(nft=first, resolution='1h')
+            .values_list('bucket', 'open', 'high', 'low', 'close', 'points').order_by('bucket')[0],
+            (self.start, 3, 8, 3, 5, 3)
+        )
+        self.assertEqual(
+            CollectionPriceCandle.objects.filter(resolution='1d').values_list('open', 'high', 'low', 'close', 'points')
+            .get(), (3, 8, 1, 6, 5)
+        )
+        # the rebuild computes the same candles
+        nft_candles, collection_candles = candles.rollup(
+            (nft.pk, self.collection.pk, price, at) for nft, price, at in prices)
+        self.assertEqual(len(nft_candles), NftPriceCandle.objects.count())
+        for model, rolled_up in ((NftPriceCandle, nft_candles), (CollectionPriceCandle, collection_candles)):
+            self.assertEqual(self.stored(model), sorted(
+                (candle.resolution, candle.bucket, candle.open, candle.high, candle.low, candle.close, candle.points)
+                for candle in rolled_up))
+
+    def test_coarser_resolution(self):
+        # every 6 hours for 10 days, the first week starting on Monday 2024-01-01
+        prices = [(self.nfts[0], i, self.start + timedelta(hours=6 * i)) for i in range(40)]
+        self.record(prices)
+        scope = {'nft_id': self.nfts[0].pk}
+        resolution, data = candles.get_candles(NftPriceCandle, scope, '1h', None, None, 40)
+        self.assertEqual((resolution, len(data)), ('1h', 40))
+        resolution, data = candles.get_candles(NftPriceCandle, scope, '1h', None, None, 20)
+        self.assertEqual((resolution, len(data)), ('1d', 11))
+        resolution, data = candles.get_candles(NftPriceCandle, scope, '1h', None, None, 5)
+        self.assertEqual((resolution, len(data)), ('1w', 2))
+        # past weekly candles, weeks are merged
+        resolution, data = candles.get_candles(NftPriceCandle, scope, '1d', None, None, 1)
+        self.assertEqual(resolution, '1w')
+        self.assertEqual([(candle['open'], candle['high'], candle['low'], candle['close'], candle['points'])
+                          for candle in data], [(0, 39, 0, 39, 40)])
+        resolution, data = candles.get_candles(NftPriceCandle, scope, '1d', self.start + timedelta(days=2),
+                                               self.start + timedelta(days=4), 10)
+        self.assertEqual([candle['time'] for candle in data],
+                         ['2024-01-03T00:00:00+00:00', '2024-01-04T00:00:00+00:00', '2024-01-05T00:00:00+00:00'])
+
+    def test_price_candles_view(self):
+        nft = self.nfts[0]
+        self.record([(nft, 2, self.start + timedelta(minutes=5)), (nft, 4, self.start + timedelta(hours=1))])
+        NftPriceHistory.objects.create(nft=nft, price=7, is_active=True)
+        client = APIClient()
+        url = reverse('nft-price-candles', args=[nft.pk])
+        response = client.get(url, {'resolution': '1h', 'start': '2024-01-01T10:00:00Z', 'end': '2024-01-01T11:00:00Z'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['candles'], [{'time': '2024-01-01T10:00:00+00:00', 'open': 2, 'high': 2,
+                                                     'low': 2, 'close': 2, 'points': 1}])
+        response = client.get(url, {'resolution': '1w'})
+        self.assertEqual([candle['close'] for candle in response.data['candles']], [4, 7])
+        self.assertEqual(client.get(url, {'resolution': '1m'}).status_code, 400)
+        self.assertEqual(client.get(reverse('nft-price-candles', args=[0])).status_code, 404)
+
+
+class SearchTest(TestCase):
+    """
+    Search finds visible NFTs, collections and their creators, best match first
+    """
+
+    def setUp(self):
+        for module in (image_variants, image_hash):
+            patcher = mock.patch.object(module, 'schedule')
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.creator = User.objects.create_user('creator@example.com', 'Dragomir', 'Smith', 'password')
+        User.objects.create_user('other@example.com', 'Dragon', 'Without Collections', 'password')
+        category = Category.objects.create(name='category')
+        self.collection = Collection.objects.create(name='Dragon Lair', logo_image='logo.png',
+                                                    banner_image='banner.png', category=category, user=self.creator)
+        Collection.objects.create(name='Dragon Removed', logo_image='logo.png', banner_image='banner.png',
+                                  category=category, user=self.creator, is_removed=True)
+        self.nfts = {}
+        for name, description, hidden in (('Red Dragon', 'breathes fire', False),
+                                          ('Sleeping Knight', 'guards a dragon egg', False),
+                                          ('Hidden Dragon', 'not listed', True),
+                                          ('Blue Whale', 'swims', False)):
+            self.nfts[name] = Nft.objects.create(name=name, description=description, image='nft.png',
+                                                 sale_type='is_put_on_sale', collection=self.collection,
+                                                 owner=self.creator, price=1, is_hidden=hidden).pk
+
+    def results(self, **params):
+        response = APIClient().get(reverse('search'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_search(self):
+        data = self.results(q='drag')
+        self.assertIn(self.nfts['Red Dragon'], [nft['id'] for nft in data['nfts']])
+        self.assertNotIn(self.nfts['Hidden Dragon'], [nft['id'] for nft in data['nfts']])
+        self.assertEqual([collection['id'] for collection in data['collections']], [self.collection.pk])
+        self.assertEqual([creator['id'] for creator in data['creators']], [self.creator.pk])
+        self.assertEqual(list(self.results(q='dragon', type='collections')), ['collections'])
+
+    def test_invalid(self):
+        client = APIClient()
+        self.assertEqual(client.get(reverse('search'), {'q': 'd'}).status_code, 400)
+        self.assertEqual(client.get(reverse('search'), {'q': 'dragon', 'type': 'wallets'}).status_code, 400)
+        self.assertEqual(client.get(reverse('search'), {'q': 'dragon', 'limit': 'all'}).status_code, 400)
+
+    @skipUnless(search.is_supported(), "full-text and trigram search need PostgreSQL")
+    def test_ranked(self):
+        # the name before the description, and names within a typo
+        data = self.results(q='dragon', type='nfts')
+        self.assertEqual([nft['id'] for nft in data['nfts']], [self.nfts['Red Dragon'], self.nfts['Sleeping Knight']])
+        data = self.results(q='dragn', type='nfts')
+        self.assertEqual([nft['id'] for nft in data['nfts']][:1], [self.nfts['Red Dragon']])
+        data = self.results(q='Dragomyr', type='creators')
+        self.assertEqual([creator['id'] for creator in data['creators']], [self.creator.pk])
+
+
+class AutocompleteTest(TestCase):
+    """
+    Names are completed from the beginning of any of their words, heaviest first, from
+    an index kept in sync with writes
+    """
+
+    def complete(self, index, prefix, **kwargs):
+        return [(result['type'], result['id']) for result in index.complete(prefix, **kwargs)]
+
+    def test_prefix_index(self):
+        index = autocomplete.PrefixIndex()
+        index.build([('nft', 1, 'Red Dragon Egg', 5), ('nft', 2, 'Dragonfly', 50), ('nft', 3, 'Blue Whale', 100),
+                     ('collection', 1, 'Dragons', 20), ('category', 1, 'Art', 0)])
+        self.assertEqual(self.complete(index, 'DRA'), [('nft', 2), ('collection', 1), ('nft', 1)])
+        self.assertEqual(self.complete(index, 'egg'), [('nft', 1)])
+        self.assertEqual(self.complete(index, 'red  dragon'), [('nft', 1)])
+        self.assertEqual(self.complete(index, 'dra', limit=1), [('nft', 2)])
+        self.assertEqual(self.complete(index, 'dra', kinds=('collection',)), [('collection', 1)])
+        self.assertEqual(self.complete(index, ' '), [])
+        index.add('nft', 2, 'Firefly')
+        index.add('nft', 4, 'Dragon King', 30)
+        index.remove('collection', 1)
+        self.assertEqual(self.complete(index, 'dra'), [('nft', 4), ('nft', 1)])
+        self.assertEqual(self.complete(index, 'fire'), [('nft', 2)])
+        # short prefixes matching many names walk the names heaviest first instead
+        index.scan_limit = 0
+        self.assertEqual(self.complete(index, 'dra'), [('nft', 4), ('nft', 1)])
+        index.add('nft', 5, 'Drake', 1000)
+        self.assertEqual(self.complete(index, 'dra'), [('nft', 5), ('nft', 4), ('nft', 1)])
+
+    def test_follows_writes(self):
+        for module in (image_variants, image_hash):
+            patcher = mock.patch.object(module, 'schedule')
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(autocomplete, '_index', autocomplete.PrefixIndex())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        owner = User.objects.create_user('owner@example.com', 'Owner', 'User', 'password')
+        category = Category.objects.create(name='Dragon Art')
+        collection = Collection.objects.create(name='collection', logo_image='logo.png', banner_image='banner.png',
+                                               category=category, user=owner)
+        client, url = APIClient(), reverse('autocomplete')
+        response = client.get(url, {'q': 'drag'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [{'type': 'category', 'id': category.pk, 'name': 'Dragon Art'}])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            nft = Nft.objects.create(name='Red Dragon', description='description', image='nft.png',
+                                     sale_type='is_put_on_sale', collection=collection, owner=owner, price=1)
+        with self.assertNumQueries(0):
+            response = client.get(url, {'q': 'red', 'type': 'nft'})
+        self.assertEqual(response.data['results'], [{'type': 'nft', 'id': nft.pk, 'name': 'Red Dragon'}])
+        with self.captureOnCommitCallbacks(execute=True):
+            nft.is_hidden = True
+            nft.save()
+        self.assertEqual(client.get(url, {'q': 'red'}).data['results'], [])
+        self.assertEqual(client.get(url, {'q': 'red', 'type': 'wallet'}).status_code, 400)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+                   NFT_PRICE_FACET_EDGES=[1, 10, 100])
+class FacetsTest(TestCase):
+    """
+    The NFT list is filtered and counted per category, sale type and price range
+    """
+
+    def setUp(self):
+        cache.clear()
+        for module in (image_variants, image_hash):
+            patcher = mock.patch.object(module, 'schedule')
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        owner = User.objects.create_user('owner@example.com', 'Owner', 'User', 'password')
+        self.art, self.music = Category.objects.create(name='Art'), Category.objects.create(name='Music')
+        self.nfts = {}
+        for category in (self.art, self.music):
+            collection = Collection.objects.create(name=category.name, logo_image='logo.png',
+                                                   banner_image='banner.png', category=category, user=owner)
+            prices = (0.5, 5, 50, 500) if category is self.art else (5, 7)
+            for price in prices:
+                sale_type = 'is_put_on_sale' if price < 10 else 'is_instant_sale_price'
+                self.nfts[(category.name, price)] = Nft.objects.create(
+                    name=f'{category.name} {price}', description='description', image='nft.png', sale_type=sale_type,
+                    collection=collection, owner=owner, price=price).pk
+        Nft.objects.create(name='removed', description='description', image='nft.png', sale_type='is_put_on_sale',
+                           collection=collection, owner=owner, price=5, is_removed=True)
+
+    def test_facets(self):
+        response = APIClient().get('/api/nft_list/', {'facets': ''})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 6)
+        facets = response.data['facets']
+        self.assertEqual(facets['category'], [{'id': self.art.pk, 'name': 'Art', 'count': 4},
+                                              {'id': self.music.pk, 'name': 'Music', 'count': 2}])
+        self.assertEqual(facets['sale_type'], [{'value': 'is_put_on_sale', 'count': 4},
+                                               {'value': 'is_instant_sale_price', 'count': 2},
+                                               {'value': 'is_unlock_purchase', 'count': 0}])
+        self.assertEqual([(price['value'], price['count']) for price in facets['price']],
+                         [('-1', 1), ('1-10', 3), ('10-100', 1), ('100-', 1)])
+        with self.assertNumQueries(1):
+            facet_counts(Nft.objects.filter(is_removed=False))
+
+    def test_filters(self):
+        response = APIClient().get('/api/nft_list/', {'facets': '', 'category': self.art.pk, 'min_price': 1,
+                                                      'max_price': 100})
+        self.assertEqual(sorted(nft['id'] for nft in response.data['results']),
+                         [self.nfts[('Art', 5)], self.nfts[('Art', 50)]])
+        self.assertEqual(response.data['facets']['category'], [{'id': self.art.pk, 'name': 'Art', 'count': 2}])
+        response = APIClient().get('/api/nft_list/', {'sale_type': 'is_instant_sale_price'})
+        self.assertEqual(sorted(nft['id'] for nft in response.data),
+                         [self.nfts[('Art', 50)], self.nfts[('Art', 500)]])
+        # paged lists carry the facets of the whole filtered list
+        response = APIClient().get('/api/nft_list/', {'facets': '', 'page_size': 1, 'category': self.music.pk})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['facets']['category'], [{'id': self.music.pk, 'name': 'Music', 'count': 2}])
+        self.assertEqual(APIClient().get('/api/nft_list/', {'min_price': 'cheap'}).status_code, 400)
+        self.assertEqual(APIClient().get('/api/nft_list/', {'sale_type': 'swap'}).status_code, 400)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SparseFieldsetTest(TestCase):
+    """
+    Responses hold only the fields asked for, and only those are loaded
+    """
+
+    def setUp(self):
+        cache.clear()
+        for module in (image_variants, image_hash):
+            patcher = mock.patch.object(module, 'schedule')
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        owner = User.objects.create_user('owner@example.com', 'Owner', 'User', 'password')
+        category = Category.objects.create(name='category')
+        collection = Collection.objects.create(name='collection', logo_image='logo.png', banner_image='banner.png',
+                                               category=category, user=owner)
+        self.nft = Nft.objects.create(name='nft', description='description', image='nft.png',
+                                      sale_type='is_put_on_sale', collection=collection, owner=owner, price=1)
+
+    def test_fields(self):
+        with CaptureQueriesContext(connection) as context:
+            response = APIClient().get('/api/nft_list/', {'fields': 'id,name,price,unknown'})
+        self.assertEqual(response.data, [{'id': self.nft.pk, 'name': 'nft', 'price': 1.0}])
+        nft_queries = [query['sql'] for query in context if 'FROM "nft_management_nft"' in query['sql']]
+        self.assertEqual(len(nft_queries), 1)
+        self.assertNotIn('JOIN', nft_queries[0])
+        self.assertNotIn('"description"', nft_queries[0])
+
+    def test_exclude(self):
+        response = APIClient().get('/api/nft_list/', {'exclude': 'description,owner,image_variants'})
+        self.assertEqual(response.data[0]['collection'], 'collection')
+        self.assertFalse({'description', 'owner', 'image_variants'} & set(response.data[0]))
+        response = APIClient().get(reverse('nft', args=[self.nft.pk]), {'fields': 'owner'})
+        self.assertEqual(response.data, {'owner': 'Owner User'})
+
+    def test_renderer(self):
+        data = {'name': 'caf\u00e9 \u2028', 'price': Decimal('1.5'), 'sold': timezone.now(),
+                'bids': [{'id': 1, 'price': 2.25}], 'missing': None}
+        fast, default = FastJSONRenderer().render(data), JSONRenderer().render(data)
+        self.assertEqual(fast, default)
+        context = {'indent': 2}
+        self.assertEqual(FastJSONRenderer().render(data, renderer_context=context),
+                         JSONRenderer().render(data, renderer_context=context))
+
+
+class ImageVariantsTest(TestCase):
+    """
+    Variants are rendered when an image changes and stored under the names recorded for
+    them, next to their original
+    """
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = self.settings(MEDIA_ROOT=media_root, IMAGE_VARIANT_WORKERS=0,
+                                 IMAGE_VARIANT_SIZES={'thumb': (20, 20, True)}, IMAGE_VARIANT_FORMATS=['webp'])
+        settings.enable()
+        self.addCleanup(settings.disable)
+        user = User.objects.create_user('owner@example.com', 'Owner', 'User', 'password')
+        category = Category.objects.create(name='category')
+        self.collection = Collection.objects.create(name='collection', logo_image='logo.png',
+                                                    banner_image='banner.png', category=category, user=user)
+        self.user = user
+
+    def create_nft(self, name, image):
+        return Nft.objects.create(name=name, description='description', image=image, sale_type='is_put_on_sale',
+                                  collection=self.collection, owner=self.user, price=1)
+
+    def test_legacy_original(self):
+        # stored before uploads were content-addressed, outside of the sha256/ tree
+        image = io.BytesIO()
+        Image.new('RGB', (40, 40), 'red').save(image, 'PNG')
+        with open(default_storage.path('dragon.png'), 'wb') as file:
+            file.write(image.getvalue())
+        nft = self.create_nft('legacy', 'dragon.png')
+
+        image_variants.generate(Nft, nft.pk, ['image'])
+        nft.refresh_from_db()
+        self.assertEqual(nft.image_variants['image']['thumb.webp'], 'dragon.thumb.webp')
+        self.assertTrue(default_storage.exists('dragon.thumb.webp'))
+        self.assertTrue(image_variants.is_current(nft, 'image'))
+
+        # other rows showing the same file reuse its variants
+        other = self.create_nft('shared', 'dragon.png')
+        with mock.patch.object(image_variants, 'render') as render:
+            image_variants.generate(Nft, other.pk, ['image'])
+        render.assert_not_called()
+        other.refresh_from_db()
+        self.assertEqual(other.image_variants['image']['thumb.webp'], 'dragon.thumb.webp')
+
+    def upload(self, name, size=(40, 30), mode='RGB'):
+        image = io.BytesIO()
+        Image.new(mode, size, 'red').save(image, 'PNG')
+        return default_storage.save(name, ContentFile(image.getvalue()))
+
+    def test_render(self):
+        image = io.BytesIO()
+        Image.new('RGBA', (40, 20), (255, 0, 0, 128)).save(image, 'PNG')
+        variants = image_variants.render(image.getvalue(), {'thumb': (20, 20, True), 'medium': (30, 30, False),
+                                                            'large': (100, 100, False)}, ['webp', 'png'])
+        self.assertEqual(len(variants), 6)
+        sizes = {}
+        for (size, format), data in variants.items():
+            with Image.open(io.BytesIO(data)) as variant:
+                self.assertEqual(variant.format, format.upper())
+                self.assertIn('A', variant.getbands())
+                sizes[size] = variant.size
+        # cropped to the exact size, fitted otherwise and never upscaled
+        self.assertEqual(sizes, {'thumb': (20, 20), 'medium': (30, 15), 'large': (40, 20)})
+
+    def test_generated_on_upload(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            nft = self.create_nft('uploaded', self.upload('posts/dragon.png'))
+        nft.refresh_from_db()
+        name = nft.image_variants['image']['thumb.webp']
+        self.assertEqual(name, image_variants.variant_name(nft.image.name, 'thumb', 'webp'))
+        with default_storage.open(name) as file, Image.open(file) as variant:
+            self.assertEqual(variant.size, (20, 20))
+        self.assertEqual(NFTSerializer(nft).data['image_variants'],
+                         {'image': {'thumb.webp': default_storage.url(name)}})
+
+        # saving without a new image generates nothing
+        with mock.patch.object(image_variants, 'schedule') as schedule:
+            nft.name = 'renamed'
+            nft.save()
+        schedule.assert_not_called()
+        with self.captureOnCommitCallbacks(execute=True):
+            nft.image = self.upload('posts/other.png', size=(50, 50))
+            nft.save()
+        nft.refresh_from_db()
+        self.assertEqual(nft.image_variants['image']['source'], nft.image.name)
+        self.assertNotEqual(nft.image_variants['image']['thumb.webp'], name)
+
+    def test_new_size(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            nft = self.create_nft('uploaded', self.upload('posts/dragon.png'))
+        nft.refresh_from_db()
+        with self.settings(IMAGE_VARIANT_SIZES={'thumb': (20, 20, True), 'small': (10, 10, False)}):
+            self.assertFalse(image_variants.is_current(nft, 'image'))
+            # only the missing size is rendered
+            with mock.patch.object(image_variants, 'render', wraps=image_variants.render) as render:
+                image_variants.generate(Nft, nft.pk, ['image'])
+            self.assertEqual(render.call_args.args[1:], ({'small': (10, 10, False)}, ['webp']))
+            nft.refresh_from_db()
+            self.assertTrue(image_variants.is_current(nft, 'image'))
+        self.assertEqual(set(nft.image_variants['image']), {'thumb.webp', 'small.webp', 'source'})
+
+
+class ViewCounterTest(TestCase):
+    """
+    Views are counted once per viewer and written by batches which invalidate the NFT's
+    cached responses and ETag
+    """
+
+    def setUp(self):
+        user = User.objects.create_user('owner@example.com', 'Owner', 'User', 'password')
+        category = Category.objects.create(name='category')
+        collection = Collection.objects.create(name='collection', logo_image='logo.png', banner_image='banner.png',
+                                               category=category, user=user)
+        self.nft = Nft.objects.create(name='nft', description='description', image='nft.png',
+                                      sale_type='is_put_on_sale', collection=collection, owner=user, price=1)
+        # never flushed by its thread during the test
+        self.counter = view_counter.ViewCounter(flush_interval=3600, dedup_window=60)
+        patcher = mock.patch('apis.nft_management.views.view_counter', self.counter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        cache.clear()
+
+    def test_views_counted_once(self):
+        client = APIClient()
+        url = f'/api/specific_nft/{self.nft.pk}/'
+        first = client.get(url, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(first.status_code, 200)
+        # a repeated view, with a forged X-Forwarded-For, and a conditional one
+        client.get(url, REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='10.0.0.9')
+        self.assertEqual(client.get(url, REMOTE_ADDR='10.0.0.2', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        self.assertEqual(self.counter.flush(), 2)
+        self.nft.refresh_from_db()
+        self.assertEqual(self.nft.total_views, 2)
+
+        response = client.get(url, REMOTE_ADDR='10.0.0.3', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_views'], 2)
+
+
+class BulkMintTest(TestCase):
+    """
+    Manifest rows are minted or reported one by one, never failing the whole manifest
+    """
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = self.settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        for module in (image_variants, image_hash):
+            patcher = mock.patch.object(module, 'schedule')
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.owner = User.objects.create_user('owner@example.com', 'Owner', 'User', 'password')
+        category = Category.objects.create(name='category')
+        self.collection = Collection.objects.create(name='collection', logo_image='logo.png',
+                                                    banner_image='banner.png', category=category, user=self.owner)
+        with open(default_storage.path('uploaded.png'), 'wb') as file:
+            Image.new('RGB', (40, 40), 'red').save(file, 'PNG')
+
+    def row(self, name, image):
+        return {'name': name, 'description': 'description', 'image': image, 'collection': self.collection.pk,
+                'price': 1}
+
+    def test_image_names(self):
+        rows = [self.row('uploaded', 'uploaded.png'), self.row('missing', 'missing.png'),
+                self.row('outside', '../../etc/passwd'), self.row('absolute', '/etc/passwd')]
+        result = minting.mint(enumerate(rows, 1), self.owner)
+        self.assertEqual(result.created, 1)
+        self.assertEqual(Nft.objects.get().image.name, 'uploaded.png')
+        self.assertEqual(result.errors, [
+            {'row': 2, 'errors': {'image': ["No file was uploaded with this name"]}},
+            {'row': 3, 'errors': {'image': ["Invalid file name"]}},
+            {'row': 4, 'errors': {'image': ["Invalid file name"]}},
+        ])
+
+
+class DuplicateImageTest(TestCase):
+    """
+    Images already minted by another owner are refused, by upload or by manifest
+    """
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = self.settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        for patcher in (mock.patch.object(image_variants, 'schedule'), mock.patch.object(image_hash, 'schedule'),
+                        mock.patch.object(image_hash, 'get_index', return_value=image_hash.HammingIndex())):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.owner = User.objects.create_user('owner@example.com', 'Owner', 'User', 'password')
+        self.minter = User.objects.create_user('minter@example.com', 'Minter', 'User', 'password')
+        category = Category.objects.create(name='category')
+        self.collection = Collection.objects.create(name='collection', logo_image='logo.png',
+                                                    banner_image='banner.png', category=category, user=self.minter)
+        self.original_name = self.upload('original.png', (0, 0, 20, 40), 'PNG')
+        # the same picture, other bytes
+        self.copy_name = self.upload('copy.jpg', (0, 0, 20, 40), 'JPEG')
+        self.other_name = self.upload('other.png', (0, 0, 40, 20), 'PNG')
+        self.text_name = default_storage.save('notes.png', ContentFile(b'not an image'))
+        stored = StoredImageHash.objects.get(name=self.original_name)
+        # minted by another process: in the database, not in the index of this one
+        self.original = Nft.objects.create(name='original', description='description', image=self.original_name,
+                                           sale_type='is_put_on_sale', collection=self.collection, owner=self.owner,
+                                           price=1, image_hash=stored.image_hash)
+
+    def upload(self, name, box, format):
+        image = Image.new('RGB', (40, 40), 'white')
+        image.paste('black', box)
+        content = io.BytesIO()
+        image.save(content, format)
+        return default_storage.save(name, ContentFile(content.getvalue()))
+
+    def row(self, name, image):
+        return {'name': name, 'description': 'description', 'image': image, 'collection': self.collection.pk,
+                'price': 1}
+
+    def test_hashed_on_upload(self):
+        hashes = dict(StoredImageHash.objects.values_list('name', 'image_hash'))
+        self.assertEqual(hashes[self.original_name], hashes[self.copy_name])
+        self.assertIsNotNone(hashes[self.other_name])
+        self.assertIsNone(hashes[self.text_name])
+
+    def test_bulk_mint(self):
+        with open(default_storage.path('legacy.png'), 'wb') as file:
+            file.write(b'stored before hashes were recorded')
+        rows = [self.row('copy', self.copy_name), self.row('other', self.other_name),
+                self.row('text', self.text_name), self.row('legacy', 'legacy.png')]
+        with mock.patch.object(image_hash, 'dhash') as dhash:
+            result = minting.mint(enumerate(rows, 1), self.minter)
+        dhash.assert_not_called()
+        self.assertEqual(result.created, 2)
+        self.assertEqual(result.errors, [
+            {'row': 1, 'errors': {'image': ["This image is already minted as another NFT"],
+                                  'similar_nfts': [self.original.pk]}},
+            {'row': 3, 'errors': {'image': [
+                "Upload a valid image. The file you uploaded was either not an image or a corrupted image."]}},
+        ])
+        self.assertEqual(Nft.objects.get(name='other').image_hash,
+                         StoredImageHash.objects.get(name=self.other_name).image_hash)
+        legacy = Nft.objects.get(name='legacy')
+        self.assertIsNone(legacy.image_hash)
+        image_hash.schedule.assert_called_once_with(legacy.pk)
+
+    def test_copies_of_own_images(self):
+        value = image_hash.stored_hashes([self.copy_name])[self.copy_name]
+        self.assertEqual(image_hash.copies([value], self.minter.pk), {value: [self.original.pk]})
+        self.assertEqual(image_hash.copies([value], self.owner.pk), {})
+
+
+# foreign keys are checked when transactions commit, which TestCase never does
+class ArchiveTest(TransactionTestCase):
+    """
+    Archived rows can be restored, and still count in the statistics rebuilt without them
+    """
+    label = 'nft_management.nftpricehistory'
+
+    def setUp(self):
+        archive_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, archive_root)
+        settings = self.settings(ARCHIVE_ROOT=archive_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # no image files here
+        for module in (image_variants, image_hash):
+            patcher = mock.patch.object(module, 'schedule')
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        user = User.objects.create_user('owner@example.com', 'Owner', 'User', 'password')
+        category = Category.objects.create(name='category')
+        collection = Collection.objects.create(name='collection', logo_image='logo.png', banner_image='banner.png',
+                                               category=category, user=user)
+        self.kept, self.deleted = (
+            Nft.objects.create(name=name, description='description', image=f'{name}.png', sale_type='is_put_on_sale',
+                               collection=collection, owner=user, price=1)
+            for name in ('kept', 'deleted')
+        )
+        self.date = timezone.now() - timedelta(days=400)
+        for nft, price in ((self.kept, 1), (self.kept, 3), (self.deleted, 2)):
+            NftPriceHistory.objects.create(nft=nft, price=price)
+        NftPriceHistory.objects.update(date=self.date)
+
+    def archive(self):
+        return sum(count for _, count in archive.archive_expired(self.label))
+
+    def test_round_trip(self):
+        self.assertEqual(self.archive(), 3)
+        self.assertFalse(NftPriceHistory.objects.exists())
+        self.assertEqual(len(archive.archives(self.label)), 1)
+
+        self.assertEqual(archive.restore(self.label), (3, 0))
+        self.maxDiff = None
+        self.assertEqual(sorted(NftPriceHistory.objects.values_list('nft_id', 'price', 'date')),
+                         [(self.kept.pk, 1, self.date), (self.kept.pk, 3, self.date), (self.deleted.pk, 2, self.date)])
+        # rows already in the table are left as they are
+        self.assertEqual(archive.restore(self.label), (3, 0))
+        self.assertEqual(NftPriceHistory.objects.count(), 3)
+        # ranges outside of the archived dates restore nothing
+        self.assertEqual(archive.restore(self.label, since=timezone.now() - timedelta(days=1)), (0, 0))
+
+        self.archive()
+        self.deleted.delete()
+        self.assertEqual(archive.restore(self.label), (2, 1))
+        self.assertEqual(NftPriceHistory.objects.filter(nft=self.kept).count(), 2)
+
+    def test_rebuild(self):
+        self.archive()
+        # archived twice by an interrupted run, and partly still in the table
+        NftPriceHistory.objects.create(nft=self.kept, price=5)
+        self.archive()
+        self.assertEqual(sum(len(rows) for rows in archive.archived(self.label)), 3)
+
+        call_command('rebuild_price_candles', stdout=io.StringIO())
+        candle = NftPriceCandle.objects.get(nft=self.kept, resolution='1w', bucket__lte=self.date,
+                                            bucket__gt=self.date - timedelta(days=7))
+        self.assertEqual((candle.open, candle.high, candle.low, candle.close, candle.points), (1, 3, 1, 3, 2))
+        self.assertTrue(NftPriceCandle.objects.filter(nft=self.deleted).exists())
+
+    def test_rebuild_sales(self):
+        buyer = User.objects.create_user('buyer@example.com', 'Buyer', 'User', 'password')
+        wallet = Wallet.objects.create(user=buyer, wallet_address='buyer')
+        NftTransaction.objects.create(buyer=buyer, seller=self.kept.owner, nft=self.kept, wallet=wallet, sold_price=7)
+        NftTransaction.objects.update(sold_date=self.date)
+        self.assertEqual(sum(count for _, count in archive.archive_expired('bidding_and_transection.nfttransaction')),
+                         1)
+
+        call_command('refresh_collection_stats', rebuild=True, stdout=io.StringIO())
+        call_command('refresh_seller_leaderboard', rebuild=True, stdout=io.StringIO())
+        self.assertEqual(CollectionStats.objects.get(collection=self.kept.collection).volume_all, 7)
+        self.assertEqual(CollectionVolume.objects.get(collection=self.kept.collection).sales_count, 1)
+        leader = SellerLeaderboard.objects.get(seller=self.kept.owner, window='all')
+        self.assertEqual((leader.revenue, leader.sales_count), (7, 1))
@@ -7,6 +7,8 @@ urlpatterns = [
     path('specific_nft/<int:pk>/', views.NFTView.as_view(), name="nft"),
     path('update_delete_nft/<int:pk>/', views.NFTManagementView.as_view(), name='auth-nft-crud'),
     path('create_nft/', views.NFTCreateView.as_view(), name="nft-create"),
+    path('bulk_mint_nft/', views.NFTBulkMintView.as_view(), name="nft-bulk-mint"),
+    path('similar_images/', views.SimilarImagesView.as_view(), name="similar-images"),
     path('nft_list/', views.NFTListView.as_view(), name='nft-list'),
     # Category URLs
     path('update_delete_category/<int:pk>/', views.CategoryManagementView.as_view(), name='category-crud'),
@@ -27,6 +29,14 @@ urlpatterns = [
     path('reported_nft_list/', views.ReportedNFTListView.as_view(), name="reported-nft-list"),
     path('reported_nft/<int:pk>/', views.ReportedNFTView.as_view(), name='reported-nft'),
     path('reported_nft_delete/<int:pk>', views.ReportedNFTDeleteView.as_view(), name='delete-reported-nft'),
+    # Search URLs
+    path('search/', views.SearchView.as_view(), name='search'),
+    path('autocomplete/', views.AutocompleteView.as_view(), name='autocomplete'),
+    # Price candle URLs
+    path('price_candles/nft/<int:pk>/', views.PriceCandlesView.as_view(), {'scope': 'nft'},
+         name='nft-price-candles'),
+    path('price_candles/collection/<int:pk>/', views.PriceCandlesView.as_view(), {'scope': 'collection'},
+         name='collection-price-candles'),
     path('top_sellers/', views.top_sellers, name='top-sellers'),
     path('specific_user_nft_data/<int:id>/', views.users_nft_data, name="users_nft_data_list"),
 ]
@@ -0,0 +1,149 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+
+from apis import response_cache
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import Nft
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """
+    Buffers NFT views in process and writes them to ``Nft.total_views`` in batches
+
+    Views are counted in memory and flushed every ``flush_interval`` seconds by a
+    daemon thread, with one ``UPDATE ... SET total_views = total_views + n`` per distinct
+    increment, so a hot NFT costs one row update per flush instead of one per view and
+    requests never wait for the database. The updates send no signal, each flush
+    invalidates the cached responses and ETags built from NFTs itself.
+
+    Parameters
+    ----------
+    flush_interval : integer
+        seconds between two flushes
+    dedup_window : integer
+        seconds during which repeated views of the same viewer are ignored, 0 disables it
+    """
+
+    cache_key = 'nft_view:{nft_id}:{viewer}'
+
+    def __init__(self, flush_interval=10, dedup_window=0):
+        self.flush_interval = flush_interval
+        self.dedup_window = dedup_window
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _start(self):
+        # the thread of a parent process does not run after a fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._thread = threading.Thread(target=self._run, name='nft-view-counter', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("NFT views could not be written, retrying on the next flush")
+                # the connection may be broken, the next flush opens a new one
+                connection.close()
+
+    def record(self, nft_id, viewer=None):
+        """
+        Counts a view of an NFT, never raises
+
+        Parameters
+        ----------
+        nft_id : integer
+
+        viewer : str
+            user id or IP address used for de-duplication
+
+        Returns
+        -------
+        bool
+            False if the view was a duplicate and was not counted
+        """
+        try:
+            if viewer is not None and self.dedup_window:
+                key = self.cache_key.format(nft_id=nft_id, viewer=viewer)
+                if not cache.add(key, 1, timeout=self.dedup_window):
+                    return False
+            self._start()
+            with self._lock:
+                self._counts[nft_id] += 1
+        except Exception:
+            logger.exception("view of NFT %s could not be counted", nft_id)
+            return False
+        return True
+
+    def flush(self):
+        """
+        Writes the buffered views to the database, they are buffered again if it fails
+
+        Returns
+        -------
+        integer
+            number of views written
+        """
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        if not counts:
+            return 0
+
+        by_increment = defaultdict(list)
+        for nft_id, views in counts.items():
+            by_increment[views].append(nft_id)
+        try:
+            with transaction.atomic():
+                for views, nft_ids in by_increment.items():
+                    # Sorted ids make concurrent flushes lock rows in the same order
+                    Nft.objects.filter(pk__in=sorted(nft_ids)).update(total_views=F('total_views') + views)
+        except Exception:
+            with self._lock:
+                self._counts.update(counts)
+            raise
+        response_cache.invalidate(Nft)
+        return sum(counts.values())
+
+
+def viewer_key(request):
+    """
+    Returns the user id of an authenticated request, the client IP address otherwise
+
+    The address is ``REMOTE_ADDR``. Behind ``NFT_VIEW_TRUSTED_PROXIES`` reverse proxies
+    it is the one the outermost of them appended to ``X-Forwarded-For``, the addresses
+    before it are sent by the client and could be anything.
+    """
+    if request.user and request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    proxies = getattr(settings, 'NFT_VIEW_TRUSTED_PROXIES', 0)
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if proxies and forwarded:
+        addresses = [address.strip() for address in forwarded.split(',')]
+        return addresses[-min(proxies, len(addresses))]
+    return request.META.get('REMOTE_ADDR')
+
+
+view_counter = ViewCounter(
+    flush_interval=getattr(settings, 'NFT_VIEW_FLUSH_INTERVAL', 10),
+    dedup_window=getattr(settings, 'NFT_VIEW_DEDUP_WINDOW', 0),
+)
+atexit.register(view_counter.flush)
@@ -1,20 +1,43 @@
-from accounts.models import Profile
+from accounts.models import Profile, User
+from apis.bidding_and_transection import leaderboard
+from apis.bidding_and_transection.models import NftTransaction, SellerLeaderboard
+from apis.conditional import ConditionalGetMixin
+from apis.fieldsets import sparse_fieldset
+from apis.request_log import AsyncLoggingMixin
+from apis.response_cache import cache_response, generations
+from django.conf import settings
 from django.db.models.expressions import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import generics
 from rest_framework import status
 from rest_framework.decorators import api_view
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_tracking.mixins import LoggingMixin
 
+from . import autocomplete, candles, image_hash, minting, search
+from .facets import facet_counts
+from .filters import NftFilter
 from .models import *
+from .pagination import KeysetPagination
 from .serializers import NFTSerializer, CollectionSerializer, CategorySerializer, FavouriteNftSerializer, \
-    ReportedNftSerializer
+    ReportedNftSerializer, NftSearchSerializer, CollectionSearchSerializer, CreatorSearchSerializer
+from .view_counter import view_counter, viewer_key
 
 
-class LoggingView(LoggingMixin, generics.GenericAPIView):
+COLLECTION_ORDERINGS = {
+    'id': 'id',
+    'volume_24h': 'stats__volume_24h',
+    'volume_7d': 'stats__volume_7d',
+    'volume_all': 'stats__volume_all',
+    'items_count': 'stats__items_count',
+}
+
+
+class LoggingView(AsyncLoggingMixin, generics.GenericAPIView):
     def get(self, request):
         return Response('with logging')
 
@@ -63,7 +86,13 @@ class NFTCreateView(APIView):
             serializer = NFTSerializer(data=data)
 
             if serializer.is_valid():
-                serializer.save()
+                value = image_hash.hash_upload(request.FILES['image']) if 'image' in request.FILES else None
+                if value is not None:
+                    copies = image_hash.copies([value], request.user.id).get(value)
+                    if copies:
+                        return Response({"image": ["This image is already minted as another NFT"],
+                                         "similar_nfts": copies}, status=status.HTTP_400_BAD_REQUEST)
+                serializer.save(image_hash=None if value is None else image_hash.to_db(value))
                 return Response(serializer.data, status=status.HTTP_200_OK)
             else:
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -72,6 +101,115 @@ class NFTCreateView(APIView):
             return Response({"message": e.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class NFTBulkMintView(APIView):
+    """
+    NFTBulkMintView class
+
+    This view performs POST operation for many NFTs at once
+
+    Parameters
+    ----------
+    APIView : rest_framework.views
+
+    """
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        responses={
+            200: "OK",
+            400: "Bad Request",
+            500: "Internal Server Error",
+        },
+    )
+    def post(self, request):
+        """
+        HTTP POST request
+
+        An HTTP endpoint that creates the NFTs of an uploaded JSON Lines or CSV ``manifest``
+        for the requesting user. The format is guessed from the file name or given as
+        ``format``. Invalid rows are skipped and reported with their row number.
+
+        Parameters
+        ----------
+        request : django.http.request
+
+        Returns
+        -------
+        rest_framework.response
+            returns the number of created NFTs and the errors of the skipped rows, error message otherwise
+        """
+        try:
+            manifest = request.FILES.get('manifest')
+            if manifest is None:
+                return Response({"message": "manifest file is required"}, status=status.HTTP_400_BAD_REQUEST)
+            manifest_format = minting.manifest_format(manifest.name, request.data.get('format'))
+            result = minting.mint(minting.read_manifest(manifest.file, manifest_format), request.user)
+            return Response({"created": result.created, "failed": len(result.errors), "errors": result.errors},
+                            status=status.HTTP_200_OK)
+        except minting.ManifestError as e:
+            return Response({"message": e.args[0]}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"message": e.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class SimilarImagesView(APIView):
+    """
+    SimilarImagesView class
+
+    This view performs POST operation to find the NFTs with an image similar to an upload
+
+    Parameters
+    ----------
+    APIView : rest_framework.views
+
+    """
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        responses={
+            200: "OK",
+            400: "Bad Request",
+            500: "Internal Server Error",
+        },
+    )
+    def post(self, request):
+        """
+        HTTP POST request
+
+        An HTTP endpoint that returns the NFTs whose image looks like the uploaded ``image``,
+        closest first, to check an image before minting it. ``distance`` is the number of
+        differing bits of the 64 bits image hashes up to which images are similar, capped
+        by ``IMAGE_HASH_MAX_DISTANCE``. Matches are found in an in-memory index without
+        scanning the NFTs.
+
+        Parameters
+        ----------
+        request : django.http.request
+
+        Returns
+        -------
+        rest_framework.response
+            returns the similar NFTs and their distance, error message otherwise
+        """
+        try:
+            if 'image' not in request.FILES:
+                return Response({"message": "image file is required"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                distance = int(request.data.get('distance', getattr(settings, 'NFT_DUPLICATE_IMAGE_DISTANCE', 4)))
+                distance = min(max(distance, 0), getattr(settings, 'IMAGE_HASH_MAX_DISTANCE', 10))
+            except ValueError:
+                return Response({"message": "distance must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+            value = image_hash.hash_upload(request.FILES['image'])
+            if value is None:
+                return Response({"message": "image is not a valid image"}, status=status.HTTP_400_BAD_REQUEST)
+            results = [{"id": nft.id, "name": nft.name, "owner": nft.owner_id, "collection": nft.collection_id,
+                        "image": nft.image.url, "distance": d}
+                       for nft, d in image_hash.similar(value, distance)]
+            return Response({"results": results}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"message": e.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class NFTManagementView(APIView):
     """
         NFTManagementView class
@@ -165,7 +303,7 @@ class NFTManagementView(APIView):
             return Response({"message": e.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class NFTView(APIView):
+class NFTView(ConditionalGetMixin, APIView):
     """
         NFTView Class
 
@@ -177,6 +315,14 @@ class NFTView(APIView):
 
     """
 
+    def get_validators(self, request, pk):
+        row = Nft.objects.filter(pk=pk).values_list('updated_at', 'total_views').first()
+        if row is None:
+            return None, None
+        updated_at, total_views = row
+        # the collection and owner names are shown too, so there is no Last-Modified
+        return f"{pk}-{updated_at.isoformat()}-{total_views}-{generations(Collection, User)}", None
+
     def get(self, request, pk):
         """
             HTTP GET request
@@ -194,9 +340,26 @@ class NFTView(APIView):
             rest_framework.response
             returns HTTP 200 status if data returned successfully,error message otherwise
         """
+        return self.get_nft(request, pk)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        # 304 responses are returned before get is called, they are views too
+        if request.method == 'GET' and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            view_counter.record(kwargs['pk'], viewer_key(request))
+        return response
+
+    @cache_response(Nft, Collection, User)
+    def get_nft(self, request, pk):
+        """
+            Returns the response of ``get``, cached for anonymous requests
+
+            Views are counted by ``finalize_response`` so that cache hits are counted too
+        """
         try:
-            nft_object = Nft.objects.get(pk=pk)
-            serializer = NFTSerializer(nft_object)
+            fieldset = sparse_fieldset(request)
+            nft_object = NFTSerializer.setup_eager_loading(Nft.objects.all(), **fieldset).get(pk=pk)
+            serializer = NFTSerializer(nft_object, **fieldset)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Nft.DoesNotExist:
             return Response({"message": "NFT does not exist"}, status=status.HTTP_400_BAD_REQUEST)
@@ -205,7 +368,7 @@ class NFTView(APIView):
             return Response({"message": e.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class NFTListView(APIView, LoggingMixin):
+class NFTListView(ConditionalGetMixin, AsyncLoggingMixin, APIView):
     """
         NFTListView Class
 
@@ -217,11 +380,22 @@ class NFTListView(APIView, LoggingMixin):
 
     """
 
+    def get_validators(self, request):
+        # generations are read from the cache, the NFTs are neither counted nor scanned
+        return generations(Nft, Collection, Category, User), None
+
     def get(self, request):
         """
             HTTP GET request
 
-            An HTTP endpoint that returns all NFT objects
+            An HTTP endpoint that returns all NFT objects, or a single page of them when
+            ``cursor`` or ``page_size`` is given. Pages can be ordered by ``created_at``
+            or ``price`` through ``ordering``.
+
+            NFTs can be filtered by ``category``, ``collection``, ``owner``, ``sale_type``,
+            ``is_hidden``, ``min_price``/``max_price`` and ``created_after``/``created_before``.
+            With ``facets`` the response holds the NFTs under ``results`` and the number of
+            matching NFTs per category, sale type and price range under ``facets``.
 
             Parameters
             ----------
@@ -233,9 +407,29 @@ class NFTListView(APIView, LoggingMixin):
             returns HTTP 200 status if data returned successfully,error message otherwise
         """
         try:
-            nft = Nft.objects.filter(is_removed=False)
-            serializer = NFTSerializer(nft, many=True)
+            nft_filter = NftFilter(request.query_params, queryset=Nft.objects.filter(is_removed=False))
+            if not nft_filter.is_valid():
+                return Response(nft_filter.errors, status=status.HTTP_400_BAD_REQUEST)
+            fieldset = sparse_fieldset(request)
+            nft = NFTSerializer.setup_eager_loading(nft_filter.qs, **fieldset)
+            with_facets = 'facets' in request.query_params
+            if KeysetPagination.is_requested(request):
+                paginator = KeysetPagination(orderings=('created_at', 'price'), default_ordering='-created_at')
+                page = paginator.paginate_queryset(nft, request, view=self)
+                serializer = NFTSerializer(page, many=True, **fieldset)
+                response = paginator.get_paginated_response(serializer.data)
+                if with_facets:
+                    response.data['facets'] = facet_counts(nft_filter.qs)
+                return response
+            serializer = NFTSerializer(nft, many=True, **fieldset)
+            if with_facets:
+                return Response({"results": serializer.data, "facets": facet_counts(nft_filter.qs)},
+                                status=status.HTTP_200_OK)
             return Response(serializer.data, status=status.HTTP_200_OK)
+        except NotFound as e:
+            return Response({"message": e.detail}, status=status.HTTP_404_NOT_FOUND)
+        except ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Collection.DoesNotExist:
             return Response({"message": "FAQ does not exist"}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
@@ -383,7 +577,7 @@ class CollectionManagementView(APIView):
             return Response({"message": e.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class CollectionView(APIView):
+class CollectionView(ConditionalGetMixin, APIView):
     """
         CollectionView Class
 
@@ -395,6 +589,15 @@ class CollectionView(APIView):
 
     """
 
+    def get_validators(self, request, pk):
+        row = Collection.objects.filter(pk=pk).values_list('updated_at', 'stats__updated_at').first()
+        if row is None:
+            return None, None
+        # the category and user names are shown too, so there is no Last-Modified
+        return f"{pk}-" + "-".join(date.isoformat() if date else '' for date in row) + \
+            f"-{generations(Category, User)}", None
+
+    @cache_response(Collection, CollectionStats, Category, Nft, NftTransaction, User)
     def get(self, request, pk):
         """
             HTTP GET request
@@ -413,8 +616,9 @@ class CollectionView(APIView):
             returns HTTP 200 status if data returned successfully,error message otherwise
         """
         try:
-            collection = Collection.objects.get(pk=pk)
-            serializer = CollectionSerializer(collection)
+            fieldset = sparse_fieldset(request)
+            collection = CollectionSerializer.setup_eager_loading(Collection.objects.all(), **fieldset).get(pk=pk)
+            serializer = CollectionSerializer(collection, **fieldset)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         except Collection.DoesNotExist:
@@ -424,7 +628,7 @@ class CollectionView(APIView):
             return Response({"message": e.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class CollectionListView(APIView):
+class CollectionListView(ConditionalGetMixin, APIView):
     """
         CollectionListView Class
 
@@ -436,11 +640,17 @@ class CollectionListView(APIView):
 
     """
 
+    def get_validators(self, request):
+        return generations(Collection, CollectionStats, Category, Nft, NftTransaction, User), None
+
+    @cache_response(Collection, CollectionStats, Category, Nft, NftTransaction, User)
     def get(self, request):
         """
             HTTP GET request
 
-            An HTTP endpoint that returns all Collection objects
+            An HTTP endpoint that returns all Collection objects with their statistics, or a
+            single page of them when ``cursor`` or ``page_size`` is given. Pages can be ordered
+            by ``volume_24h``, ``volume_7d``, ``volume_all`` or ``items_count`` through ``ordering``.
 
             Parameters
              ----------
@@ -452,10 +662,21 @@ class CollectionListView(APIView):
             returns HTTP 200 status if data returned successfully,error message otherwise
         """
         try:
-            collection = Collection.objects.filter(is_removed=False)
-            serializer = CollectionSerializer(collection, many=True)
+            fieldset = sparse_fieldset(request)
+            collection = CollectionSerializer.setup_eager_loading(Collection.objects.filter(is_removed=False),
+                                                                  **fieldset)
+            if KeysetPagination.is_requested(request):
+                paginator = KeysetPagination(orderings=COLLECTION_ORDERINGS, default_ordering='-id')
+                page = paginator.paginate_queryset(collection, request, view=self)
+                serializer = CollectionSerializer(page, many=True, **fieldset)
+                return paginator.get_paginated_response(serializer.data)
+            serializer = CollectionSerializer(collection, many=True, **fieldset)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
+        except NotFound as e:
+            return Response({"message": e.detail}, status=status.HTTP_404_NOT_FOUND)
+        except ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Collection.DoesNotExist:
             return Response({"message": " collection does not exist"}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -628,7 +849,7 @@ class CategoryView(APIView):
         """
         try:
             cat_obj = Category.objects.get(pk=pk)
-            serializer = CategorySerializer(cat_obj)
+            serializer = CategorySerializer(cat_obj, **sparse_fieldset(request))
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Category.DoesNotExist:
             return Response({"message": " Category does not exist"}, status=status.HTTP_400_BAD_REQUEST)
@@ -648,11 +869,13 @@ class CategoryListView(APIView):
         APIView : rest_framework.views
     """
 
+    @cache_response(Category)
     def get(self, request):
         """
             HTTP GET request
 
-            An HTTP endpoint that returns all Category objects
+            An HTTP endpoint that returns all Category objects, or a single page of them
+            when ``cursor`` or ``page_size`` is given
 
             Parameters
             ----------
@@ -665,9 +888,18 @@ class CategoryListView(APIView):
         """
         try:
             cat_obj = Category.objects.filter(is_removed=False)
-            serializer = CategorySerializer(cat_obj, many=True)
+            if KeysetPagination.is_requested(request):
+                paginator = KeysetPagination(orderings=('created_at',), default_ordering='created_at')
+                page = paginator.paginate_queryset(cat_obj, request, view=self)
+                serializer = CategorySerializer(page, many=True, **sparse_fieldset(request))
+                return paginator.get_paginated_response(serializer.data)
+            serializer = CategorySerializer(cat_obj, many=True, **sparse_fieldset(request))
             return Response(serializer.data, status=status.HTTP_200_OK)
 
+        except NotFound as e:
+            return Response({"message": e.detail}, status=status.HTTP_404_NOT_FOUND)
+        except ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Category.DoesNotExist:
             return Response({"message": "category does not exist"}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -737,12 +969,11 @@ class FavouritesNftView(APIView):
             returns HTTP 200 status if data returned successfully,error message otherwise
         """
         try:
-            favourite_nft = Nft.objects.filter(
-                id__in=FavouriteNft.objects.filter(is_removed=False,
-                                                   user=request.user.id
-                                                   ).values_list('id')
+            fieldset = sparse_fieldset(request)
+            favourite_nft = FavouriteNftSerializer.setup_eager_loading(
+                FavouriteNft.objects.filter(is_favorite=True, user=request.user.id), **fieldset
             )
-            serializer = FavouriteNftSerializer(favourite_nft, many=True)
+            serializer = FavouriteNftSerializer(favourite_nft, many=True, **fieldset)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         except FavouriteNft.DoesNotExist:
@@ -873,8 +1104,10 @@ class ReportedNFTListView(APIView):
             returns HTTP 200 status if data returned successfully,error message otherwise
         """
         try:
-            reported_nft_obj = ReportedNft.objects.filter(is_resolved=False, is_removed=False)
-            serializer = ReportedNftSerializer(reported_nft_obj, many=True)
+            fieldset = sparse_fieldset(request)
+            reported_nft_obj = ReportedNftSerializer.setup_eager_loading(ReportedNft.objects.filter(is_resolved=False),
+                                                                         **fieldset)
+            serializer = ReportedNftSerializer(reported_nft_obj, many=True, **fieldset)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         except ReportedNft.DoesNotExist:
@@ -913,8 +1146,10 @@ class ReportedNFTView(APIView):
             returns HTTP 200 status if data returned successfully,error message otherwise
         """
         try:
-            reported_nft_obj = ReportedNft.objects.get(pk=pk)
-            serializer = ReportedNftSerializer(reported_nft_obj)
+            fieldset = sparse_fieldset(request)
+            reported_nft_obj = ReportedNftSerializer.setup_eager_loading(ReportedNft.objects.all(),
+                                                                         **fieldset).get(pk=pk)
+            serializer = ReportedNftSerializer(reported_nft_obj, **fieldset)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         except ReportedNft.DoesNotExist:
@@ -973,24 +1208,208 @@ class ReportedNFTDeleteView(APIView):
             return Response({"message": e.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class SearchView(APIView):
+    """
+    SearchView class
+
+        This view performs GET operation to search NFTs, collections and creators
+
+        Parameters
+        ----------
+        APIView : rest_framework.views
+
+    """
+    searches = {
+        'nfts': (search.search_nfts, NftSearchSerializer),
+        'collections': (search.search_collections, CollectionSearchSerializer),
+        'creators': (search.search_creators, CreatorSearchSerializer),
+    }
+    max_limit = 50
+
+    def get(self, request):
+        """
+        HTTP GET request
+
+        A HTTP endpoint that returns the NFTs, collections and creators matching ``q``, best
+        match first. NFT and collection names and descriptions are matched with full-text
+        search, names within a few typos with trigram similarity. ``type`` restricts the
+        search to comma separated result types and ``limit`` (10 by default) caps each of them.
+
+        Parameters
+        ----------
+        request : django.http.request
+
+        Returns
+        -------
+        rest_framework.response
+            returns HTTP 200 status if data returned successfully,error message otherwise
+        """
+        try:
+            text = request.query_params.get('q', '').strip()
+            if len(text) < 2:
+                return Response({"message": "q must be at least 2 characters long"},
+                                status=status.HTTP_400_BAD_REQUEST)
+            types = request.query_params.get('type', ','.join(self.searches)).split(',')
+            if not set(types) <= set(self.searches):
+                return Response({"message": f"type must be among {', '.join(self.searches)}"},
+                                status=status.HTTP_400_BAD_REQUEST)
+            try:
+                limit = min(max(int(request.query_params.get('limit', 10)), 1), self.max_limit)
+            except ValueError:
+                return Response({"message": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+            data = {}
+            for result_type in types:
+                search_function, serializer_class = self.searches[result_type]
+                data[result_type] = serializer_class(search_function(text, limit), many=True).data
+            return Response(data, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"message": e.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AutocompleteView(APIView):
+    """
+    AutocompleteView class
+
+        This view performs GET operation to complete NFT, collection and category names
+
+        Parameters
+        ----------
+        APIView : rest_framework.views
+
+    """
+    authentication_classes = []
+    permission_classes = []
+    max_limit = 20
+
+    def get(self, request):
+        """
+        HTTP GET request
+
+        A HTTP endpoint that returns the names with a word starting with ``q``, most viewed
+        first. It is served from an in-memory index and does not query the database.
+        ``type`` restricts the results to comma separated nft, collection or category and
+        ``limit`` (10 by default) caps their number.
+
+        Parameters
+        ----------
+        request : django.http.request
+
+        Returns
+        -------
+        rest_framework.response
+            returns HTTP 200 status if data returned successfully,error message otherwise
+        """
+        try:
+            kinds = tuple(request.query_params.get('type', ','.join(autocomplete.KINDS)).split(','))
+            if not set(kinds) <= set(autocomplete.KINDS):
+                return Response({"message": f"type must be among {', '.join(autocomplete.KINDS)}"},
+                                status=status.HTTP_400_BAD_REQUEST)
+            try:
+                limit = min(max(int(request.query_params.get('limit', 10)), 1), self.max_limit)
+            except ValueError:
+                return Response({"message": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+            results = autocomplete.get_index().complete(request.query_params.get('q', ''), limit, kinds)
+            return Response({"results": results}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"message": e.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class PriceCandlesView(APIView):
+    """
+    PriceCandlesView class
+
+        This view performs GET operation for the OHLC price candles of a NFT or a Collection
+
+        Parameters
+        ----------
+        APIView : rest_framework.views
+
+    """
+    scopes = {
+        'nft': (Nft, NftPriceCandle, 'nft_id'),
+        'collection': (Collection, CollectionPriceCandle, 'collection_id'),
+    }
+    max_points = 2000
+
+    def get(self, request, scope, pk):
+        """
+        HTTP GET request
+
+        A HTTP endpoint that returns the price candles of a NFT or Collection at ``resolution``
+        1h, 1d (default) or 1w, between the optional ISO 8601 ``start`` and ``end`` dates.
+        At most ``max_points`` (500 by default) candles are returned, read from a coarser
+        resolution when the range holds more, which is then returned as ``resolution``.
+        Past weekly candles, the weeks of fixed periods are merged.
+
+        Parameters
+        ----------
+        request : django.http.request
+
+        scope : str
+            nft or collection
+
+        pk : integer
+
+        Returns
+        -------
+        rest_framework.response
+            returns HTTP 200 status if data returned successfully,error message otherwise
+        """
+        try:
+            model, candle_model, field = self.scopes[scope]
+            resolution = request.query_params.get('resolution', '1d')
+            if resolution not in candles.RESOLUTIONS:
+                return Response({"message": f"resolution must be one of {', '.join(candles.RESOLUTIONS)}"},
+                                status=status.HTTP_400_BAD_REQUEST)
+            dates = {}
+            for param in ('start', 'end'):
+                value = request.query_params.get(param)
+                dates[param] = parse_datetime(value) if value else None
+                if value and dates[param] is None:
+                    return Response({"message": f"{param} must be an ISO 8601 date"},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                if dates[param] is not None and timezone.is_naive(dates[param]):
+                    dates[param] = timezone.make_aware(dates[param])
+            try:
+                max_points = min(max(int(request.query_params.get('max_points', 500)), 1), self.max_points)
+            except ValueError:
+                return Response({"message": "max_points must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+            if not model.objects.filter(pk=pk).exists():
+                return Response({"message": f"{model.__name__} does not exist"}, status=status.HTTP_404_NOT_FOUND)
+
+            resolution, data = candles.get_candles(candle_model, {field: pk}, resolution, dates['start'],
+                                                   dates['end'], max_points)
+            return Response({scope: pk, "resolution": resolution, "candles": data}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"message": e.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(["GET"])
+@cache_response(NftTransaction, SellerLeaderboard)
 def top_sellers(request):
     """
         Parameters: request
         ----------
         request: GET
+            ``window`` one of 24h, 7d, 30d or all (default), ``limit`` number of sellers
 
-        Returns: top sellers list
+        Returns: top sellers list ordered by sold revenue
         -------
 
     """
     try:
-        nft = Nft.objects.filter(is_removed=False).order_by('-price').annotate(user_name=F('owner__first_name'),
-                                                                               profile_image=F(
-                                                                                   'owner__user_profile__profile_image')).values(
-            'user_name', 'profile_image')
+        window = request.query_params.get('window', 'all')
+        if window not in leaderboard.WINDOWS:
+            return Response({"message": f"window must be one of {', '.join(leaderboard.WINDOWS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            return Response({"message": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, leaderboard.MAX_LEADERBOARD_SIZE))
 
-        return Response({"top_sellers": nft}, status=status.HTTP_200_OK)
+        return Response({"top_sellers": leaderboard.top_sellers(window, limit)}, status=status.HTTP_200_OK)
     except Exception as e:
         return Response({"message": e.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -0,0 +1,138 @@
+import atexit
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from rest_framework_tracking.mixins import LoggingMixin
+from rest_framework_tracking.models import APIRequestLog
+
+logger = logging.getLogger(__name__)
+
+
+class RequestLogWriter:
+    """
+    Writes API request logs from a background thread, by batches
+
+    Requests put their log on a bounded queue and return, a daemon thread drains it and
+    inserts the logs with ``bulk_create`` once ``REQUEST_LOG_BATCH_SIZE`` logs are
+    waiting or the oldest has waited ``REQUEST_LOG_FLUSH_INTERVAL`` seconds. When the
+    database falls behind and the queue of ``REQUEST_LOG_QUEUE_SIZE`` logs is full,
+    ``REQUEST_LOG_OVERFLOW`` decides:
+
+    * ``drop_new``: the new log is dropped, requests never wait
+    * ``drop_oldest``: the oldest waiting log is dropped for the new one
+    * ``block``: the request waits up to ``REQUEST_LOG_BLOCK_TIMEOUT`` seconds for room,
+      slowing clients down to the pace of the database, then drops the log
+
+    Logs are lost if the process is killed, the queue is flushed when it exits normally.
+    """
+
+    def __init__(self):
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        # logs dropped since the last batch, reported by the writer thread, under _lock
+        self.dropped = 0
+
+    def _start(self):
+        # the queue and thread of a parent process are not usable after a fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=getattr(settings, 'REQUEST_LOG_QUEUE_SIZE', 10000))
+            self._thread = threading.Thread(target=self._run, name='request-log-writer', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def put(self, log):
+        """
+        Queues a log, returns False if it was dropped
+        """
+        self._start()
+        policy = getattr(settings, 'REQUEST_LOG_OVERFLOW', 'drop_new')
+        try:
+            if policy == 'block':
+                self._queue.put(log, timeout=getattr(settings, 'REQUEST_LOG_BLOCK_TIMEOUT', 0.5))
+            else:
+                self._queue.put_nowait(log)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            if policy != 'drop_oldest':
+                return False
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+                self._queue.put_nowait(log)
+            except (queue.Empty, queue.Full):
+                return False
+        return True
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + getattr(settings, 'REQUEST_LOG_FLUSH_INTERVAL', 1.0)
+            batch_size = getattr(settings, 'REQUEST_LOG_BATCH_SIZE', 200)
+            while len(batch) < batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self._write(batch)
+            with self._lock:
+                dropped, self.dropped = self.dropped, 0
+            if dropped:
+                logger.warning("%d API request logs dropped, the queue was full", dropped)
+
+    def _write(self, batch):
+        try:
+            APIRequestLog.objects.bulk_create([APIRequestLog(**log) for log in batch])
+        except Exception:
+            logger.exception("%d API request logs could not be written", len(batch))
+            # the connection may be broken, the next batch opens a new one
+            connection.close()
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self):
+        """
+        Waits for the queued logs of this process to be written
+        """
+        if self._pid == os.getpid() and self._thread.is_alive():
+            self._queue.join()
+
+
+writer = RequestLogWriter()
+atexit.register(writer.flush)
+
+
+class AsyncLoggingMixin(LoggingMixin):
+    """
+    LoggingMixin writing the logs out of the request
+
+    ``REQUEST_LOG_SAMPLE_RATE`` of the requests are logged, the others skip the work
+    of building a log. Logs are written by ``writer`` unless ``REQUEST_LOG_ASYNC`` is
+    False, in which case they are inserted in the request as LoggingMixin does.
+    """
+
+    def should_log(self, request, response):
+        rate = getattr(settings, 'REQUEST_LOG_SAMPLE_RATE', 1.0)
+        return super().should_log(request, response) and (rate >= 1 or random.random() < rate)
+
+    def handle_log(self):
+        if getattr(settings, 'REQUEST_LOG_ASYNC', True):
+            writer.put(self.log)
+        else:
+            super().handle_log()
@@ -0,0 +1,255 @@
+import atexit
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = 'response_cache:generation:{label}'
+RESPONSE_KEY = 'response_cache:response:{namespace}:{generations}:{url}'
+COUNTER_KEY = 'response_cache:{counter}:{namespace}'
+
+# namespace -> labels of the models its responses are built from
+registry = {}
+# model -> fields whose changes invalidate, for models tracked for a few fields only
+tracked_fields = {}
+
+
+def model_label(model):
+    return model._meta.label_lower
+
+
+def _first_generation():
+    # a generation evicted from the cache restarts from the current time, never from a
+    # value it already had
+    return int(time.time() * 1000)
+
+
+def _generations(labels):
+    keys = [GENERATION_KEY.format(label=label) for label in labels]
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            first = _first_generation()
+            values[key] = first if cache.add(key, first, timeout=None) else cache.get(key, first)
+    return '.'.join(str(values[key]) for key in keys)
+
+
+def generations(*models):
+    """
+    Returns the current generations of models as a string, which changes whenever one
+    of them is saved or deleted
+
+    Read from the cache without touching the database, it tells whether anything a
+    response is built from has changed, e.g. in an ETag.
+    """
+    return _generations([model_label(model) for model in models])
+
+
+def invalidate(*models):
+    """
+    Drops the cached responses built from any of the given models
+
+    Responses are not deleted one by one, the generation of the models, part of every
+    response key, is bumped instead so older entries are never read again and expire.
+    Called from the save and delete signals of the models, and explicitly after bulk
+    updates that do not send them.
+    """
+    for model in models:
+        key = GENERATION_KEY.format(label=model_label(model))
+        if not cache.add(key, _first_generation(), timeout=None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, _first_generation(), timeout=None)
+
+
+def _invalidate_on_commit(sender, update_fields=None, **kwargs):
+    fields = tracked_fields.get(sender)
+    if fields and update_fields is not None and not fields & set(update_fields):
+        return
+    transaction.on_commit(lambda: invalidate(sender))
+
+
+def track(*models, fields=None):
+    """
+    Invalidates the responses built from ``models`` whenever one of them is saved or deleted
+
+    With ``fields``, saves limited by ``update_fields`` to other fields are ignored, e.g.
+    the ``last_login`` update of a user logging in.
+
+    Called from the signals module of each app, so that writes made outside of the web
+    processes (management commands, workers) invalidate the cache too. Web workers only
+    see those invalidations through a cache shared with them (see ``CACHES``), with a
+    per-process cache they serve stale responses for up to ``RESPONSE_CACHE_TIMEOUT``.
+    """
+    for model in models:
+        if fields:
+            tracked_fields[model] = set(fields)
+        uid = f'response_cache:{model_label(model)}'
+        post_save.connect(_invalidate_on_commit, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(_invalidate_on_commit, sender=model, weak=False, dispatch_uid=uid)
+
+
+class HitCounter:
+    """
+    Buffers the hits and misses of cached endpoints in process
+
+    Requests only increment an in-memory counter, a daemon thread adds them to the
+    counters of the shared cache every ``flush_interval`` seconds with one ``incr`` per
+    counter, so counting costs no cache write per request.
+    """
+
+    def __init__(self, flush_interval=10):
+        self.flush_interval = flush_interval
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _start(self):
+        # the thread of a parent process does not run after a fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._thread = threading.Thread(target=self._run, name='response-cache-counter', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("response cache statistics could not be written, retrying on the next flush")
+
+    def count(self, counter, namespace):
+        self._start()
+        with self._lock:
+            self._counts[COUNTER_KEY.format(counter=counter, namespace=namespace)] += 1
+
+    def pending(self):
+        """
+        Returns the counts of this process not flushed yet
+        """
+        with self._lock:
+            return dict(self._counts)
+
+    def flush(self):
+        """
+        Adds the buffered counts to the counters of the cache, they are buffered again
+        if it fails
+        """
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        done = set()
+        try:
+            for key, value in counts.items():
+                cache.add(key, 0, timeout=None)
+                try:
+                    cache.incr(key, value)
+                except ValueError:
+                    # evicted in between
+                    cache.add(key, value, timeout=None)
+                done.add(key)
+        except Exception:
+            with self._lock:
+                self._counts.update({key: value for key, value in counts.items() if key not in done})
+            raise
+
+
+hit_counter = HitCounter(getattr(settings, 'RESPONSE_CACHE_STATS_INTERVAL', 10))
+atexit.register(hit_counter.flush)
+
+
+def cache_response(*models, namespace=None, timeout=None):
+    """
+    Caches the successful responses of a GET handler for anonymous requests
+
+    Responses are keyed by the endpoint, the URL path with its sorted query parameters
+    and the generations of ``models``, which the save and delete signals of these
+    models bump. Hits and misses are counted per endpoint, see ``stats``.
+
+    Parameters
+    ----------
+    models : django.db.models.Model
+        models the response is built from
+
+    namespace : str
+        name of the endpoint in keys and statistics, defaults to the handler's qualified name
+
+    timeout : integer
+        seconds a response is kept, ``RESPONSE_CACHE_TIMEOUT`` by default
+    """
+    labels = [model_label(model) for model in models]
+    track(*models)
+
+    def decorator(handler):
+        name = namespace or handler.__qualname__
+        registry[name] = labels
+
+        @wraps(handler)
+        def wrapper(*args, **kwargs):
+            # APIView methods receive (self, request), function views (request)
+            request = args[1] if len(args) > 1 and hasattr(args[1], 'query_params') else args[0]
+            if request.method != 'GET' or request.user.is_authenticated:
+                return handler(*args, **kwargs)
+
+            url = request.path + '?' + '&'.join(sorted(request.GET.urlencode().split('&')))
+            key = RESPONSE_KEY.format(
+                namespace=name,
+                generations=_generations(labels),
+                url=hashlib.md5(url.encode()).hexdigest(),
+            )
+            cached = cache.get(key)
+            if cached is not None:
+                hit_counter.count('hits', name)
+                data, status = cached
+                return Response(data, status=status)
+
+            hit_counter.count('misses', name)
+            response = handler(*args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, (response.data, response.status_code),
+                          timeout if timeout is not None else getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 60))
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def stats():
+    """
+    Returns the hits, misses and hit ratio of every cached endpoint
+
+    Counts of the other processes are up to ``RESPONSE_CACHE_STATS_INTERVAL`` seconds
+    late, those of this one are current.
+    """
+    keys = [COUNTER_KEY.format(counter=counter, namespace=name) for name in registry for counter in ('hits', 'misses')]
+    counters = Counter(cache.get_many(keys))
+    counters.update(hit_counter.pending())
+    result = {}
+    for name, labels in sorted(registry.items()):
+        hits = counters.get(COUNTER_KEY.format(counter='hits', namespace=name), 0)
+        misses = counters.get(COUNTER_KEY.format(counter='misses', namespace=name), 0)
+        result[name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / (hits + misses) if hits + misses else None,
+            'models': labels,
+        }
+    return result
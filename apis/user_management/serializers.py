@@ -1,4 +1,5 @@
 from accounts.models import *
+from apis import image_variants
 from djoser.serializers import UserSerializer
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
@@ -14,7 +15,13 @@ class ProfileSerializer(ModelSerializer):
     class Meta:
         model = Profile
         fields = ['vine_link', 'profile_image', 'banner_image', 'about', 'vine_link',
-                  'facebook_link', 'twitter_link', 'google_plus_link']
+                  'facebook_link', 'twitter_link', 'google_plus_link', 'image_variants']
+        read_only_fields = ('image_variants',)
+
+    def to_representation(self, instance):
+        response = super().to_representation(instance)
+        response['image_variants'] = image_variants.urls(instance.image_variants)
+        return response
 
 
 class PasswordResetSerializer(serializers.Serializer):
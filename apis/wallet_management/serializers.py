@@ -1,11 +1,16 @@
+from apis.fieldsets import SparseFieldsetMixin
+from apis.nft_management.serializers import EagerLoadingMixin
 from rest_framework.serializers import ModelSerializer
 from .models import *
 
 
-class WalletSerializer(ModelSerializer):
+class WalletSerializer(SparseFieldsetMixin, EagerLoadingMixin, ModelSerializer):
     """
     Serializer for Wallet
     """
+    select_related_fields = ('user',)
+    related_only_fields = ('user__first_name', 'user__last_name')
+
     class Meta:
         model = Wallet
         fields = '__all__'
@@ -13,5 +18,6 @@ class WalletSerializer(ModelSerializer):
 
     def to_representation(self, instance):
         response = super().to_representation(instance)
-        response['user'] = f"{instance.user.first_name} {instance.user.last_name}"
+        if self.wants('user'):
+            response['user'] = f"{instance.user.first_name} {instance.user.last_name}"
         return response
@@ -1,3 +1,4 @@
+from apis.fieldsets import sparse_fieldset
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from rest_framework.response import Response
@@ -17,8 +18,9 @@ class WalletAPI(APIView):
         Api for getting specific wallet information
         """
         try:
-            wall_obj = Wallet.objects.get(pk=pk)
-            serializer = WalletSerializer(wall_obj)
+            fieldset = sparse_fieldset(request)
+            wall_obj = WalletSerializer.setup_eager_loading(Wallet.objects.all(), **fieldset).get(pk=pk)
+            serializer = WalletSerializer(wall_obj, **fieldset)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Wallet.DoesNotExist:
             return Response({"message": "Wallet does not exist"}, status=status.HTTP_404_NOT_FOUND)
@@ -112,8 +114,9 @@ class WalletListView(APIView):
         Api for getting all wallet information
         """
         try:
-            wallet_obj = Wallet.objects.all()
-            serializer = WalletSerializer(wallet_obj, many=True)
+            fieldset = sparse_fieldset(request)
+            wallet_obj = WalletSerializer.setup_eager_loading(Wallet.objects.all(), **fieldset)
+            serializer = WalletSerializer(wallet_obj, many=True, **fieldset)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         except Exception as e: